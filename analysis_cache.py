@@ -0,0 +1,297 @@
+"""
+Shared, persistent PyInstaller workspace for launcher builds.
+
+Every launcher is built from the same template (main_edge.py); only the
+bundled app_config.json and the icon differ. In shared mode all builds run in
+one persistent work directory with a fixed spec file, so PyInstaller's
+Analysis and PYZ results are reused and only PKG/EXE are assembled again for
+each app.
+
+The work directory is keyed by a hash of the template, the spec template, the
+size profile and the PyInstaller version, so it is replaced automatically when
+any of them changes. Parallel builds each lock one of several slots inside it.
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+
+from build_cache import default_cache_dir, pyinstaller_version
+
+# Bump when SPEC_TEMPLATE or the slot layout changes
+WORKSPACE_VERSION = 1
+
+# While every slot is busy, they are all polled this often (at most), so a
+# waiting build takes whichever frees first
+SLOT_POLL_SECONDS = 0.5
+
+SCRIPT_NAME = "launcher.py"
+SPEC_NAME = "launcher.spec"
+EXE_BASENAME = "launcher"
+
+# App-specific files are added to the EXE only, never to Analysis: Analysis
+# rebuilds whenever one of its data files is newer than its last run.
+SPEC_TEMPLATE = '''# Generated by Web App Builder - shared launcher workspace, do not edit
+a = Analysis(
+    [{script!r}],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    runtime_hooks=[],
+    excludes={excludes!r},
+    noarchive=False,
+)
+pyz = PYZ(a.pure, *([a.zipped_data] if hasattr(a, 'zipped_data') else []))
+app_datas = [
+    ('app_config.json', {config!r}, 'DATA'),
+    ('app_icon.ico', {icon!r}, 'DATA'),
+]
+exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    *([a.zipfiles] if hasattr(a, 'zipfiles') else []),
+    a.datas + app_datas,
+    [],
+    name={name!r},
+    debug=False,
+    strip=False,
+    upx={upx!r},
+    runtime_tmpdir=None,
+    console=False,
+    icon={icon!r},
+)
+'''
+
+
+class FileLock:
+    """Exclusive, non-blocking-capable lock on a file (msvcrt on Windows, fcntl elsewhere)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def acquire(self, blocking=True):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+                while True:
+                    try:
+                        msvcrt.locking(fd, mode, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after ~10 seconds; keep waiting
+                        if not blocking:
+                            raise
+            else:
+                import fcntl
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(fd, flags)
+        except OSError:
+            os.close(fd)
+            return False
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is None:
+            return
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+class SharedSlot:
+    """One locked build slot inside the shared workspace."""
+
+    def __init__(self, path, lock, excludes=(), upx=True):
+        self.path = path
+        self._lock = lock
+        self.excludes = list(excludes)
+        self.upx = upx
+
+    @property
+    def script_path(self):
+        return os.path.join(self.path, SCRIPT_NAME)
+
+    @property
+    def spec_path(self):
+        return os.path.join(self.path, SPEC_NAME)
+
+    @property
+    def config_path(self):
+        return os.path.join(self.path, "app_config.json")
+
+    @property
+    def icon_path(self):
+        return os.path.join(self.path, "app_icon.ico")
+
+    @property
+    def exe_path(self):
+        return os.path.join(self.path, "dist", f"{EXE_BASENAME}.exe")
+
+    @property
+    def warn_path(self):
+        return os.path.join(self.path, "build", EXE_BASENAME, f"warn-{EXE_BASENAME}.txt")
+
+    def prepare(self, template_source, config_path, icon_path):
+        """
+        Stage the inputs for one app. The script and spec are only rewritten when
+        their content changes, because PyInstaller compares mtimes to decide
+        whether Analysis is still valid.
+        """
+        _write_if_changed(self.script_path, template_source)
+        _write_if_changed(self.spec_path, SPEC_TEMPLATE.format(
+            script=self.script_path,
+            config=self.config_path,
+            icon=self.icon_path,
+            name=EXE_BASENAME,
+            excludes=self.excludes,
+            upx=self.upx,
+        ))
+        shutil.copyfile(config_path, self.config_path)
+        shutil.copyfile(icon_path, self.icon_path)
+
+        # Force PKG/EXE assembly (new config and icon) while keeping Analysis/PYZ
+        if os.path.exists(self.exe_path):
+            os.remove(self.exe_path)
+        work_dir = os.path.join(self.path, "build", EXE_BASENAME)
+        if os.path.isdir(work_dir):
+            for name in os.listdir(work_dir):
+                if name.startswith(("PKG-", "EXE-")) and name.endswith(".toc"):
+                    os.remove(os.path.join(work_dir, name))
+
+    def command(self):
+        """PyInstaller command line for this slot (no --clean, persistent workpath)."""
+        return [
+            "pyinstaller",
+            "--noconfirm",
+            f"--workpath={os.path.join(self.path, 'build')}",
+            f"--distpath={os.path.join(self.path, 'dist')}",
+            self.spec_path,
+        ]
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedWorkspace:
+    """Persistent PyInstaller work directories shared by all launcher builds."""
+
+    def __init__(self, root=None, slots=None, size=None):
+        self.root = root or os.path.join(default_cache_dir(), "work")
+        self.slots = max(1, slots or os.cpu_count() or 1)
+        # Optional launcher_size.SizeProfile: excludes and UPX go into the spec
+        self.size = size
+        self._toolchain = None
+
+    def toolchain(self):
+        """PyInstaller version, probed once and then carried along (also into pool workers)."""
+        if self._toolchain is None:
+            self._toolchain = pyinstaller_version()
+        return self._toolchain
+
+    def key(self, template_source):
+        """Identify a workspace generation: template + spec layout + size profile + PyInstaller version."""
+        h = hashlib.sha256()
+        h.update(f"webapp-shared-work:{WORKSPACE_VERSION}\0".encode())
+        h.update(template_source.encode('utf-8'))
+        h.update(b"\0")
+        h.update(SPEC_TEMPLATE.encode('utf-8'))
+        h.update(b"\0")
+        if self.size is not None:
+            h.update(f"size:{self.size.key()}\0".encode())
+        h.update(self.toolchain().encode('utf-8'))
+        return h.hexdigest()[:16]
+
+    def acquire(self, key):
+        """
+        Lock a free slot for this workspace key, waiting for one if all are busy.
+        Stale workspaces from older templates/toolchains are removed first.
+        """
+        self.prune(key)
+        key_dir = os.path.join(self.root, key)
+        os.makedirs(key_dir, exist_ok=True)
+
+        for index in range(self.slots):
+            slot = self._try_slot(key_dir, index, blocking=False)
+            if slot is not None:
+                return slot
+
+        # Everything busy: wait for whichever slot frees first. Polling covers
+        # threads of one process (GUI, service) as well as other processes
+        delay = 0.02
+        while True:
+            time.sleep(delay)
+            delay = min(delay * 2, SLOT_POLL_SECONDS)
+            for index in range(self.slots):
+                slot = self._try_slot(key_dir, index, blocking=False)
+                if slot is not None:
+                    return slot
+
+    def prune(self, keep_key):
+        """Delete workspaces for other keys that nobody is using."""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if name == keep_key:
+                continue
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path) or self._in_use(path):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _try_slot(self, key_dir, index, blocking):
+        slot_dir = os.path.join(key_dir, f"slot-{index}")
+        os.makedirs(slot_dir, exist_ok=True)
+        lock = FileLock(os.path.join(key_dir, f"slot-{index}.lock"))
+        if not lock.acquire(blocking=blocking):
+            return None
+        if self.size is None:
+            return SharedSlot(slot_dir, lock)
+        excludes, upx = self.size.spec_values()
+        return SharedSlot(slot_dir, lock, excludes=excludes, upx=upx)
+
+    def _in_use(self, key_dir):
+        for name in os.listdir(key_dir):
+            if not name.endswith(".lock"):
+                continue
+            lock = FileLock(os.path.join(key_dir, name))
+            if not lock.acquire(blocking=False):
+                return True
+            lock.release()
+        return False
+
+
+def _write_if_changed(path, content):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
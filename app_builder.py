@@ -2,26 +2,116 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import sys
-import subprocess
-import shutil
-import threading
+import time
+import queue
+import itertools
+import importlib.util
+
+# The build machinery (build_engine and friends, which pull in subprocess,
+# shutil, sqlite3 and multiprocessing) and Pillow are imported when first
+# needed, so the window shows without waiting for them
+
+# Resizing a PNG into a multi-size ICO needs Pillow; look for it without importing it
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# How often the UI thread drains build events from the workers
+EVENT_POLL_MS = 100
+# Watch mode: quiet time after the last form edit before rebuilding
+WATCH_DEBOUNCE_MS = 1000
+# Window height that shows the whole form (less on smaller screens)
+WINDOW_HEIGHT = 1005
+
+
+class QueuedBuild:
+    """One row in the job list. Only the UI thread touches it (cancel is thread-safe)."""
+    
+    def __init__(self, job_id, spec, mode):
+        self.id = job_id
+        self.spec = spec
+        self.mode = mode
+        self.state = "queued"
+        self.fraction = 0.0
+        self.result = None
+        self.error = None
+        from build_engine import BuildCancel
+        self.cancel = BuildCancel()
+    
+    @property
+    def active(self):
+        return self.state in ("queued", "running")
+
+
+class ScrollableFrame(ttk.Frame):
+    """A frame whose content (self.inner) scrolls vertically once it is taller than the frame."""
+    
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.canvas = tk.Canvas(self, bg='white', highlightthickness=0, borderwidth=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        
+        self.inner = ttk.Frame(self.canvas)
+        self.window = self.canvas.create_window(0, 0, window=self.inner, anchor='nw')
+        self.inner.bind('<Configure>', self.on_inner_configure)
+        self.canvas.bind('<Configure>', self.on_canvas_configure)
+        # The wheel scrolls the form while the pointer is over it
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.canvas.bind_all(sequence, self.on_wheel, add='+')
+    
+    def on_inner_configure(self, event=None):
+        self.canvas.configure(scrollregion=self.canvas.bbox('all'))
+    
+    def on_canvas_configure(self, event):
+        self.canvas.itemconfigure(self.window, width=event.width)
+    
+    def on_wheel(self, event):
+        widget = self.winfo_containing(event.x_root, event.y_root)
+        if widget is None or not (widget is self or str(widget).startswith(f"{self}.")):
+            return  # e.g. over the job list
+        if self.inner.winfo_reqheight() <= self.canvas.winfo_height():
+            return  # everything fits
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, 'units')
+        elif event.num == 5 or event.delta < 0:
+            self.canvas.yview_scroll(1, 'units')
 
-# Try to import PIL for PNG to ICO conversion
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
 
 class WebAppBuilder:
     VERSION = "1.0.0"
     OWNER = "OMT Data MLG"
     
+    # Build strategies offered in the "Build mode" dropdown
+    BUILD_MODES = [
+        ("standard", "Standard (full PyInstaller build)"),
+        ("shared", "Fast rebuild (reuse PyInstaller analysis)"),
+        ("stamp", "Stamp prebuilt launcher (fastest)"),
+    ]
+    
+    # Launcher packaging offered in the "Packaging" dropdown
+    PACKAGING_MODES = [
+        ("onefile", "Single exe (unpacks on every start)"),
+        ("onedir", "Exe in a folder (faster start)"),
+        ("stub", "Script stub (fastest start, needs Windows Script Host)"),
+    ]
+    FLAG_PRESETS = [
+        ((), "Default"),
+        (("lean",), "Lean (no background networking, updates, extensions, sync)"),
+        (("low-memory",), "Low memory (fewer renderer processes, for VDI)"),
+        (("lean", "low-memory"), "Lean + low memory"),
+    ]
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Web App Builder")
-        self.root.geometry("650x580")
-        self.root.resizable(False, False)  # Disable window resizing
+        # The form scrolls and the build panel stays at the bottom, so the
+        # window fits small laptop screens and may be resized
+        height = min(WINDOW_HEIGHT, self.root.winfo_screenheight() - 100)
+        self.root.geometry(f"650x{height}")
+        self.root.minsize(560, 420)
         self.root.configure(bg='white')  # Set white background
         
         # Set default icon path
@@ -42,20 +132,67 @@ class WebAppBuilder:
         self.window_height = tk.StringVar(value="800")
         self.create_shortcut = tk.BooleanVar(value=True)
         self.frameless = tk.BooleanVar(value=False)
-        
+        self.single_instance = tk.BooleanVar(value=False)
+        self.own_profile = tk.BooleanVar(value=False)
+        self.optimize_size = tk.BooleanVar(value=False)
+        self.telemetry = tk.BooleanVar(value=False)
+        self.watch_mode = tk.BooleanVar(value=False)
+        self.profile_dir = tk.StringVar(value="")
+        self.cache_size = tk.StringVar(value="")
+        self.cache_dir = tk.StringVar(value="")
+        self.build_mode = tk.StringVar(value=self.BUILD_MODES[0][1])
+        self.packaging = tk.StringVar(value=self.PACKAGING_MODES[0][1])
+        self.flag_preset = tk.StringVar(value=self.FLAG_PRESETS[0][1])
+        self.extra_flags = tk.StringVar(value="")
+        
+        # Build cache hits/misses for this session (created with the first result)
+        self.cache_stats = None
+        
+        # Queued builds run on a worker pool, started with the first build;
+        # workers never touch tk and report back through self.events, which
+        # the UI thread polls
+        self.workers = max(1, os.cpu_count() or 1)  # build_engine.default_jobs()
+        self.executor = None
+        self.events = queue.Queue()
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+        self.options = {}  # (build mode, profile) -> BuildOptions, shared by those builds
+        self.output_root = os.path.join(os.getcwd(), "output")
+        self.output_dir = None
+        
+        # Watch mode: the watch module's WatchThread on the icon file while on,
+        # the pending debounced rebuild, the last spec it built and whether a
+        # change came in while that app was still building
+        self.watcher = None
+        self.watch_after = None
+        self.watch_built = None
+        self.watch_pending = False
+        
+        # Paint the form first; the build panel, event polling and the
+        # registry check follow once the window is on screen
+        self.started = False
         self.create_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind('<Map>', self.on_map, add='+')
     
     def get_bundled_icon_path(self):
         """Get path to bundled default icon, works for both dev and PyInstaller exe"""
-        if getattr(sys, 'frozen', False):
-            # Running as PyInstaller exe
-            base_path = sys._MEIPASS
-        else:
-            # Running as script
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        
+        # Same lookup as build_engine.get_bundled_icon_path, without importing the build machinery
+        base_path = sys._MEIPASS if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
         return os.path.join(base_path, "app_icon.ico")
     
+    def on_map(self, event):
+        if event.widget is self.root and not self.started:
+            self.started = True
+            self.root.after_idle(self.finish_startup)
+    
+    def finish_startup(self):
+        """Deferred part of startup, run once the window has been mapped"""
+        self.root.update_idletasks()  # let the form paint before building the rest
+        self.create_build_ui()
+        self.root.after(EVENT_POLL_MS, self.poll_events)
+        self.check_registry()
+    
     def create_ui(self):
         # Configure style for white background
         style = ttk.Style()
@@ -65,9 +202,12 @@ class WebAppBuilder:
         style.configure('TLabelframe', background='white')
         style.configure('TLabelframe.Label', background='white')
         
-        # Main frame with padding
-        main_frame = ttk.Frame(self.root, padding="20")
+        # The form, scrolling when the window is too short for it
+        form_area = ScrollableFrame(self.root)
+        form_area.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        main_frame = ttk.Frame(form_area.inner, padding=(20, 20, 20, 0))
         main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        form_area.inner.columnconfigure(0, weight=1)
         
         # Configure column weights to make everything expand
         main_frame.columnconfigure(1, weight=1)
@@ -92,12 +232,11 @@ class WebAppBuilder:
         ttk.Entry(main_frame, textvariable=self.app_url).grid(row=4, column=1, columnspan=2, pady=5, sticky=(tk.W, tk.E), padx=(5, 0))
         
         # Icon File
-        icon_label_text = "Icon File (.ico/.png):" if PIL_AVAILABLE else "Icon File (.ico):"
-        ttk.Label(main_frame, text=icon_label_text).grid(row=5, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="Icon File (.ico/.png):").grid(row=5, column=0, sticky=tk.W, pady=5)
         ttk.Entry(main_frame, textvariable=self.icon_path).grid(row=5, column=1, pady=5, sticky=(tk.W, tk.E), padx=(5, 5))
         ttk.Button(main_frame, text="Browse...", command=self.browse_icon).grid(row=5, column=2, pady=5, sticky=tk.E)
         
-        hint_text = "(Optional - uses default icon if not specified. PNG will be converted to ICO)" if PIL_AVAILABLE else "(Optional - uses default icon if not specified)"
+        hint_text = "(Optional - uses default icon if not specified. PNG will be converted to ICO)" if PIL_AVAILABLE else "(Optional - uses default icon if not specified. PNG up to 256x256, square)"
         ttk.Label(main_frame, text=hint_text, font=('Arial', 8), foreground='gray').grid(row=6, column=1, columnspan=2, sticky=tk.W, padx=(5, 0))
         
         # Window Size
@@ -117,29 +256,95 @@ class WebAppBuilder:
         
         ttk.Checkbutton(options_frame, text="Create Start Menu shortcut", variable=self.create_shortcut).grid(row=0, column=0, sticky=tk.W)
         ttk.Checkbutton(options_frame, text="Frameless window (no title bar)", variable=self.frameless).grid(row=1, column=0, sticky=tk.W)
+        ttk.Checkbutton(options_frame, text="Single instance (a second launch focuses the open window)", variable=self.single_instance, command=self.on_single_instance_changed).grid(row=2, column=0, sticky=tk.W)
+        
+        self.own_profile_check = ttk.Checkbutton(options_frame, text="Dedicated browser profile (own cache and cookies)", variable=self.own_profile)
+        self.own_profile_check.grid(row=3, column=0, sticky=tk.W)
+        
+        profile_frame = ttk.Frame(options_frame)
+        profile_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+        ttk.Label(profile_frame, text="Profile folder:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        ttk.Entry(profile_frame, textvariable=self.profile_dir, width=30).grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(profile_frame, text="Cache MB:").grid(row=0, column=2, sticky=tk.W, padx=(10, 5))
+        ttk.Entry(profile_frame, textvariable=self.cache_size, width=8).grid(row=0, column=3, sticky=tk.W)
+        ttk.Label(profile_frame, text="Cache folder:").grid(row=1, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        ttk.Entry(profile_frame, textvariable=self.cache_dir, width=30).grid(row=1, column=1, sticky=tk.W, pady=(5, 0))
+        ttk.Label(profile_frame, text="(blank = defaults; %LOCALAPPDATA% etc. allowed)", font=('Arial', 8), foreground='gray').grid(row=1, column=2, columnspan=2, sticky=tk.W, padx=(10, 0), pady=(5, 0))
+        
+        ttk.Checkbutton(options_frame, text="Optimize for size (leave out modules the launcher doesn't use)", variable=self.optimize_size).grid(row=5, column=0, sticky=tk.W, pady=(5, 0))
+        
+        ttk.Checkbutton(options_frame, text="Launch telemetry (log launch timings on each user's PC)", variable=self.telemetry).grid(row=6, column=0, sticky=tk.W)
+        
+        ttk.Checkbutton(options_frame, text="Watch (rebuild when the form or the icon file changes)", variable=self.watch_mode, command=self.toggle_watch).grid(row=7, column=0, sticky=tk.W)
+        
+        mode_frame = ttk.Frame(options_frame)
+        mode_frame.grid(row=8, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Label(mode_frame, text="Build mode:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        ttk.Combobox(mode_frame, textvariable=self.build_mode, state='readonly', width=40,
+                     values=[label for _, label in self.BUILD_MODES]).grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(mode_frame, text="Packaging:").grid(row=1, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        ttk.Combobox(mode_frame, textvariable=self.packaging, state='readonly', width=40,
+                     values=[label for _, label in self.PACKAGING_MODES]).grid(row=1, column=1, sticky=tk.W, pady=(5, 0))
+        ttk.Label(mode_frame, text="Browser flags:").grid(row=2, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        ttk.Combobox(mode_frame, textvariable=self.flag_preset, state='readonly', width=40,
+                     values=[label for _, label in self.FLAG_PRESETS]).grid(row=2, column=1, sticky=tk.W, pady=(5, 0))
+        ttk.Label(mode_frame, text="Extra flags:").grid(row=3, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        ttk.Entry(mode_frame, textvariable=self.extra_flags, width=43).grid(row=3, column=1, sticky=tk.W, pady=(5, 0))
+        # Script stubs don't run where Windows Script Host is blocked: say so next to the dropdown
+        self.packaging_note = ttk.Label(mode_frame, text="", foreground='#b35900', wraplength=560)
+        self.packaging_note.grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        self.packaging.trace_add('write', self.on_packaging_changed)
+        
+        # Any edit to the form restarts the watch mode debounce
+        for var in (self.app_name, self.app_url, self.icon_path, self.window_width, self.window_height,
+                    self.create_shortcut, self.frameless, self.single_instance, self.own_profile,
+                    self.optimize_size, self.telemetry, self.profile_dir, self.cache_size, self.cache_dir,
+                    self.build_mode, self.packaging, self.flag_preset, self.extra_flags):
+            var.trace_add('write', self.on_form_changed)
+    
+    def create_build_ui(self):
+        # Build panel below the form, always in view
+        build_frame = ttk.Frame(self.root, padding=(20, 0, 20, 15))
+        build_frame.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        build_frame.columnconfigure(0, weight=1)
+        
+        # Build Button (stays enabled: every click queues another build)
+        self.build_button = ttk.Button(build_frame, text="Create App", command=self.build_app)
+        self.build_button.grid(row=0, column=0, pady=(10, 5), sticky=(tk.W, tk.E))
+        
+        # Job list
+        jobs_frame = ttk.LabelFrame(build_frame, text="Builds", padding="5")
+        jobs_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
+        jobs_frame.columnconfigure(0, weight=1)
+        
+        self.job_list = ttk.Treeview(jobs_frame, columns=("app", "packaging", "status", "progress"),
+                                     show='headings', height=4, selectmode='browse')
+        for column, heading, width in (("app", "App", 150), ("packaging", "Packaging", 80),
+                                       ("status", "Status", 250), ("progress", "Progress", 70)):
+            self.job_list.heading(column, text=heading)
+            self.job_list.column(column, width=width, stretch=(column == "status"))
+        self.job_list.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        scrollbar = ttk.Scrollbar(jobs_frame, orient=tk.VERTICAL, command=self.job_list.yview)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.job_list.configure(yscrollcommand=scrollbar.set)
+        self.job_list.bind('<<TreeviewSelect>>', self.on_job_selected)
         
         # Progress/Status
-        self.status_label = ttk.Label(main_frame, text="Ready to build", foreground='gray')
-        self.status_label.grid(row=9, column=0, columnspan=3, pady=10)
-        
-        # Progress bar
-        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=10, column=0, columnspan=3, pady=5, sticky=(tk.W, tk.E))
+        self.status_label = ttk.Label(build_frame, text="Ready to build", foreground='gray', wraplength=590)
+        self.status_label.grid(row=2, column=0, pady=5)
         
-        # Build Button
-        self.build_button = ttk.Button(main_frame, text="Create App", command=self.build_app)
-        self.build_button.grid(row=11, column=0, columnspan=3, pady=20, sticky=(tk.W, tk.E))
+        # Progress bar (all queued and running builds)
+        self.progress = ttk.Progressbar(build_frame, mode='determinate', maximum=100)
+        self.progress.grid(row=3, column=0, pady=5, sticky=(tk.W, tk.E))
         
         # Output folder button
-        self.output_button = ttk.Button(main_frame, text="Open Output Folder", command=self.open_output_folder, state='disabled')
-        self.output_button.grid(row=12, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        self.output_button = ttk.Button(build_frame, text="Open Output Folder", command=self.open_output_folder, state='disabled')
+        self.output_button.grid(row=4, column=0, pady=(10, 0), sticky=(tk.W, tk.E))
         
     def browse_icon(self):
-        filetypes = [("Icon Files", "*.ico")]
-        if PIL_AVAILABLE:
-            filetypes.insert(0, ("Image Files", "*.ico *.png"))
-            filetypes.append(("PNG Files", "*.png"))
-        filetypes.append(("All Files", "*.*"))
+        # PNG works without Pillow too, if it is already icon-sized
+        filetypes = [("Image Files", "*.ico *.png"), ("Icon Files", "*.ico"), ("PNG Files", "*.png"),
+                     ("All Files", "*.*")]
         
         filename = filedialog.askopenfilename(
             title="Select Icon File",
@@ -148,422 +353,347 @@ class WebAppBuilder:
         if filename:
             self.icon_path.set(filename)
     
-    def validate_inputs(self):
-        if not self.app_name.get().strip():
-            messagebox.showerror("Error", "Please enter an app name")
-            return False
+    def get_build_spec(self):
+        """Snapshot the form into a frozen BuildSpec (UI thread only). Raises BuildError."""
+        from build_engine import BuildSpec
+        return BuildSpec(
+            name=self.app_name.get(),
+            url=self.app_url.get(),
+            icon=self.icon_path.get(),
+            width=self.window_width.get(),
+            height=self.window_height.get(),
+            frameless=self.frameless.get(),
+            shortcut=self.create_shortcut.get(),
+            single_instance=self.single_instance.get(),
+            profile=self.own_profile.get(),
+            profile_dir=self.profile_dir.get(),
+            cache_size_mb=self.cache_size.get().strip(),
+            cache_dir=self.cache_dir.get(),
+            packaging=next(key for key, label in self.PACKAGING_MODES if label == self.packaging.get()),
+            presets=list(next(key for key, label in self.FLAG_PRESETS if label == self.flag_preset.get())),
+            flags=self.extra_flags.get(),
+            telemetry=self.telemetry.get(),
+        ).freeze()
+    
+    def get_options(self, mode, optimize="default"):
+        """BuildOptions for a build mode and profile, created once so their builds share cache and workspace"""
+        from build_engine import BuildOptions
+        key = (mode, optimize)
+        if key not in self.options:
+            self.options[key] = BuildOptions.for_mode(mode, slots=self.workers, optimize=optimize)
+        return self.options[key]
+    
+    def build_app(self, auto=False):
+        """Queue a build of the form; auto (watch mode) builds report problems in the status line"""
+        from build_engine import BuildError
         
-        if not self.app_url.get().strip():
-            messagebox.showerror("Error", "Please enter a web URL")
-            return False
+        # If no icon specified, use default app_icon.ico
+        if not self.icon_path.get() and os.path.exists(self.default_icon_path):
+            self.icon_path.set(self.default_icon_path)
         
-        if not self.app_url.get().startswith(('http://', 'https://')):
-            messagebox.showerror("Error", "URL must start with http:// or https://")
-            return False
+        try:
+            spec = self.get_build_spec()
+        except BuildError as e:
+            if auto:
+                self.status_label.config(text=f"Watching - not rebuilt: {e}", foreground='red')
+            else:
+                messagebox.showerror("Error", str(e))
+            return
         
-        # If no icon specified, use default app_icon.ico
-        if not self.icon_path.get():
-            if os.path.exists(self.default_icon_path):
-                self.icon_path.set(self.default_icon_path)
+        # Two builds of one app would share an output folder
+        busy = next((job for job in self.jobs.values()
+                     if job.active and job.spec.safe_name == spec.safe_name), None)
+        if busy is not None:
+            if auto:
+                self.watch_pending = True  # rebuilt once the running build finishes
             else:
-                messagebox.showerror("Error", "Please select an icon file or ensure app_icon.ico exists")
-                return False
-        
-        if not os.path.exists(self.icon_path.get()):
-            messagebox.showerror("Error", "Icon file not found")
-            return False
-        
-        # Check if it's a PNG file and PIL is not available
-        if self.icon_path.get().lower().endswith('.png') and not PIL_AVAILABLE:
-            messagebox.showerror(
-                "Error", 
-                "PNG support requires Pillow library.\n\n"
-                "Install with: pip install Pillow\n\n"
-                "Or use an .ico file instead."
-            )
-            return False
+                messagebox.showerror("Error", f"'{busy.spec.name}' is already being built")
+            return
         
+        mode = next(key for key, label in self.BUILD_MODES if label == self.build_mode.get())
+        optimize = "size" if self.optimize_size.get() else "default"
+        # Resolved before the job is listed: a missing toolchain (or UPX) fails here
         try:
-            width = int(self.window_width.get())
-            height = int(self.window_height.get())
-            if width < 100 or height < 100:
-                raise ValueError()
-        except ValueError:
-            messagebox.showerror("Error", "Window size must be valid numbers (min 100x100)")
-            return False
-        
-        return True
-    
-    def convert_png_to_ico(self, png_path, ico_path):
-        """Convert PNG file to ICO format with multiple sizes"""
-        try:
-            img = Image.open(png_path)
-            
-            # Convert to RGBA if not already
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
-            
-            # Create icon with multiple sizes for better quality
-            icon_sizes = [(256, 256), (128, 128), (64, 64), (48, 48), (32, 32), (16, 16)]
-            
-            # Resize image to all sizes
-            img.save(ico_path, format='ICO', sizes=icon_sizes)
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to convert PNG to ICO:\n{str(e)}")
-            return False
-    
-    def get_safe_filename(self, name):
-        """Convert app name to safe filename (no spaces, special chars)"""
-        # Remove or replace special characters
-        safe_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '' for c in name)
-        # Replace spaces with underscores
-        safe_name = safe_name.replace(' ', '_')
-        # Remove multiple underscores
-        while '__' in safe_name:
-            safe_name = safe_name.replace('__', '_')
-        return safe_name.strip('_')
-    
-    def generate_main_script(self, output_dir):
-        """Generate the main_edge.py script with user's settings"""
-        app_name = self.app_name.get().strip()
-        app_url = self.app_url.get().strip()
-        width = self.window_width.get()
-        height = self.window_height.get()
-        frameless = str(self.frameless.get())
-        create_shortcut = self.create_shortcut.get()
-        
-        script_content = f'''import os
-import sys
-import subprocess
-import ctypes
-
-APP_NAME = "{app_name}"
-APP_URL = "{app_url}"
-ICON_FILE = "app_icon.ico"
-
-# Window configuration
-WINDOW_WIDTH = {width}
-WINDOW_HEIGHT = {height}
-WINDOW_FRAMELESS = {frameless}
-CREATE_SHORTCUT = {create_shortcut}
-
-# ---------- Utilities ----------
-
-def resource_path(rel_path):
-    """Get absolute path to resource, works for PyInstaller onefile bundles."""
-    if hasattr(sys, "_MEIPASS"):
-        base = sys._MEIPASS
-    else:
-        base = os.path.abspath(".")
-    return os.path.join(base, rel_path)
-
-def create_shortcut(lpath, target, args="", icon=None, desc=None):
-    """Create a Windows .lnk shortcut using COM."""
-    try:
-        import win32com.client
-        shell = win32com.client.Dispatch("WScript.Shell")
-        shortcut = shell.CreateShortCut(lpath)
-        shortcut.Targetpath = target
-        shortcut.Arguments = args
-        
-        if icon and os.path.exists(icon):
-            if icon.lower().endswith('.ico'):
-                shortcut.IconLocation = icon
-            elif target.lower().endswith('.exe'):
-                shortcut.IconLocation = f"{{target}},0"
+            options = self.get_options(mode, optimize)
+        except BuildError as e:
+            if auto:
+                self.status_label.config(text=f"Watching - not rebuilt: {e}", foreground='red')
             else:
-                shortcut.IconLocation = icon
-        elif target.lower().endswith('.exe'):
-            shortcut.IconLocation = f"{{target}},0"
-            
-        if desc:
-            shortcut.Description = desc
-        shortcut.WorkingDirectory = os.path.dirname(target)
-        shortcut.save()
-        return True
-    except Exception:
-        return False
-
-def create_shortcuts_if_needed():
-    """Create Start Menu shortcut pointing to this exe."""
-    if not CREATE_SHORTCUT:
-        return 0, []
+                messagebox.showerror("Error", str(e))
+            return
         
-    if not getattr(sys, 'frozen', False):
-        return 0, []
+        if self.watch_mode.get():
+            self.watch_built = (spec.to_dict(), mode, self.optimize_size.get())
+        job = QueuedBuild(next(self.job_ids), spec, mode)
+        self.jobs[job.id] = job
+        self.job_list.insert('', 'end', iid=str(job.id),
+                             values=(spec.name, spec.packaging, "Queued", "0%"))
+        self.job_list.see(str(job.id))
+        
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="build")
+        self.executor.submit(self.build_thread, job.id, spec, self.output_root, options, job.cancel)
+        self.refresh_progress()
     
-    exe_path = sys.executable
-    start_menu_dir = os.path.join(os.environ.get("APPDATA", ""), r"Microsoft\\Windows\\Start Menu\\Programs")
-    start_shortcut = os.path.join(start_menu_dir, f"{{APP_NAME}}.lnk")
-
-    success_count = 0
-    failed_locations = []
-
-    # Remove old shortcut first
-    if os.path.exists(start_shortcut):
+    def build_thread(self, job_id, spec, output_root, options, cancel):
+        """Runs on a pool thread: no tk calls here, everything goes through self.events"""
+        from build_engine import build_launcher
+        events = self.events
+        last_progress = [0.0]
+        
+        def update_status(message):
+            events.put(("status", job_id, message))
+        
+        def update_progress(phase, fraction, phase_elapsed):
+            # Called for every PyInstaller output line; report at most ~10 times a second
+            now = time.monotonic()
+            if fraction < 1.0 and now - last_progress[0] < 0.1:
+                return
+            last_progress[0] = now
+            events.put(("progress", job_id, phase, fraction, phase_elapsed))
+        
+        if cancel.cancelled:
+            return
+        events.put(("running", job_id))
         try:
-            os.remove(start_shortcut)
-        except Exception:
-            pass
-
-    # Create Start Menu shortcut
-    try:
-        os.makedirs(start_menu_dir, exist_ok=True)
-        if create_shortcut(start_shortcut, exe_path, icon=exe_path, desc=APP_NAME):
-            success_count += 1
-        else:
-            failed_locations.append("Start Menu")
-    except Exception:
-        failed_locations.append("Start Menu")
-
-    return success_count, failed_locations
-
-def message_box(title, text, flags=0x40 | 0x0):
-    ctypes.windll.user32.MessageBoxW(0, text, title, flags)
-
-# ---------- App ----------
-
-def run_app():
-    """Launch browser in app mode."""
-    # Set AppUserModelID for proper taskbar icon
-    try:
-        app_id = f"WebApp.{{APP_NAME.replace(' ', '')}}.1.0"
-        ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(app_id)
-    except Exception:
-        pass
-    
-    # Create shortcuts if enabled
-    if CREATE_SHORTCUT:
+            result = build_launcher(spec, output_root, status=update_status, options=options,
+                                    progress=update_progress, cancel=cancel)
+            events.put(("done", job_id, result))
+        except Exception as e:
+            events.put(("failed", job_id, str(e)))
+    
+    def poll_events(self):
         try:
-            success_count, failed_locations = create_shortcuts_if_needed()
-            if success_count > 0 and not failed_locations:
-                message_box(APP_NAME, "Start Menu shortcut created successfully!")
-        except Exception:
+            while True:
+                kind, job_id, *args = self.events.get_nowait()
+                if kind == "watch":
+                    self.on_icon_changed(args[0])
+                    continue
+                job = self.jobs[job_id]
+                if kind == "running":
+                    job.state = "running"
+                    self.update_row(job, "Building...")
+                elif kind == "status":
+                    self.update_row(job, args[0])
+                elif kind == "progress":
+                    phase, fraction, phase_elapsed = args
+                    job.fraction = fraction
+                    self.update_row(job, f"PyInstaller: {phase} ({phase_elapsed:.0f}s)")
+                elif kind == "done":
+                    self.build_success(job, args[0])
+                elif kind == "failed":
+                    self.build_error(job, args[0])
+        except queue.Empty:
             pass
+        self.refresh_progress()
+        self.root.after(EVENT_POLL_MS, self.poll_events)
     
-    # Try to find Edge first, then Chrome as fallback
-    browser_path = None
-    browser_name = None
+    def update_row(self, job, status):
+        self.job_list.item(str(job.id), values=(job.spec.name, job.spec.packaging, status,
+                                                f"{job.fraction * 100:.0f}%"))
     
-    # Try Microsoft Edge
-    edge_paths = [
-        r"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe",
-        r"C:\\Program Files\\Microsoft\\Edge\\Application\\msedge.exe"
-    ]
+    def refresh_progress(self):
+        active = [job for job in self.jobs.values() if job.active]
+        if active:
+            self.progress['value'] = sum(job.fraction for job in active) / len(active) * 100
+            running = sum(1 for job in active if job.state == "running")
+            self.status_label.config(text=f"Building {running} app(s), {len(active) - running} queued",
+                                     foreground='blue')
     
-    for path in edge_paths:
-        if os.path.exists(path):
-            browser_path = path
-            browser_name = "Microsoft Edge"
-            break
-    
-    # Fallback to Chrome
-    if not browser_path:
-        chrome_paths = [
-            r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
-            r"C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe",
-            os.path.expandvars(r"%LOCALAPPDATA%\\Google\\Chrome\\Application\\chrome.exe")
-        ]
-        
-        for path in chrome_paths:
-            if os.path.exists(path):
-                browser_path = path
-                browser_name = "Google Chrome"
-                break
-    
-    # No browser found
-    if not browser_path:
-        message_box(
-            APP_NAME, 
-            "Error: No compatible browser found.\\n\\n"
-            "Please install Microsoft Edge or Google Chrome.", 
-            0x10
-        )
-        sys.exit(1)
-    
-    # Build command-line arguments
-    args = [
-        browser_path,
-        f"--app={{APP_URL}}",
-        f"--window-name={{APP_NAME}}",
-        f"--window-size={{WINDOW_WIDTH}},{{WINDOW_HEIGHT}}",
-        "--no-first-run",
-        "--no-default-browser-check"
-    ]
+    def build_success(self, job, result):
+        job.state = "succeeded"
+        job.result = result
+        job.fraction = 1.0
+        self.output_dir = os.path.dirname(result.exe_path)
+        if result.cached is not None:
+            if self.cache_stats is None:
+                from build_cache import CacheStats
+                self.cache_stats = CacheStats()
+            self.cache_stats.record(result.cached)
+        row_text = "✓ Done"
+        if result.cached:
+            row_text += " (from build cache)"
+        self.update_row(job, row_text)
+        self.output_button.config(state='normal')
+        self.watch_job_finished()
+        
+        # Results go to the job list and status line: a dialog here would stop
+        # the event polling (and every other build's progress) until dismissed
+        if any(other.active for other in self.jobs.values()):
+            return
+        self.progress['value'] = 100
+        self.show_result(job)
     
-    # Add options for frameless window
-    if WINDOW_FRAMELESS:
-        args.append("--app-auto-launched")
-        args.append("--disable-features=OverlayScrollbar")
+    def build_error(self, job, error_msg):
+        job.state = "failed"
+        job.error = error_msg
+        self.update_row(job, f"✗ {self.first_line(error_msg)}")
+        self.watch_job_finished()
+        if not any(other.active for other in self.jobs.values()):
+            self.progress['value'] = 0
+        self.show_result(job)
     
-    # Launch browser
-    subprocess.Popen(args)
-
-if __name__ == "__main__":
-    run_app()
-'''
-        
-        script_path = os.path.join(output_dir, "app_launcher.py")
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(script_content)
-        
-        return script_path
+    @staticmethod
+    def first_line(text):
+        return text.strip().splitlines()[0] if text.strip() else text
     
-    def build_app(self):
-        if not self.validate_inputs():
+    def show_result(self, job):
+        """Describe a finished build in the status line (selecting it in the job list shows it again)"""
+        if job.error is not None:
+            self.status_label.config(text=f"✗ '{job.spec.name}' failed:\n{job.error.strip()[:500]}",
+                                     foreground='red', justify='left')
             return
-        
-        # Disable button and start progress
-        self.build_button.config(state='disabled')
-        self.output_button.config(state='disabled')
-        self.progress.start()
-        self.status_label.config(text="Building app...", foreground='blue')
-        
-        # Run build in separate thread
-        thread = threading.Thread(target=self.build_thread)
-        thread.daemon = True
-        thread.start()
+        result = job.result
+        status_text = f"✓ App '{job.spec.name}' created: {result.exe_path}"
+        if result.cached is not None and self.cache_stats is not None:
+            status_text += f"\nBuild cache: {self.cache_stats}"
+        if result.icon_cached is not None:
+            status_text += " | Icon: " + ("from cache" if result.icon_cached else f"converted in {result.icon_seconds:.2f}s")
+        if result.sizes:
+            from launcher_size import format_breakdown
+            status_text += f"\nSize: {format_breakdown(result.sizes)}"
+        self.status_label.config(text=status_text, foreground='green', justify='center')
     
-    def build_thread(self):
-        try:
-            app_name = self.app_name.get().strip()
-            safe_name = self.get_safe_filename(app_name)
-            
-            # Create output directory
-            output_dir = os.path.join(os.getcwd(), "output", safe_name)
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Handle icon file - convert PNG to ICO if needed
-            icon_dest = os.path.join(output_dir, "app_icon.ico")
-            icon_source = self.icon_path.get()
-            
-            if icon_source.lower().endswith('.png'):
-                # Convert PNG to ICO
-                self.update_status("Converting PNG to ICO...")
-                if not self.convert_png_to_ico(icon_source, icon_dest):
-                    self.root.after(0, lambda: self.build_error("Failed to convert PNG to ICO"))
-                    return
-            else:
-                # Just copy ICO file
-                shutil.copy2(icon_source, icon_dest)
-            
-            # Generate main script
-            script_path = self.generate_main_script(output_dir)
-            
-            # Build with PyInstaller
-            self.update_status("Running PyInstaller...")
-            
-            cmd = [
-                "pyinstaller",
-                "--onefile",
-                "--windowed",
-                f"--name={app_name}",
-                f"--icon={icon_dest}",
-                f"--add-data={icon_dest};.",
-                "--clean",
-                script_path
-            ]
-            
-            # Hide console window on Windows
-            startupinfo = None
-            if sys.platform == 'win32':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            result = subprocess.run(
-                cmd,
-                cwd=output_dir,
-                capture_output=True,
-                text=True,
-                startupinfo=startupinfo
-            )
+    # ---------- Watch mode ----------
+    
+    def watched_icon(self):
+        return self.icon_path.get() or self.default_icon_path
+    
+    def toggle_watch(self):
+        if self.watch_mode.get():
+            from watch import WatchThread
             
-            if result.returncode == 0:
-                # Success!
-                exe_path = os.path.join(output_dir, "dist", f"{app_name}.exe")
-                if os.path.exists(exe_path):
-                    # Clean up output folder - keep only exe and log files
-                    self.cleanup_output_folder(output_dir)
-                    
-                    self.output_dir = os.path.join(output_dir, "dist")
-                    self.root.after(0, self.build_success)
-                else:
-                    self.root.after(0, lambda: self.build_error("Executable not found after build"))
-            else:
-                self.root.after(0, lambda: self.build_error(f"PyInstaller failed: {result.stderr[:200]}"))
-                
-        except Exception as e:
-            self.root.after(0, lambda: self.build_error(str(e)))
+            events = self.events
+            self.watcher = WatchThread([self.watched_icon()],
+                                       lambda paths: events.put(("watch", None, paths)))
+            self.watcher.start()
+            self.status_label.config(text=f"Watching the form and icon ({self.watcher.kind})", foreground='blue')
+            self.watch_built = None
+            self.schedule_rebuild(0)
+        else:
+            if self.watcher is not None:
+                self.watcher.stop()
+                self.watcher = None
+            if self.watch_after is not None:
+                self.root.after_cancel(self.watch_after)
+                self.watch_after = None
+            self.watch_pending = False
+            self.status_label.config(text="Ready to build", foreground='gray')
+    
+    def on_single_instance_changed(self):
+        # Single-instance mode needs a dedicated profile (see BuildSpec)
+        if self.single_instance.get():
+            self.own_profile.set(True)
+            self.own_profile_check.state(['disabled'])
+        else:
+            self.own_profile_check.state(['!disabled'])
+    
+    def on_packaging_changed(self, *args):
+        stub = self.packaging.get() == dict(self.PACKAGING_MODES)["stub"]
+        if stub:
+            from script_launcher import STUB_WARNING
+            self.packaging_note.config(text=STUB_WARNING + ".")
+        else:
+            self.packaging_note.config(text="")
+    
+    def on_form_changed(self, *args):
+        if self.watcher is None:
+            return
+        self.watcher.set_paths([self.watched_icon()])
+        self.schedule_rebuild(WATCH_DEBOUNCE_MS)
+    
+    def on_icon_changed(self, paths):
+        # The icon file changed on disk: rebuild even though the form is the same
+        if self.watcher is not None:
+            self.watch_built = None
+            self.schedule_rebuild(0)
     
-    def cleanup_output_folder(self, output_dir):
-        """Remove everything except exe and log files from output folder"""
+    def schedule_rebuild(self, delay_ms):
+        if self.watch_after is not None:
+            self.root.after_cancel(self.watch_after)
+        self.watch_after = self.root.after(delay_ms, self.watch_rebuild)
+    
+    def watch_rebuild(self):
+        self.watch_after = None
+        if self.watcher is None or not hasattr(self, 'build_button'):
+            return
+        from build_engine import BuildError
         try:
-            dist_dir = os.path.join(output_dir, "dist")
-            build_dir = os.path.join(output_dir, "build")
-            
-            # Remove build directory entirely
-            if os.path.exists(build_dir):
-                shutil.rmtree(build_dir)
-            
-            # Remove .spec file
-            for file in os.listdir(output_dir):
-                if file.endswith('.spec'):
-                    os.remove(os.path.join(output_dir, file))
-            
-            # Remove app_launcher.py and app_icon.ico from root output dir
-            launcher_path = os.path.join(output_dir, "app_launcher.py")
-            if os.path.exists(launcher_path):
-                os.remove(launcher_path)
-            
-            icon_path = os.path.join(output_dir, "app_icon.ico")
-            if os.path.exists(icon_path):
-                os.remove(icon_path)
-            
-            # In dist folder, keep only .exe and .log files
-            if os.path.exists(dist_dir):
-                for file in os.listdir(dist_dir):
-                    file_path = os.path.join(dist_dir, file)
-                    if os.path.isfile(file_path):
-                        # Keep only exe and log files
-                        if not (file.endswith('.exe') or file.endswith('.log')):
-                            os.remove(file_path)
-                    elif os.path.isdir(file_path):
-                        # Remove any subdirectories
-                        shutil.rmtree(file_path)
-        except Exception as e:
-            print(f"Warning: Could not fully clean output folder: {e}")
+            spec = self.get_build_spec()
+        except BuildError:
+            spec = None  # build_app reports it
+        mode = next(key for key, label in self.BUILD_MODES if label == self.build_mode.get())
+        if spec is not None and self.watch_built == (spec.to_dict(), mode, self.optimize_size.get()):
+            return  # e.g. a field edited and changed back
+        self.build_app(auto=True)
     
-    def update_status(self, message):
-        self.root.after(0, lambda: self.status_label.config(text=message))
+    def watch_job_finished(self):
+        if self.watch_pending and self.watcher is not None:
+            self.watch_pending = False
+            self.watch_built = None
+            self.schedule_rebuild(0)
     
-    def build_success(self):
-        self.progress.stop()
-        self.status_label.config(text="✓ App created successfully!", foreground='green')
-        self.build_button.config(state='normal')
-        self.output_button.config(state='normal')
-        
-        messagebox.showinfo(
-            "Success",
-            f"App '{self.app_name.get()}' created successfully!\n\n"
-            f"Location: {self.output_dir}\n\n"
-            "Click 'Open Output Folder' to view the executable."
-        )
+    def on_job_selected(self, event=None):
+        # "Open Output Folder" follows the selected build once it has finished
+        selection = self.job_list.selection()
+        job = self.jobs.get(int(selection[0])) if selection else None
+        if job is not None and job.result is not None:
+            self.output_dir = os.path.dirname(job.result.exe_path)
+        if job is not None and not job.active:
+            self.show_result(job)
+    
+    def on_close(self):
+        active = [job for job in self.jobs.values() if job.active]
+        if active:
+            if not messagebox.askyesno("Builds Running",
+                                       f"{len(active)} build(s) still running or queued.\n\n"
+                                       "Cancel them and quit?"):
+                return
+            for job in active:
+                job.cancel.cancel()
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+    
+    def registered_launcher(self, name=None):
+        """Latest launcher in the artifact registry (of one app, by safe name), or None"""
+        import sqlite3
+        from artifact_store import STORE_FOLDER, ArtifactStore
+        try:
+            return ArtifactStore(os.path.join(self.output_root, STORE_FOLDER)).latest(name)
+        except (OSError, sqlite3.Error):
+            return None
     
-    def build_error(self, error_msg):
-        self.progress.stop()
-        self.status_label.config(text="✗ Build failed", foreground='red')
-        self.build_button.config(state='normal')
-        messagebox.showerror("Build Error", f"Failed to build app:\n\n{error_msg}")
+    def check_registry(self):
+        # Launchers from earlier sessions can be opened right away
+        if self.registered_launcher() is not None:
+            self.output_button.config(state='normal')
     
     def open_output_folder(self):
-        if hasattr(self, 'output_dir') and os.path.exists(self.output_dir):
-            os.startfile(self.output_dir)
+        # The selected build's app, else the most recently built one, from the registry
+        selection = self.job_list.selection()
+        job = self.jobs.get(int(selection[0])) if selection else None
+        launcher = self.registered_launcher(job.spec.safe_name if job is not None else None)
+        folder = os.path.dirname(launcher["path"]) if launcher is not None else self.output_dir
+        if folder and os.path.exists(folder):
+            os.startfile(folder)
         else:
             messagebox.showwarning("Warning", "Output folder not found")
 
 def main():
+    if getattr(sys, 'frozen', False):
+        # Needed by the batch build process pool in the frozen exe
+        import multiprocessing
+        multiprocessing.freeze_support()
+    
+    # Any arguments switch to the headless command line (e.g. "build manifest.json")
+    if len(sys.argv) > 1:
+        from builder_cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    
     root = tk.Tk()
     app = WebAppBuilder(root)
     root.mainloop()
@@ -0,0 +1,385 @@
+"""
+Content-addressed store and registry of built launchers.
+
+Launchers built from the same template share most of their bytes, and the
+same launcher is often built more than once (rebuilds, service jobs, onedir
+runtimes that are identical for every app). After each build the launcher's
+files are hashed into <output>/.artifacts/objects/<hash[:2]>/<hash>; a file
+whose content is already stored is replaced by a reflink (copy-on-write
+clone, where the filesystem supports it) or a hard link to the stored object,
+so identical files take disk space once.
+
+Deduplication works on whole files only. A onefile launcher embeds its app's
+config and icon, so it shares storage with rebuilds of the same app but not
+with other apps; the savings come from rebuilds, identical onedir runtimes
+and stub icons. The saved bytes reported by usage() are exactly that.
+
+A hard-linked launcher file and the stored object are one inode: editing
+either in place (signing, stamping.replace_icon, patching) changes every
+launcher linked to it. Launcher files are only ever changed by writing a new
+file and os.replace()-ing it into place (a fresh inode), or after
+unlink_shared(); reflinked files are copy-on-write and safe either way.
+
+registry.sqlite3 next to the objects records every launcher in the output
+folder (name, URL, spec hash, packaging, size, build time, toolchain) and the
+objects its files point to, so listing what has been built doesn't walk the
+output tree, and the space saved by deduplication can be reported.
+"""
+import os
+import sys
+import json
+import time
+import errno
+import sqlite3
+import hashlib
+import tempfile
+
+STORE_FOLDER = ".artifacts"
+REGISTRY_FILE = "registry.sqlite3"
+
+# Bump when the registry tables change; older registries are rebuilt empty
+REGISTRY_VERSION = 1
+
+SCHEMA = """
+DROP TABLE IF EXISTS files;
+DROP TABLE IF EXISTS launchers;
+CREATE TABLE launchers (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    safe_name TEXT NOT NULL,
+    url TEXT,
+    spec_hash TEXT,
+    packaging TEXT,
+    mode TEXT,
+    optimize TEXT,
+    toolchain TEXT,
+    size INTEGER,
+    built REAL,
+    seconds REAL
+);
+CREATE INDEX launchers_by_name ON launchers (safe_name);
+CREATE INDEX launchers_by_time ON launchers (built);
+CREATE TABLE files (
+    launcher_id INTEGER NOT NULL REFERENCES launchers (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    method TEXT NOT NULL
+);
+CREATE INDEX files_by_launcher ON files (launcher_id);
+CREATE INDEX files_by_hash ON files (hash);
+"""
+
+# Linux FICLONE ioctl: clone a whole file (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+HASH_CHUNK = 1024 * 1024
+
+
+def spec_hash(spec):
+    """Hash of everything that defines a launcher: the spec's settings and the icon's bytes."""
+    h = hashlib.sha256()
+    h.update(json.dumps(spec.to_dict(), sort_keys=True, default=list).encode("utf-8"))
+    if spec.icon and os.path.isfile(spec.icon):
+        h.update(b"\0")
+        h.update(file_hash(spec.icon).encode())
+    return h.hexdigest()[:16]
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def clone_file(src, dest):
+    """Create dest as a copy-on-write clone of src. Returns False where the filesystem can't."""
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with open(src, "rb") as s, open(dest, "wb") as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            return True
+        except OSError:
+            if os.path.exists(dest):
+                os.remove(dest)
+            return False
+    if sys.platform == "darwin":
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        clonefile = getattr(libc, "clonefile", None)
+        return clonefile is not None and clonefile(os.fsencode(src), os.fsencode(dest), 0) == 0
+    return False
+
+
+def link_or_clone(src, dest):
+    """Create dest sharing src's storage: "reflink", "hardlink", or None if neither works."""
+    if clone_file(src, dest):
+        return "reflink"
+    try:
+        os.link(src, dest)
+        return "hardlink"
+    except OSError:
+        return None
+
+
+class ArtifactStore:
+    """The object store and registry for one output folder."""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.registry = os.path.join(root, REGISTRY_FILE)
+
+    def connect(self):
+        """
+        Open the registry (creating it if needed) in a write transaction.
+        Use as a context manager: commits on success, rolls back on error.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        db = sqlite3.connect(self.registry, timeout=30, isolation_level=None)
+        try:
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA foreign_keys = ON")
+            if db.execute("PRAGMA user_version").fetchone()[0] != REGISTRY_VERSION:
+                # Parallel builds register at the same time; WAL keeps readers out of their way
+                db.execute("PRAGMA journal_mode = WAL")
+            db.execute("BEGIN IMMEDIATE")
+            # Checked again under the lock: another process may just have created it
+            if db.execute("PRAGMA user_version").fetchone()[0] != REGISTRY_VERSION:
+                for statement in SCHEMA.split(";"):
+                    if statement.strip():
+                        db.execute(statement)
+                db.execute(f"PRAGMA user_version = {REGISTRY_VERSION}")
+        except BaseException:
+            db.close()
+            raise
+        return _Connection(db)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest)
+
+    # ---------- Adding launchers ----------
+
+    def add(self, spec, result, mode=None, optimize=None, toolchain=None):
+        """
+        Deduplicate a freshly built launcher's files against the store and
+        register it (replacing the earlier entry for the same path). Returns
+        the bytes that now share storage with files already stored.
+        """
+        files = launcher_files(spec, result.exe_path)
+        stored = [(path, *self._store_file(path)) for path in files]
+        saved = sum(size for _, _, size, method, shared in stored if shared)
+
+        with self.connect() as db:
+            old = db.execute("SELECT id FROM launchers WHERE path = ?", (result.exe_path,)).fetchone()
+            old_hashes = set()
+            if old is not None:
+                old_hashes = {row["hash"] for row in db.execute(
+                    "SELECT hash FROM files WHERE launcher_id = ?", (old["id"],))}
+                db.execute("DELETE FROM launchers WHERE id = ?", (old["id"],))
+            cursor = db.execute(
+                "INSERT INTO launchers (path, name, safe_name, url, spec_hash, packaging, mode, optimize, "
+                "toolchain, size, built, seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (result.exe_path, spec.name, spec.safe_name, spec.url, spec_hash(spec), spec.packaging,
+                 mode, optimize, toolchain, sum(size for _, _, size, _, _ in stored), time.time(),
+                 result.seconds))
+            db.executemany(
+                "INSERT INTO files (launcher_id, path, hash, size, method) VALUES (?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, path, digest, size, method) for path, digest, size, method, _ in stored])
+            self._drop_unused(db, old_hashes - {digest for _, digest, _, _, _ in stored})
+        return saved
+
+    def _store_file(self, path):
+        """Returns (hash, size, method, shared); method is how path shares the object, or "none"."""
+        digest = file_hash(path)
+        size = os.path.getsize(path)
+        obj = self.object_path(digest)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+
+        if os.path.exists(obj) and os.path.getsize(obj) != size:
+            # Changed through a hard link (see unlink_shared): don't hand it out again
+            os.remove(obj)
+        if not os.path.exists(obj):
+            # First copy: the object becomes a second name for this file
+            method = self._adopt(path, obj)
+            if method is not None:
+                return digest, size, method, False
+            if not os.path.exists(obj):
+                return digest, size, "none", False
+
+        # Already stored: swap the file for a link/clone of the object
+        tmp = _unused_path(os.path.dirname(path), ".dedup-")
+        method = link_or_clone(obj, tmp)
+        if method is None:
+            return digest, size, "none", False
+        try:
+            if method == "hardlink" and os.path.samefile(obj, path):
+                os.remove(tmp)
+                return digest, size, method, False
+            os.replace(tmp, path)
+        except OSError:
+            # e.g. the launcher is running (Windows): keep the file as it is
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return digest, size, "none", False
+        return digest, size, method, True
+
+    def _adopt(self, path, obj):
+        tmp = _unused_path(os.path.dirname(obj), ".adopt-")
+        method = link_or_clone(path, tmp)
+        if method is None:
+            return None
+        try:
+            # link() refuses to overwrite, so a parallel build storing the same
+            # content first wins and this file is linked to its object instead
+            os.link(tmp, obj)
+        except OSError as e:
+            if e.errno == errno.EEXIST:
+                os.remove(tmp)
+                return None
+            os.replace(tmp, obj)  # no hard links here (reflinks only)
+            return method
+        os.remove(tmp)
+        return method
+
+    def _drop_unused(self, db, hashes):
+        for digest in hashes:
+            if db.execute("SELECT 1 FROM files WHERE hash = ? LIMIT 1", (digest,)).fetchone() is None:
+                try:
+                    os.remove(self.object_path(digest))
+                except OSError:
+                    pass
+
+    # ---------- Queries ----------
+
+    def launchers(self, name=None, limit=None):
+        """Registered launchers, newest first, as dicts (optionally one app's, by safe name)."""
+        if not os.path.exists(self.registry):
+            return []
+        query = "SELECT * FROM launchers"
+        params = []
+        if name is not None:
+            query += " WHERE safe_name = ?"
+            params.append(name)
+        query += " ORDER BY built DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self.connect() as db:
+            return [dict(row) for row in db.execute(query, params)]
+
+    def latest(self, name=None):
+        """The most recently built launcher (of one app, by safe name), or None."""
+        found = self.launchers(name, limit=1)
+        return found[0] if found else None
+
+    def usage(self):
+        """
+        Disk usage of the registered launchers: {"launchers", "files", "logical",
+        "stored", "saved"} - logical bytes as the launchers appear in the output
+        folder, stored bytes they actually take, and the difference.
+        """
+        if not os.path.exists(self.registry):
+            return {"launchers": 0, "files": 0, "logical": 0, "stored": 0, "saved": 0}
+        with self.connect() as db:
+            launchers = db.execute("SELECT COUNT(*) FROM launchers").fetchone()[0]
+            files, logical = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+            objects = db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT hash, size FROM files WHERE method != 'none')"
+            ).fetchone()[0]
+            unshared = db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM files WHERE method = 'none'").fetchone()[0]
+        stored = objects + unshared
+        return {"launchers": launchers, "files": files, "logical": logical, "stored": stored,
+                "saved": logical - stored}
+
+    def verify(self):
+        """Return the paths of stored objects whose content no longer matches their hash."""
+        if not os.path.exists(self.registry):
+            return []
+        with self.connect() as db:
+            hashes = [row["hash"] for row in db.execute(
+                "SELECT DISTINCT hash FROM files WHERE method != 'none'")]
+        damaged = []
+        for digest in hashes:
+            path = self.object_path(digest)
+            try:
+                if file_hash(path) != digest:
+                    damaged.append(path)
+            except OSError:
+                damaged.append(path)
+        return damaged
+
+    def prune(self):
+        """Forget launchers whose files are gone and delete objects nothing uses. Returns the count."""
+        with self.connect() as db:
+            gone = [row["id"] for row in db.execute("SELECT id, path FROM launchers")
+                    if not os.path.exists(row["path"])]
+            hashes = set()
+            for launcher_id in gone:
+                hashes.update(row["hash"] for row in db.execute(
+                    "SELECT hash FROM files WHERE launcher_id = ?", (launcher_id,)))
+                db.execute("DELETE FROM launchers WHERE id = ?", (launcher_id,))
+            self._drop_unused(db, hashes)
+        return len(gone)
+
+
+class _Connection:
+    """sqlite3 connection that commits (or rolls back) and closes on exit."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, *args):
+        return self.db.execute(*args)
+
+    def executemany(self, *args):
+        return self.db.executemany(*args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.db.close()
+
+
+def launcher_files(spec, exe_path):
+    """Every file that makes up a built launcher."""
+    if spec.packaging == "onedir":
+        folder = os.path.dirname(exe_path)
+        return sorted(os.path.join(dirpath, name)
+                      for dirpath, _, names in os.walk(folder) for name in names)
+    if spec.packaging == "stub":
+        base = os.path.splitext(exe_path)[0]
+        return [exe_path] + [base + ext for ext in (".ico", ".lnk") if os.path.exists(base + ext)]
+    return [exe_path]
+
+
+def unlink_shared(paths):
+    """
+    Remove files that are hard-linked into the store before something
+    rewrites them in place, which would change the stored object (and every
+    other launcher linked to it) as well.
+    """
+    for path in paths:
+        try:
+            if os.stat(path).st_nlink > 1:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _unused_path(folder, prefix):
+    fd, path = tempfile.mkstemp(prefix=prefix, dir=folder)
+    os.close(fd)
+    os.remove(path)
+    return path
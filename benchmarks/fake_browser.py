@@ -0,0 +1,164 @@
+"""
+Stand-in browser for the launcher benchmark.
+
+Appends one JSON line (wall-clock start time and argv) to the file named by
+BENCH_BROWSER_LOG and exits, so the benchmark can measure how long the
+launcher takes to spawn the browser. BENCH_BROWSER_LINGER keeps it running
+for that many seconds first, like an open app window.
+
+With BENCH_BROWSER_FETCH=1 it also loads the --app URL the way a browser
+would: the page, then every <script src> on it, through an HTTP disk cache
+kept in the profile (--user-data-dir, else BENCH_BROWSER_HOME). The cache
+honours Cache-Control max-age and ETag revalidation and evicts least recently
+used entries beyond --disk-cache-size (default BENCH_BROWSER_CACHE_MB, 8 MB).
+A second line {"loaded": <bytes received>} is logged when the page is done.
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import urllib.error
+import urllib.parse
+import urllib.request
+
+DEFAULT_CACHE_MB = 8
+
+
+def switch(argv, name, default=None):
+    prefix = f"--{name}="
+    for arg in argv:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+
+class DiskCache:
+    """HTTP cache: one JSON metadata file and one body file per URL, LRU by access time."""
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, key + ".json"), os.path.join(self.folder, key + ".body")
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        os.utime(meta_path)  # recently used
+        return meta, body
+
+    def put(self, url, meta, body):
+        meta_path, body_path = self._paths(url)
+        with open(body_path, "wb") as f:
+            f.write(body)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        self.evict()
+
+    def touch(self, url, meta):
+        meta_path, _ = self._paths(url)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.folder):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.folder, name)
+            body_path = meta_path[:-5] + ".body"
+            try:
+                size = os.path.getsize(body_path)
+                entries.append((os.path.getmtime(meta_path), meta_path, body_path, size))
+            except OSError:
+                continue
+            total += size
+        for _, meta_path, body_path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (meta_path, body_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+def max_age(headers):
+    match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else 0
+
+
+def fetch(opener, cache, url):
+    """Load url through the cache. Returns (body, bytes received over the network)."""
+    meta, body = cache.get(url)
+    if meta is not None and time.time() < meta["stored"] + meta["max_age"]:
+        return body, 0
+
+    request = urllib.request.Request(url)
+    if meta is not None and meta.get("etag"):
+        request.add_header("If-None-Match", meta["etag"])
+    try:
+        with opener.open(request) as response:
+            fresh = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or meta is None:
+            raise
+        meta.update(stored=time.time(), max_age=max_age(e.headers))
+        cache.touch(url, meta)
+        return body, 0
+
+    cache.put(url, {"etag": headers.get("ETag"), "stored": time.time(), "max_age": max_age(headers)}, fresh)
+    return fresh, len(fresh)
+
+
+def load_page(argv):
+    """Load the --app page and its scripts. Returns bytes received."""
+    url = switch(argv, "app")
+    profile = switch(argv, "user-data-dir") or os.path.join(
+        os.environ.get("BENCH_BROWSER_HOME", os.path.expanduser("~/.bench-browser")), "Default")
+    cache_dir = switch(argv, "disk-cache-dir") or os.path.join(profile, "Cache")
+    cache_bytes = int(switch(argv, "disk-cache-size") or
+                      int(os.environ.get("BENCH_BROWSER_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024)
+
+    cache = DiskCache(cache_dir, cache_bytes)
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    page, received = fetch(opener, cache, url)
+    for src in re.findall(rb'<script src="([^"]+)"', page):
+        _, size = fetch(opener, cache, urllib.parse.urljoin(url, src.decode("utf-8")))
+        received += size
+    return received
+
+
+def main(argv):
+    started = time.time()
+    log_path = os.environ.get("BENCH_BROWSER_LOG")
+    if log_path:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": started, "argv": argv}) + "\n")
+    if os.environ.get("BENCH_BROWSER_FETCH") == "1":
+        received = load_page(argv)
+        if log_path:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"loaded": received}) + "\n")
+    linger = float(os.environ.get("BENCH_BROWSER_LINGER", "0"))
+    if linger:
+        time.sleep(linger)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,310 @@
+"""
+Stand-in for the pyinstaller command, used by the benchmark suite.
+
+Accepts the command lines Web App Builder produces (--onefile/--onedir
+builds and the shared-workspace spec file) and prints PyInstaller-style phase
+lines. Script builds produce a runnable stand-in for the packaging: a
+--onefile "exe" is a shell script that unpacks its compressed bundle into a
+fresh temp dir and runs the launcher from there; a --onedir "exe" runs the
+launcher straight from its _internal folder. Spec builds write a dummy exe.
+Onefile and spec-build exes end in a PyInstaller-style archive table of
+contents and cookie, so size reports can read them.
+Like PyInstaller, script builds also leave a .spec file and a work folder
+(build/<name>: TOCs, compiled modules, a PKG copy of the bundle and
+warn-<name>.txt) behind. Excluded modules (--exclude-module, or excludes= in
+a spec) shrink the bundle and are listed in the warnings file.
+Behaviour is controlled with environment variables:
+
+    BENCH_PYI_DELAY           seconds per full build (default 0.5)
+    BENCH_PYI_LINES           output lines per full build (default 400)
+    BENCH_PYI_EXE_BYTES       size of the dummy exe (default 1 MB)
+    BENCH_PYI_REUSE_FRACTION  share of the delay left when a --workpath build
+                              finds its earlier Analysis (default 0.25)
+    BENCH_PYI_WORK_FILES      small files written to the work folder (default 60)
+    BENCH_PYI_VERSION         reported by --version
+"""
+import io
+import os
+import re
+import ast
+import sys
+import time
+import random
+import struct
+import tarfile
+
+PHASES = [
+    ("Analysis", 0.65, "INFO: checking Analysis"),
+    ("PYZ", 0.10, "INFO: Building PYZ (ZlibArchive)"),
+    ("PKG", 0.15, "INFO: Building PKG (CArchive)"),
+    ("EXE", 0.10, "INFO: Building EXE from EXE-00.toc"),
+]
+
+
+# Share of the stand-in runtime (BENCH_PYI_EXE_BYTES) that is always bundled,
+# and what each optional module adds: (PYZ, binaries, data)
+BASE_SHARES = (0.15, 0.30, 0.02)
+MODULE_SHARES = {
+    "tkinter": (0.02, 0.04, 0.14),
+    "_tkinter": (0.0, 0.02, 0.0),
+    "email": (0.03, 0.0, 0.0),
+    "http": (0.02, 0.0, 0.0),
+    "xml": (0.03, 0.02, 0.0),
+    "unittest": (0.02, 0.0, 0.0),
+    "pydoc": (0.03, 0.0, 0.0),
+    "sqlite3": (0.01, 0.04, 0.0),
+    "asyncio": (0.03, 0.01, 0.0),
+    "multiprocessing": (0.02, 0.01, 0.0),
+}
+
+# PyInstaller's archive cookie and TOC entry layouts
+COOKIE_MAGIC = b"MEI\014\013\012\013\016"
+COOKIE_FORMAT = "!8sIIii64s"
+TOC_ENTRY_FORMAT = "!iIIIBc"
+
+ONEFILE_HEADER = """#!/bin/sh
+# Stand-in onefile launcher: unpack the bundle into a fresh temp dir, run it, clean up
+dir=$(mktemp -d "${{TMPDIR:-/tmp}}/_MEIXXXXXX") || exit 1
+tail -c +{offset:010d} "$0" | head -c {length:010d} | tar -xzf - -C "$dir"
+cd "$dir" && "{python}" {script}
+status=$?
+rm -rf "$dir"
+exit $status
+"""
+
+ONEDIR_LAUNCHER = """#!/bin/sh
+# Stand-in onedir launcher: the bundle is already unpacked next to it
+cd "$(dirname "$0")/_internal" && exec "{python}" {script}
+"""
+
+
+def option(argv, name, default=None):
+    prefix = f"--{name}="
+    for arg in argv:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+
+def options(argv, name):
+    prefix = f"--{name}="
+    return [arg[len(prefix):] for arg in argv if arg.startswith(prefix)]
+
+
+def runtime_sizes(exe_bytes, excludes):
+    """Bytes of stand-in (PYZ, binaries, data) once the excluded modules are left out."""
+    shares = list(BASE_SHARES)
+    for module, module_shares in MODULE_SHARES.items():
+        if module not in excludes:
+            shares = [a + b for a, b in zip(shares, module_shares)]
+    return [int(exe_bytes * share) for share in shares]
+
+
+def runtime_files(exe_bytes, excludes):
+    """(archive name, bytes, type code) for the stand-in Python runtime and libraries."""
+    pyz, binaries, data = runtime_sizes(exe_bytes, excludes)
+    # Incompressible filler, identical for every app built with the same
+    # toolchain and excludes (like the real runtime)
+    seed = f"{os.environ.get('BENCH_PYI_VERSION', '6.0.0-bench')}:{','.join(sorted(excludes))}"
+    return [("PYZ-00.pyz", filler(seed + ":pyz", pyz), "z"),
+            ("python3.dll", filler(seed + ":dll", binaries), "b"),
+            ("base_data.dat", filler(seed + ":data", data), "x")]
+
+
+def filler(seed, size):
+    return random.Random(seed).randbytes(size)
+
+
+def bundle_files(argv, exe_bytes, excludes=()):
+    """(archive name, bytes, type code) for the script, each --add-data file and the runtime."""
+    script = argv[-1]
+    files = [(os.path.basename(script), open(script, "rb").read(), "s")]
+    for data in options(argv, "add-data"):
+        src = data.rsplit(os.pathsep, 1)[0]
+        with open(src, "rb") as f:
+            files.append((os.path.basename(src), f.read(), "x"))
+    return files + runtime_files(exe_bytes, excludes)
+
+
+def archive_trailer(files, payload_len, pkg_start):
+    """
+    TOC and cookie describing payload_len bytes of archive data as the given
+    files (split by their raw sizes, like compressed entries).
+    """
+    total = sum(len(content) for _, content, _ in files) or 1
+    toc = b""
+    offset = 0
+    for index, (name, content, typecode) in enumerate(files):
+        if index == len(files) - 1:
+            length = payload_len - offset
+        else:
+            length = payload_len * len(content) // total
+        encoded = name.encode("utf-8") + b"\0"
+        entry_len = struct.calcsize(TOC_ENTRY_FORMAT) + len(encoded)
+        entry_len += -entry_len % 16
+        toc += struct.pack(TOC_ENTRY_FORMAT, entry_len, offset, length, len(content), 1, typecode.encode())
+        toc += encoded.ljust(entry_len - struct.calcsize(TOC_ENTRY_FORMAT), b"\0")
+        offset += length
+    pkg_len = payload_len + len(toc) + struct.calcsize(COOKIE_FORMAT)
+    cookie = struct.pack(COOKIE_FORMAT, COOKIE_MAGIC, pkg_len, payload_len, len(toc), 311, b"python311.dll")
+    return toc + cookie
+
+
+def write_onefile(exe_path, argv, exe_bytes, excludes=()):
+    files = bundle_files(argv, exe_bytes, excludes)
+    payload = io.BytesIO()
+    with tarfile.open(fileobj=payload, mode="w:gz", compresslevel=1) as tar:
+        for name, content, _ in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    payload = payload.getvalue()
+
+    fields = {"python": sys.executable, "script": os.path.basename(argv[-1]), "length": len(payload)}
+    header_size = len(ONEFILE_HEADER.format(offset=0, **fields).encode())
+    header = ONEFILE_HEADER.format(offset=header_size + 1, **fields).encode()
+    with open(exe_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+        f.write(archive_trailer(files, len(payload), len(header)))
+    os.chmod(exe_path, 0o755)
+
+
+def write_spec_exe(exe_path, exe_bytes, excludes=()):
+    """Dummy exe for spec builds: a zero-filled bootloader followed by the archive."""
+    files = runtime_files(exe_bytes, excludes)
+    bootloader = b"MZ" + b"\0" * (64 * 1024 - 2)
+    with open(exe_path, "wb") as f:
+        f.write(bootloader)
+        for _, content, _ in files:
+            f.write(content)
+        f.write(archive_trailer(files, sum(len(content) for _, content, _ in files), len(bootloader)))
+
+
+def write_onedir(dist, name, argv, exe_bytes, excludes=()):
+    folder = os.path.join(dist, name)
+    internal = os.path.join(folder, "_internal")
+    os.makedirs(internal, exist_ok=True)
+    for file_name, content, _ in bundle_files(argv, exe_bytes, excludes):
+        with open(os.path.join(internal, file_name), "wb") as f:
+            f.write(content)
+    exe_path = os.path.join(folder, f"{name}.exe")
+    with open(exe_path, "w") as f:
+        f.write(ONEDIR_LAUNCHER.format(python=sys.executable, script=os.path.basename(argv[-1])))
+    os.chmod(exe_path, 0o755)
+
+
+def write_work_files(workpath, name, count, pkg_bytes):
+    """Leave a work folder behind like PyInstaller: small TOC/pyc files and the PKG."""
+    folder = os.path.join(workpath, name)
+    localpycs = os.path.join(folder, "localpycs")
+    os.makedirs(localpycs, exist_ok=True)
+    for i in range(count):
+        target = localpycs if i % 2 else folder
+        with open(os.path.join(target, f"module-{i:03d}.toc"), "wb") as f:
+            f.write(os.urandom(4096))
+    with open(os.path.join(folder, "PKG-00.pkg"), "wb") as f:
+        f.write(os.urandom(pkg_bytes))
+
+
+def write_warnings(workpath, name, script, excludes):
+    """warn-<name>.txt like PyInstaller's: missing and excluded modules with their importers."""
+    with open(script, "r", encoding="utf-8") as f:
+        source = f.read()
+    lines = ["", "This file lists modules PyInstaller was not able to find.", ""]
+    if re.search(r"^\s*import _winapi\b", source, re.M) and sys.platform != "win32":
+        lines.append(f"missing module named _winapi - imported by subprocess (conditional), {script} (delayed)")
+    for module in excludes:
+        if re.search(rf"^(import|from) {re.escape(module)}\b", source, re.M):
+            importer = f"{script} (top-level)"
+        else:
+            importer = "pydoc (delayed, optional)"
+        lines.append(f"excluded module named {module} - imported by {importer}")
+    folder = os.path.join(workpath, name)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"warn-{name}.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def spec_settings(spec):
+    """(script, excludes) from a spec file."""
+    with open(spec, "r", encoding="utf-8") as f:
+        text = f.read()
+    script = re.search(r"Analysis\(\s*\[\s*('[^']*'|\"[^\"]*\")", text)
+    excludes = re.search(r"excludes=(\[[^\]]*\])", text)
+    return (ast.literal_eval(script.group(1)) if script else None,
+            ast.literal_eval(excludes.group(1)) if excludes else [])
+
+
+def target_name(argv):
+    name = option(argv, "name")
+    if name:
+        return name
+    spec = argv[-1]
+    with open(spec, "r", encoding="utf-8") as f:
+        match = re.search(r"name=['\"]([^'\"]+)['\"]", f.read())
+    return match.group(1) if match else os.path.splitext(os.path.basename(spec))[0]
+
+
+def main(argv):
+    if "--version" in argv:
+        print(os.environ.get("BENCH_PYI_VERSION", "6.0.0-bench"))
+        return 0
+
+    delay = float(os.environ.get("BENCH_PYI_DELAY", "0.5"))
+    lines = int(os.environ.get("BENCH_PYI_LINES", "400"))
+    exe_bytes = int(os.environ.get("BENCH_PYI_EXE_BYTES", str(1024 * 1024)))
+    reuse_fraction = float(os.environ.get("BENCH_PYI_REUSE_FRACTION", "0.25"))
+    work_files = int(os.environ.get("BENCH_PYI_WORK_FILES", "60"))
+
+    name = target_name(argv)
+    dist = option(argv, "distpath", "dist")
+    workpath = option(argv, "workpath")
+
+    # Persistent work folders keep Analysis between runs, like the real thing
+    phases = PHASES
+    if workpath:
+        marker = os.path.join(workpath, name, "Analysis-00.toc")
+        if os.path.exists(marker):
+            phases = PHASES[1:]
+            delay *= reuse_fraction
+            print("INFO: checking Analysis", flush=True)
+            print("INFO: Analysis unchanged, reusing earlier results", flush=True)
+        else:
+            os.makedirs(os.path.dirname(marker), exist_ok=True)
+            with open(marker, "w") as f:
+                f.write("analysis\n")
+
+    total_share = sum(share for _, share, _ in phases)
+    print(f"INFO: PyInstaller: {os.environ.get('BENCH_PYI_VERSION', '6.0.0-bench')}", flush=True)
+    for phase, share, marker_line in phases:
+        print(marker_line, flush=True)
+        phase_lines = max(1, int(lines * share / total_share))
+        pause = delay * share / total_share / phase_lines
+        for i in range(phase_lines):
+            print(f"INFO: {phase}: processing item {i}", flush=True)
+            if pause:
+                time.sleep(pause)
+
+    os.makedirs(dist, exist_ok=True)
+    if not argv[-1].endswith(".py"):
+        script, excludes = spec_settings(argv[-1])
+        if workpath and script and os.path.exists(script):
+            write_warnings(workpath, name, script, excludes)
+        write_spec_exe(os.path.join(dist, f"{name}.exe"), exe_bytes, excludes)
+    else:
+        excludes = options(argv, "exclude-module")
+        with open(f"{name}.spec", "w", encoding="utf-8") as f:
+            f.write(f"# stand-in spec for {name}\n")
+        write_work_files(workpath or "build", name, work_files, exe_bytes)
+        write_warnings(workpath or "build", name, argv[-1], excludes)
+        if "--onedir" in argv:
+            write_onedir(dist, name, argv, exe_bytes, excludes)
+        else:
+            write_onefile(os.path.join(dist, f"{name}.exe"), argv, exe_bytes, excludes)
+    print("INFO: Build complete!", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
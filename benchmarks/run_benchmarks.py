@@ -0,0 +1,966 @@
+"""
+Web App Builder benchmark suite.
+
+    python benchmarks/run_benchmarks.py [--apps 8] [--jobs 1,2,4] [--modes standard,shared,stamp]
+                                        [--repeat 3] [--json] [--update-baseline] [--gui-only]
+
+Runs the real build pipeline (build_engine.build_batch) against a stand-in
+pyinstaller (fake_pyinstaller.py) and the real launcher (main_edge.py)
+against a stand-in browser (fake_browser.py), both put on PATH for the run.
+No Windows, network or real browser is needed. Reports:
+
+- builder GUI startup under -X importtime: time to import app_builder, and
+  (with a display) time from process start until the window maps and until
+  the deferred part of startup has run; --gui-only measures just these
+- builds/minute for each build mode and concurrency level
+- distributed builds/minute with 1 and 3 local worker processes (one build
+  at a time each), and with 3 workers one of which is killed mid-run
+- per-build time spent publishing the launcher and cleaning up, building in
+  the output folder vs. a scratch folder vs. a RAM-backed scratch folder
+- PNG -> ICO conversion throughput, uncached and from the icon cache
+- icon validation throughput: header checks with icon_format vs. decoding
+  with Pillow
+- browser lookup time in a fake install tree, full probe vs. cached
+- watch mode, with inotify (where available) and with stat polling: CPU
+  time the watcher uses per second while nothing changes, and how long an
+  icon edit takes to be noticed
+- launcher time-to-spawn (process start until the browser is running), for
+  the launcher script itself and for each packaging mode (onefile, onedir;
+  the stub needs wscript, so it is measured on Windows only), plus the
+  spawn_ms the launcher reports itself through WEBAPP_LAUNCH_LOG; onefile
+  is measured again with the size-optimized profile, and the launcher script
+  again with launch telemetry on
+- onefile launcher size with the default and the size-optimized profile
+- single-instance hand-over: how long a second launch of a running
+  single-instance launcher takes to pass its request on and exit
+- page load bytes from a local stand-in web app server: a cold load, and a
+  warm load after other browsing, once with the browser's shared default
+  profile and once with a dedicated per-app profile
+
+Each number is the median of --repeat runs. Results are compared against
+benchmarks/baseline.json; the script exits with code 1 if a metric is worse
+than the baseline by more than --tolerance. Baselines are per machine:
+record one with --update-baseline before comparing performance work.
+Budgeted metrics fail on their own limit whatever the baseline says:
+gui.eager_imports counts build machinery modules (GUI_DEFERRED_MODULES)
+that importing app_builder pulls in, and must stay 0.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+import http.server
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import build_engine
+from build_trace import host_info
+from launcher_size import SizeProfile
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+
+# Modules app_builder must not import before its window shows (the
+# gui.eager_imports budget): the build machinery and what it pulls in
+GUI_DEFERRED_MODULES = (
+    "PIL", "build_engine", "build_cache", "icon_pipeline", "analysis_cache", "stamping",
+    "artifact_store", "launcher_size", "sqlite3", "shutil", "subprocess", "multiprocessing",
+    "concurrent.futures", "watch",
+)
+
+# Absolute limits, checked whatever the baseline says
+BUDGETS = {"gui.eager_imports": 0}
+
+# Imports app_builder the way main() does, then reports when the window maps
+# and when the deferred part of startup has finished
+GUI_PROBE = """
+import sys
+sys.path.insert(0, {repo!r})
+import app_builder
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print("no-display", flush=True)
+    sys.exit(0)
+app = app_builder.WebAppBuilder(root)
+mapped = []
+def on_map(event):
+    if event.widget is root and not mapped:
+        mapped.append(True)
+        print("window", flush=True)
+def check_ready():
+    if hasattr(app, "build_button"):
+        print("ready", flush=True)
+        root.destroy()
+    else:
+        root.after(1, check_ready)
+root.bind("<Map>", on_map, add="+")
+root.after(1, check_ready)
+root.mainloop()
+"""
+
+# Settings that change what a metric means; baselines only compare when they match
+SETTING_KEYS = ("apps", "delay", "lines", "exe_bytes", "icons", "spawns")
+
+
+# ---------- Stand-in tools ----------
+
+class BenchEnv:
+    """Temp folder with the stand-in pyinstaller/browser first on PATH."""
+
+    def __init__(self, args):
+        self.args = args
+        self.root = None
+        self._saved_env = None
+
+    def __enter__(self):
+        self.root = tempfile.mkdtemp(prefix="webapp-bench-")
+        self.bin_dir = os.path.join(self.root, "bin")
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.browser_log = os.path.join(self.root, "browser.jsonl")
+        self.launch_log = os.path.join(self.root, "launch.jsonl")
+        os.makedirs(self.bin_dir)
+        install_tool(self.bin_dir, "pyinstaller", os.path.join(BENCH_DIR, "fake_pyinstaller.py"))
+        install_tool(self.bin_dir, "msedge", os.path.join(BENCH_DIR, "fake_browser.py"))
+
+        self._saved_env = dict(os.environ)
+        os.environ["PATH"] = self.bin_dir + os.pathsep + os.environ.get("PATH", "")
+        os.environ["BENCH_PYI_DELAY"] = str(self.args.delay)
+        os.environ["BENCH_PYI_LINES"] = str(self.args.lines)
+        os.environ["BENCH_PYI_EXE_BYTES"] = str(self.args.exe_bytes)
+        os.environ["BENCH_BROWSER_LOG"] = self.browser_log
+        os.environ["WEBAPP_LAUNCH_LOG"] = self.launch_log
+        os.environ["XDG_CACHE_HOME"] = os.path.join(self.root, "user-cache")  # browser cache, telemetry
+        os.environ.pop("LOCALAPPDATA", None)
+        os.environ.pop("WEBAPP_TELEMETRY", None)
+        os.environ["XDG_RUNTIME_DIR"] = self.root  # single-instance sockets
+        os.environ["BENCH_BROWSER_HOME"] = os.path.join(self.root, "browser-home")
+        os.environ["WEBAPP_BROWSER"] = os.path.join(self.bin_dir, "msedge")
+        os.environ["WEBAPP_BUILDER_CACHE"] = self.cache_dir
+        os.environ["WEBAPP_BUILDER_SCRATCH"] = os.path.join(self.root, "scratch")
+        return self
+
+    def __exit__(self, *exc):
+        os.environ.clear()
+        os.environ.update(self._saved_env)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def scratch(self, prefix):
+        return tempfile.mkdtemp(prefix=prefix, dir=self.root)
+
+
+def install_tool(bin_dir, command, script):
+    """Put an executable `command` wrapper in bin_dir that runs script with this interpreter."""
+    path = os.path.join(bin_dir, command)
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+class SiteServer:
+    """
+    Local HTTP server with two stand-in sites: /app/ (an SPA page and its
+    immutable script bundles) and /news/ (other browsing that competes for the
+    shared cache). Pages are revalidated with ETags; bundles are cacheable for
+    a year, like hashed build output.
+    """
+
+    def __init__(self, app_scripts=6, news_scripts=10, app_kb=512, news_kb=1024):
+        self.files = {}
+        for site, count, kb in (("app", app_scripts, app_kb), ("news", news_scripts, news_kb)):
+            scripts = [f"/{site}/bundle-{i}.js" for i in range(count)]
+            page = "<html><body>" + "".join(f'<script src="{s}"></script>' for s in scripts) + "</body></html>"
+            self.add(f"/{site}/", page.encode("utf-8"), "no-cache")
+            for path in scripts:
+                self.add(path, os.urandom(kb * 1024), "public, max-age=31536000, immutable")
+
+    def add(self, path, body, cache_control):
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        self.files[path] = (body, cache_control, etag)
+
+    def __enter__(self):
+        files = self.files
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in files:
+                    self.send_error(404)
+                    return
+                body, cache_control, etag = files[self.path]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Cache-Control", cache_control)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", cache_control)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def url(self, site):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/{site}/"
+
+
+# ---------- Benchmarks ----------
+
+def bench_builds(env, mode, apps, jobs):
+    """Build `apps` launchers with `jobs` workers (build cache off). Returns builds/minute."""
+    specs = [build_engine.BuildSpec(f"Bench App {i}", f"https://app{i}.example",
+                                    icon=build_engine.get_bundled_icon_path())
+             for i in range(apps)]
+    output_root = env.scratch("out-")
+    options = build_engine.BuildOptions.for_mode(mode, use_cache=False, cache_dir=env.cache_dir,
+                                                 slots=jobs, trace=False)
+    start = time.monotonic()
+    results = build_engine.build_batch(specs, output_root, jobs=jobs, options=options)
+    elapsed = time.monotonic() - start
+    shutil.rmtree(output_root, ignore_errors=True)
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        raise RuntimeError(f"{mode} build of '{failed[0].name}' failed: {failed[0].error}")
+    return apps / elapsed * 60
+
+
+def bench_distributed(env, workers, apps, kill=False):
+    """
+    Build `apps` launchers on `workers` local worker processes through the
+    coordinator (build cache off; the workers are started beforehand, like a
+    standing fleet). With kill, the first worker is killed once the first
+    launcher is back and its apps must be rebuilt elsewhere. Returns builds/minute.
+    """
+    import signal
+    import build_cluster
+
+    specs = [build_engine.BuildSpec(f"Bench App {i}", f"https://app{i}.example",
+                                    icon=build_engine.get_bundled_icon_path())
+             for i in range(apps)]
+    output_root = env.scratch("cluster-")
+    processes, addresses = build_cluster.start_local_workers(workers, jobs=1, args=["--no-cache", "--no-trace"])
+    try:
+        def on_result(result):
+            if kill and processes[0].poll() is None:
+                os.kill(processes[0].pid, signal.SIGKILL)
+
+        coordinator = build_cluster.Coordinator(specs, output_root, addresses, store=False, on_result=on_result)
+        start = time.monotonic()
+        results = coordinator.run()
+        elapsed = time.monotonic() - start
+    finally:
+        build_cluster.stop_local_workers(processes)
+    shutil.rmtree(output_root, ignore_errors=True)
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        raise RuntimeError(f"Distributed build of '{failed[0].name}' failed: {failed[0].error}")
+    return apps / elapsed * 60
+
+
+def bench_workspace(env, workspace, apps):
+    """
+    Median milliseconds per build spent getting the launcher into dist and
+    tidying up (publish + cleanup stages from the build trace), building in
+    the output folder ("in-place"), a scratch folder or a RAM-backed one.
+    None if there is no RAM-backed folder.
+    """
+    from workspace import default_scratch_root
+
+    if workspace == "ram" and default_scratch_root(ram=True) is None:
+        return None
+    output_root = env.scratch("io-")
+    trace_path = os.path.join(output_root, "trace.jsonl")
+    options = build_engine.BuildOptions.for_mode(
+        "standard", use_cache=False, cache_dir=env.cache_dir, trace=trace_path,
+        scratch=workspace != "in-place", scratch_dir=env.scratch("work-") if workspace == "scratch" else None,
+        ram_scratch=workspace == "ram")
+    for i in range(apps):
+        spec = build_engine.BuildSpec(f"IO App {i}", f"https://io{i}.example",
+                                      icon=build_engine.get_bundled_icon_path())
+        build_engine.build_launcher(spec, output_root, options=options)
+    if options.scratch is not None:
+        options.scratch.wait()
+
+    from build_trace import load_records
+    samples = [(r["stages"].get("publish", 0) + r["stages"].get("cleanup", 0)) * 1000
+               for r in load_records(trace_path)]
+    shutil.rmtree(output_root, ignore_errors=True)
+    return statistics.median(samples)
+
+
+def make_png(path, size=512):
+    from PIL import Image
+
+    img = Image.new("RGBA", (size, size))
+    img.putdata([(x % 256, y % 256, (x + y) % 256, 255) for y in range(size) for x in range(size)])
+    img.save(path)
+
+
+def bench_icons(env, count):
+    """PNG -> ICO conversions per second, uncached and from the icon cache. None without Pillow."""
+    if not build_engine.pil_available():
+        return None
+    from icon_pipeline import IconPipeline, convert_png_to_ico
+
+    work = env.scratch("icons-")
+    png = os.path.join(work, "logo.png")
+    make_png(png)
+    ico = os.path.join(work, "logo.ico")
+
+    start = time.monotonic()
+    for _ in range(count):
+        convert_png_to_ico(png, ico)
+    uncached = count / (time.monotonic() - start)
+
+    pipeline = IconPipeline(os.path.join(work, "cache"))
+    pipeline.convert(png)
+    start = time.monotonic()
+    for _ in range(count):
+        pipeline.convert(png, ico)
+    cached = count / (time.monotonic() - start)
+    return uncached, cached
+
+
+def bench_icon_validation(env, count):
+    """
+    Icon checks per second, each covering the source PNG and the converted
+    multi-size ICO: headers only with icon_format, and a full decode with
+    Pillow (what the conversion path did before). None without Pillow.
+    """
+    if not build_engine.pil_available():
+        return None
+    from PIL import Image
+    from icon_format import inspect_icon
+    from icon_pipeline import convert_png_to_ico
+
+    work = env.scratch("validate-")
+    png = os.path.join(work, "logo.png")
+    make_png(png)
+    ico = os.path.join(work, "logo.ico")
+    convert_png_to_ico(png, ico)
+
+    start = time.monotonic()
+    for _ in range(count):
+        inspect_icon(png)
+        inspect_icon(ico)
+    builtin = count / (time.monotonic() - start)
+
+    start = time.monotonic()
+    for _ in range(count):
+        for path in (png, ico):
+            with Image.open(path) as img:
+                img.load()
+    pillow = count / (time.monotonic() - start)
+    return builtin, pillow
+
+
+def bench_watch(env, kind, icons, changes=5, idle_seconds=2.0):
+    """
+    Watch a manifest and its icons with the inotify or polling watcher:
+    CPU milliseconds the watcher thread uses per second of idling, and the
+    median milliseconds from an icon edit until the change is reported
+    (without debounce). None if inotify isn't available.
+    """
+    import watch
+
+    if kind == "inotify" and not watch.inotify_available():
+        return None
+    work = env.scratch("watch-")
+    apps = []
+    for index in range(icons):
+        icon = os.path.join(work, f"icon{index}.ico")
+        shutil.copyfile(os.path.join(REPO_DIR, "app_icon.ico"), icon)
+        apps.append({"name": f"App {index}", "url": f"https://example.com/{index}", "icon": icon})
+    manifest = os.path.join(work, "manifest.json")
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump({"apps": apps}, f)
+
+    watcher = watch.make_watcher(watch.ManifestWatch(manifest).paths(), poll=(kind == "poll"))
+    stop = threading.Event()
+    seen = queue.Queue()
+
+    def run():
+        for changed in watch.changes(watcher, debounce=0, stop=stop):
+            seen.put((time.perf_counter(), changed))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        time.sleep(0.2)
+        cpu = time.process_time()
+        time.sleep(idle_seconds)
+        idle_cpu_ms = (time.process_time() - cpu) * 1000 / idle_seconds
+
+        latencies = []
+        for index in range(changes):
+            # Spread the edits over the polling interval; an edit may be
+            # reported in two parts (written, then closed)
+            time.sleep(0.05 + index * watch.POLL_INTERVAL / changes)
+            while not seen.empty():
+                seen.get()
+            icon = apps[index % icons]["icon"]
+            start = time.perf_counter()
+            with open(icon, "ab") as f:
+                f.write(b"\0")
+            seen_at, changed = seen.get(timeout=5)
+            latencies.append((seen_at - start) * 1000)
+    finally:
+        stop.set()
+        thread.join()
+    return idle_cpu_ms, statistics.median(latencies)
+
+
+def bench_spawn(env, runs, telemetry=False):
+    """
+    Median milliseconds from starting main_edge.py until the browser process
+    runs, and the median spawn_ms the launcher reported. With telemetry the
+    launcher also records its milestones and writes them to the telemetry log.
+    """
+    app_dir = env.scratch("launcher-")
+    spec = build_engine.BuildSpec("Bench Launcher", "https://launcher.example",
+                                  icon=build_engine.get_bundled_icon_path(), shortcut=False,
+                                  telemetry=telemetry)
+    spec.validate()
+    with open(os.path.join(app_dir, build_engine.CONFIG_FILE), "w", encoding="utf-8") as f:
+        f.write(build_engine.render_app_config(spec))
+    launcher = os.path.join(REPO_DIR, build_engine.LAUNCHER_TEMPLATE)
+    result = time_to_browser(env, [sys.executable, launcher], app_dir, spec.url, runs)
+    if telemetry:
+        from launch_telemetry import load_launches
+        records, _ = load_launches([os.path.join(os.environ["XDG_CACHE_HOME"], "web-app-builder", "telemetry")])
+        if not any(r.get("app") == spec.name for r in records):
+            raise RuntimeError("Launcher did not write launch telemetry")
+    return result
+
+
+def bench_startup(env, packaging, runs, optimize="default"):
+    """
+    Median milliseconds from starting a packaged launcher (built with the
+    given optimization profile) until the browser process runs, and the
+    launcher-reported spawn_ms (None for the stub, which doesn't report it).
+    None if the packaging can't run on this platform.
+    """
+    if packaging == "stub" and sys.platform != "win32":
+        return None
+    spec = build_engine.BuildSpec(f"Startup {packaging}", "https://startup.example",
+                                  icon=build_engine.get_bundled_icon_path(), shortcut=False,
+                                  packaging=packaging)
+    output_root = env.scratch("startup-")
+    options = build_engine.BuildOptions(trace=False, size=SizeProfile() if optimize == "size" else None)
+    result = build_engine.build_launcher(spec, output_root, options=options)
+    cmd = ["wscript", result.exe_path] if packaging == "stub" else [result.exe_path]
+    return time_to_browser(env, cmd, os.path.dirname(result.exe_path), spec.url, runs)
+
+
+def bench_size(env):
+    """Onefile launcher size in KB with the default and the size-optimized profile."""
+    sizes = []
+    for size in (None, SizeProfile()):
+        spec = build_engine.BuildSpec("Size App", "https://size.example",
+                                      icon=build_engine.get_bundled_icon_path(), shortcut=False)
+        output_root = env.scratch("size-")
+        result = build_engine.build_launcher(spec, output_root,
+                                             options=build_engine.BuildOptions(trace=False, size=size))
+        sizes.append(result.sizes["total"] / 1024)
+        shutil.rmtree(output_root, ignore_errors=True)
+    return sizes
+
+
+def bench_handover(env, runs):
+    """
+    Median milliseconds for a second launch of a running single-instance
+    launcher to hand over and exit, and the median handover_ms it reported.
+    """
+    app_dir = env.scratch("instance-")
+    spec = build_engine.BuildSpec("Bench Instance", "https://instance.example",
+                                  icon=build_engine.get_bundled_icon_path(), shortcut=False,
+                                  single_instance=True)
+    spec.validate()
+    with open(os.path.join(app_dir, build_engine.CONFIG_FILE), "w", encoding="utf-8") as f:
+        f.write(build_engine.render_app_config(spec))
+    cmd = [sys.executable, os.path.join(REPO_DIR, build_engine.LAUNCHER_TEMPLATE)]
+
+    for path in (env.browser_log, env.launch_log):
+        if os.path.exists(path):
+            os.remove(path)
+    # The owner stays up while its browser runs; its own session lets us stop both
+    owner = subprocess.Popen(cmd, cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             env=dict(os.environ, BENCH_BROWSER_LINGER="600"), start_new_session=True)
+    try:
+        wait_for_browser(env.browser_log)
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run(cmd, cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            samples.append((time.perf_counter() - started) * 1000)
+        with open(env.browser_log, "r", encoding="utf-8") as f:
+            if len(f.readlines()) != 1:
+                raise RuntimeError("A second launch started another browser")
+    finally:
+        os.killpg(owner.pid, signal.SIGTERM)
+        owner.wait()
+    with open(env.launch_log, "r", encoding="utf-8") as f:
+        reported = [json.loads(line)["handover_ms"] for line in f if "handover_ms" in line]
+    return statistics.median(samples), statistics.median(reported)
+
+
+def bench_profile(env):
+    """
+    KB downloaded by the launcher's browser: a cold load, then a warm load
+    after browsing another site, with the shared default profile and with a
+    dedicated profile. Returns (cold_kb, shared_warm_kb, dedicated_warm_kb).
+    """
+    os.environ["BENCH_BROWSER_FETCH"] = "1"
+    browser = os.environ["WEBAPP_BROWSER"]
+    try:
+        with SiteServer() as server:
+            def launch(spec):
+                app_dir = env.scratch("profile-app-")
+                with open(os.path.join(app_dir, build_engine.CONFIG_FILE), "w", encoding="utf-8") as f:
+                    f.write(build_engine.render_app_config(spec))
+                return load_bytes(env, [sys.executable, os.path.join(REPO_DIR, build_engine.LAUNCHER_TEMPLATE)],
+                                  app_dir)
+
+            def browse_news():
+                load_bytes(env, [browser, f"--app={server.url('news')}"], env.root)
+
+            results = {}
+            for variant in ("shared", "dedicated"):
+                shutil.rmtree(os.environ["BENCH_BROWSER_HOME"], ignore_errors=True)
+                spec = build_engine.BuildSpec(
+                    "Bench Profile", server.url("app"), icon=build_engine.get_bundled_icon_path(), shortcut=False,
+                    profile_dir=env.scratch("profile-") if variant == "dedicated" else "")
+                spec.validate()
+                cold = launch(spec)
+                browse_news()
+                results[variant] = (cold, launch(spec))
+    finally:
+        del os.environ["BENCH_BROWSER_FETCH"]
+    return results["dedicated"][0] / 1024, results["shared"][1] / 1024, results["dedicated"][1] / 1024
+
+
+def load_bytes(env, cmd, cwd):
+    """Run cmd (the launcher or the browser itself) and return the bytes the browser downloaded."""
+    if os.path.exists(env.browser_log):
+        os.remove(env.browser_log)
+    subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with open(env.browser_log, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n") and '"loaded"' in line:
+                        return json.loads(line)["loaded"]
+        except OSError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError("Browser did not finish loading the page")
+
+
+def bench_resolver(env, runs):
+    """
+    Microseconds per browser lookup in a fake Windows tree where only the last
+    channel (Chromium) is installed: a full probe, and a lookup from the cache.
+    """
+    import main_edge
+
+    tree = env.scratch("browsers-")
+    fake_env = {var: os.path.join(tree, var) for var in ("ProgramFiles", "ProgramFiles(x86)", "LOCALAPPDATA")}
+    fake_env["PATH"] = ""
+    exe = os.path.join(fake_env["LOCALAPPDATA"], "Chromium", "Application", "chrome.exe")
+    os.makedirs(os.path.dirname(exe))
+    open(exe, "wb").close()
+
+    resolver = main_edge.BrowserResolver(env=fake_env)
+    start = time.perf_counter()
+    for _ in range(runs):
+        resolver.probe()
+    probe_us = (time.perf_counter() - start) / runs * 1e6
+
+    resolver.resolve()  # fills the cache
+    start = time.perf_counter()
+    for _ in range(runs):
+        main_edge.BrowserResolver(env=fake_env).resolve()
+    cached_us = (time.perf_counter() - start) / runs * 1e6
+    return probe_us, cached_us
+
+
+def bench_gui_startup(env, runs):
+    """
+    Starts the builder GUI under -X importtime. Returns (median ms importing
+    app_builder, median ms from process start until the window mapped, median
+    ms until deferred startup finished, sorted deferred modules imported
+    eagerly); the window times are None without a display.
+    """
+    import_ms, window_ms, ready_ms = [], [], []
+    eager = set()
+    for _ in range(runs):
+        cwd = env.scratch("gui-")
+        started = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-X", "importtime", "-c", GUI_PROBE.format(repo=REPO_DIR)],
+                                cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        timer = threading.Timer(30, proc.kill)
+        timer.start()
+        try:
+            events = {line.strip(): (time.perf_counter() - started) * 1000 for line in proc.stdout}
+            stderr = proc.stderr.read()
+            proc.wait()
+        finally:
+            timer.cancel()
+        if proc.returncode != 0:
+            raise RuntimeError(f"GUI probe failed:\n{stderr}")
+
+        # "import time: self [us] | cumulative | module", innermost imports first
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, module = line.split("|", 2)
+            module = module.strip()
+            if module == "app_builder":
+                import_ms.append(int(cumulative) / 1000)
+                break
+            eager.update(name for name in GUI_DEFERRED_MODULES
+                         if module == name or module.startswith(name + "."))
+        if "window" in events:
+            window_ms.append(events["window"])
+            ready_ms.append(events["ready"])
+    if not window_ms:
+        return statistics.median(import_ms), None, None, sorted(eager)
+    return statistics.median(import_ms), statistics.median(window_ms), statistics.median(ready_ms), sorted(eager)
+
+
+def time_to_browser(env, cmd, cwd, url, runs):
+    """Returns (median ms until the browser ran, median launcher-reported spawn_ms or None)."""
+    samples = []
+    for path in (env.browser_log, env.launch_log):
+        if os.path.exists(path):
+            os.remove(path)
+    for _ in range(runs):
+        if os.path.exists(env.browser_log):
+            os.remove(env.browser_log)
+        started = time.time()
+        subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        record = wait_for_browser(env.browser_log)
+        if f"--app={url}" not in record["argv"]:
+            raise RuntimeError(f"Browser started with unexpected arguments: {record['argv']}")
+        samples.append((record["time"] - started) * 1000)
+
+    reported = []
+    if os.path.exists(env.launch_log):
+        with open(env.launch_log, "r", encoding="utf-8") as f:
+            reported = [json.loads(line)["spawn_ms"] for line in f if "spawn_ms" in line]
+    return statistics.median(samples), statistics.median(reported) if reported else None
+
+
+def wait_for_browser(log_path, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(log_path, "r", encoding="utf-8") as f:
+                line = f.readline()
+            if line.endswith("\n"):
+                return json.loads(line)
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError("Launcher did not start the browser")
+
+
+def median_of(repeat, func, *args):
+    return statistics.median(func(*args) for _ in range(repeat))
+
+
+def run_suite(args, report):
+    """Run every benchmark; returns {metric: value}. Metrics ending in _ms/_us/_kb are lower-is-better."""
+    metrics = {}
+    with BenchEnv(args) as env:
+        import_ms, window_ms, ready_ms, eager = bench_gui_startup(env, max(args.repeat, 5))
+        metrics["gui.import_ms"] = import_ms
+        report("gui.import_ms", import_ms)
+        metrics["gui.eager_imports"] = len(eager)
+        report("gui.eager_imports", len(eager), None)
+        if eager:
+            print(f"app_builder imports {', '.join(eager)} before its window shows", file=sys.stderr)
+        if window_ms is None:
+            report("gui.first_window_ms", None, "no display")
+        else:
+            metrics["gui.first_window_ms"] = window_ms
+            report("gui.first_window_ms", window_ms)
+            metrics["gui.ready_ms"] = ready_ms
+            report("gui.ready_ms", ready_ms)
+        if args.gui_only:
+            return metrics
+
+        for mode in args.modes:
+            # Warm-up: builds the stamp stub / shared analysis once, like a real session
+            bench_builds(env, mode, 1, 1)
+            for jobs in args.jobs:
+                name = f"build.{mode}.j{jobs}.builds_per_min"
+                metrics[name] = median_of(args.repeat, bench_builds, env, mode, args.apps, jobs)
+                report(name, metrics[name])
+
+        for name, workers, kill in (("cluster.w1.builds_per_min", 1, False), ("cluster.w3.builds_per_min", 3, False),
+                                    ("cluster.w3.kill1.builds_per_min", 3, True)):
+            metrics[name] = median_of(args.repeat, bench_distributed, env, workers, args.apps, kill)
+            report(name, metrics[name])
+
+        for workspace in ("in-place", "scratch", "ram"):
+            name = f"build.io.{workspace.replace('-', '')}_ms"
+            samples = [bench_workspace(env, workspace, min(args.apps, 4)) for _ in range(args.repeat)]
+            if samples[0] is None:
+                report(name, None, "no RAM-backed temp folder")
+                continue
+            metrics[name] = statistics.median(samples)
+            report(name, metrics[name])
+
+        samples = [bench_icons(env, args.icons) for _ in range(args.repeat)]
+        if samples[0] is not None:
+            metrics["icon.convert_per_s"] = statistics.median(s[0] for s in samples)
+            report("icon.convert_per_s", metrics["icon.convert_per_s"])
+            metrics["icon.cached_per_s"] = statistics.median(s[1] for s in samples)
+            report("icon.cached_per_s", metrics["icon.cached_per_s"])
+        else:
+            report("icon.*", None, "Pillow not installed")
+
+        samples = [bench_icon_validation(env, args.icons * 10) for _ in range(args.repeat)]
+        if samples[0] is not None:
+            metrics["icon.validate_per_s"] = statistics.median(s[0] for s in samples)
+            report("icon.validate_per_s", metrics["icon.validate_per_s"])
+            metrics["icon.validate_pillow_per_s"] = statistics.median(s[1] for s in samples)
+            report("icon.validate_pillow_per_s", metrics["icon.validate_pillow_per_s"])
+
+        samples = [bench_resolver(env, 200) for _ in range(args.repeat)]
+        metrics["resolver.probe_us"] = statistics.median(s[0] for s in samples)
+        report("resolver.probe_us", metrics["resolver.probe_us"])
+        metrics["resolver.cached_us"] = statistics.median(s[1] for s in samples)
+        report("resolver.cached_us", metrics["resolver.cached_us"])
+
+        for kind in ("inotify", "poll"):
+            samples = [bench_watch(env, kind, 50) for _ in range(args.repeat)]
+            if samples[0] is None:
+                report(f"watch.{kind}.*", None, "inotify not available")
+                continue
+            for index, name in enumerate((f"watch.{kind}.idle_cpu_ms", f"watch.{kind}.detect_ms")):
+                metrics[name] = statistics.median(s[index] for s in samples)
+                report(name, metrics[name])
+
+        samples = [bench_spawn(env, args.spawns) for _ in range(args.repeat)]
+        metrics["launcher.spawn_ms"] = statistics.median(s[0] for s in samples)
+        report("launcher.spawn_ms", metrics["launcher.spawn_ms"])
+        metrics["launcher.reported_spawn_ms"] = statistics.median(s[1] for s in samples)
+        report("launcher.reported_spawn_ms", metrics["launcher.reported_spawn_ms"])
+
+        samples = [bench_spawn(env, args.spawns, telemetry=True) for _ in range(args.repeat)]
+        metrics["launcher.telemetry_spawn_ms"] = statistics.median(s[0] for s in samples)
+        report("launcher.telemetry_spawn_ms", metrics["launcher.telemetry_spawn_ms"])
+
+        samples = [bench_handover(env, args.spawns) for _ in range(args.repeat)]
+        metrics["launcher.handover_ms"] = statistics.median(s[0] for s in samples)
+        report("launcher.handover_ms", metrics["launcher.handover_ms"])
+        metrics["launcher.reported_handover_ms"] = statistics.median(s[1] for s in samples)
+        report("launcher.reported_handover_ms", metrics["launcher.reported_handover_ms"])
+
+        cold_kb, shared_kb, dedicated_kb = bench_profile(env)
+        for name, value in (("profile.cold_kb", cold_kb), ("profile.shared_warm_kb", shared_kb),
+                            ("profile.dedicated_warm_kb", dedicated_kb)):
+            metrics[name] = value
+            report(name, value)
+
+        for packaging in args.packaging:
+            name = f"startup.{packaging}_ms"
+            samples = [bench_startup(env, packaging, args.spawns) for _ in range(args.repeat)]
+            if samples[0] is None:
+                report(name, None, "needs Windows")
+                continue
+            metrics[name] = statistics.median(s[0] for s in samples)
+            report(name, metrics[name])
+            if samples[0][1] is not None:
+                name = f"startup.{packaging}.reported_spawn_ms"
+                metrics[name] = statistics.median(s[1] for s in samples)
+                report(name, metrics[name])
+
+        if "onefile" in args.packaging:
+            samples = [bench_startup(env, "onefile", args.spawns, optimize="size") for _ in range(args.repeat)]
+            metrics["startup.onefile.size_ms"] = statistics.median(s[0] for s in samples)
+            report("startup.onefile.size_ms", metrics["startup.onefile.size_ms"])
+
+        default_kb, size_kb = bench_size(env)
+        for name, value in (("size.onefile.default_kb", default_kb), ("size.onefile.size_kb", size_kb)):
+            metrics[name] = value
+            report(name, value)
+    return metrics
+
+
+# ---------- Baseline ----------
+
+def settings_of(args):
+    return {key: getattr(args, key) for key in SETTING_KEYS}
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_baseline(path, args, metrics):
+    data = {
+        "settings": settings_of(args),
+        "host": host_info(),
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "metrics": {name: round(value, 3) for name, value in metrics.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(metrics, baseline, tolerance):
+    """Return rows of (metric, value, baseline, change, status)."""
+    rows = []
+    base_metrics = (baseline or {}).get("metrics", {})
+    for name, value in metrics.items():
+        if name in BUDGETS:
+            rows.append((name, value, BUDGETS[name], None,
+                         "OVER BUDGET" if value > BUDGETS[name] else "ok"))
+            continue
+        base = base_metrics.get(name)
+        if not base:
+            rows.append((name, value, None, None, "new"))
+            continue
+        change = value / base - 1.0
+        lower_is_better = name.endswith(("_ms", "_us", "_kb"))
+        worse = change > tolerance if lower_is_better else change < -tolerance
+        better = change < -tolerance if lower_is_better else change > tolerance
+        rows.append((name, value, base, change, "REGRESSED" if worse else "improved" if better else "ok"))
+    return rows
+
+
+def print_comparison(rows):
+    width = max(len("Metric"), *(len(row[0]) for row in rows))
+    print()
+    print(f"{'Metric':<{width}}  {'Value':>10}  {'Baseline':>10}  {'Change':>8}  Status")
+    for name, value, base, change, status in rows:
+        base_text = "-" if base is None else f"{base:.2f}"
+        change_text = "-" if change is None else f"{change:+.0%}"
+        print(f"{name:<{width}}  {value:>10.2f}  {base_text:>10}  {change_text:>8}  {status}")
+    print()
+
+
+# ---------- CLI ----------
+
+def int_list(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the Web App Builder pipeline with stand-in tools.")
+    parser.add_argument("--apps", type=int, default=8, help="Apps per batch build (default: 8)")
+    parser.add_argument("--jobs", type=int_list, default=[1, 2, 4],
+                        help="Comma-separated concurrency levels (default: 1,2,4)")
+    parser.add_argument("--modes", type=lambda t: [m for m in t.split(",") if m],
+                        default=list(build_engine.BUILD_MODES),
+                        help="Comma-separated build modes (default: standard,shared,stamp)")
+    parser.add_argument("--packaging", type=lambda t: [p for p in t.split(",") if p],
+                        default=list(build_engine.PACKAGING_MODES),
+                        help="Comma-separated packaging modes for the startup benchmark "
+                             "(default: onefile,onedir,stub)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the median is reported")
+    parser.add_argument("--delay", type=float, default=0.5, help="Stand-in PyInstaller seconds per build")
+    parser.add_argument("--lines", type=int, default=400, help="Stand-in PyInstaller output lines per build")
+    parser.add_argument("--exe-bytes", type=int, default=8 * 1024 * 1024,
+                        help="Size of the stand-in exe/bundle (default: 8 MB, like a real launcher)")
+    parser.add_argument("--icons", type=int, default=20, help="Icon conversions per measurement")
+    parser.add_argument("--spawns", type=int, default=10, help="Launcher starts per measurement")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative slowdown before a metric counts as regressed (default: 0.25)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--gui-only", action="store_true",
+                        help="Only measure builder GUI startup (import time, time to first window)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    if sys.platform == "win32":
+        print("The benchmark suite uses POSIX shell wrappers; run it on Linux or macOS.", file=sys.stderr)
+        return 2
+    for mode in args.modes:
+        if mode not in build_engine.BUILD_MODES:
+            print(f"Unknown build mode: {mode}", file=sys.stderr)
+            return 2
+    for packaging in args.packaging:
+        if packaging not in build_engine.PACKAGING_MODES:
+            print(f"Unknown packaging mode: {packaging}", file=sys.stderr)
+            return 2
+
+    def report(name, value, reason=None):
+        if not args.json:
+            print(f"  {name}: {f'skipped ({reason})' if value is None else f'{value:.2f}'}", flush=True)
+
+    if not args.json:
+        print(f"Benchmarking {args.apps} apps x jobs {args.jobs} x modes {args.modes} "
+              f"(median of {args.repeat})...")
+    metrics = run_suite(args, report)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None and baseline.get("settings") != settings_of(args):
+        if not args.json:
+            print(f"Baseline {args.baseline} was recorded with different settings; not comparing.")
+        baseline = None
+    rows = compare(metrics, baseline, args.tolerance)
+    regressed = [row for row in rows if row[4] in ("REGRESSED", "OVER BUDGET")]
+
+    if args.json:
+        print(json.dumps({
+            "settings": settings_of(args),
+            "host": host_info(),
+            "results": [
+                {"metric": name, "value": round(value, 3), "baseline": base,
+                 "change": None if change is None else round(change, 4), "status": status}
+                for name, value, base, change, status in rows
+            ],
+        }, indent=2))
+    else:
+        print_comparison(rows)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, args, metrics)
+        if not args.json:
+            print(f"Baseline written to {args.baseline}")
+        return 0
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
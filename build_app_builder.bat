@@ -15,6 +15,7 @@ pyinstaller --onefile --windowed ^
     --name="Web App Builder" ^
     --icon=app_icon.ico ^
     --add-data="app_icon.ico;." ^
+    --add-data="main_edge.py;." ^
     --clean ^
     app_builder.py
 
@@ -0,0 +1,191 @@
+"""
+Content-addressed cache of built launcher exes.
+
+A launcher is fully determined by the rendered launcher source, the icon
+bytes, the PyInstaller version and the PyInstaller command line, so those are
+hashed into a key. When the key is already in the cache the stored exe is
+copied into place and PyInstaller is skipped entirely.
+
+Entries are plain files under <cache>/objects/<key[:2]>/<key>.exe. The file
+mtime is bumped on every hit, and the oldest entries are evicted once the
+cache grows past its size limit (LRU).
+"""
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import functools
+import subprocess
+
+# Bump when the key layout changes so old entries are never reused
+CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+
+
+def default_cache_dir():
+    """Per-user cache folder (override with WEBAPP_BUILDER_CACHE)."""
+    override = os.environ.get("WEBAPP_BUILDER_CACHE")
+    if override:
+        return override
+    if sys.platform == 'win32':
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "WebAppBuilder", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "web-app-builder")
+
+
+@functools.lru_cache(maxsize=None)
+def pyinstaller_version():
+    """Return the installed PyInstaller version, or "unknown" if it can't be run."""
+    try:
+        result = subprocess.run(
+            ["pyinstaller", "--version"],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        if result.returncode == 0:
+            return result.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return "unknown"
+
+
+class CacheStats:
+    """Hit/miss counters for one session (a GUI session or one CLI run)."""
+
+    def __init__(self, hits=0, misses=0):
+        self.hits = hits
+        self.misses = misses
+
+    def record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def __str__(self):
+        hits = f"{self.hits} hit" + ("" if self.hits == 1 else "s")
+        misses = f"{self.misses} miss" + ("" if self.misses == 1 else "es")
+        return f"{hits}, {misses}"
+
+
+class BuildCache:
+    """Size-bounded LRU cache of launcher exes keyed by build inputs."""
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._toolchain = None
+
+    def toolchain(self):
+        """PyInstaller version, probed once and then carried along (also into pool workers)."""
+        if self._toolchain is None:
+            self._toolchain = pyinstaller_version()
+        return self._toolchain
+
+    def key(self, script_source, icon_path, cmd, workdir):
+        """
+        Hash the build inputs. Paths inside workdir are replaced with a placeholder
+        so the key doesn't depend on where the output folder lives.
+        """
+        h = hashlib.sha256()
+        h.update(f"webapp-build-cache:{CACHE_VERSION}\0".encode())
+        h.update(script_source.encode('utf-8'))
+        h.update(b"\0")
+        with open(icon_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        h.update(b"\0")
+        h.update(self.toolchain().encode('utf-8'))
+        h.update(b"\0")
+        for arg in cmd:
+            h.update(arg.replace(workdir, "<workdir>").encode('utf-8'))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.root, "objects", key[:2], f"{key}.exe")
+
+    def get(self, key, dest_path):
+        """Copy the cached exe for key to dest_path. Returns True on a hit."""
+        entry = self.entry_path(key)
+        try:
+            os.utime(entry, None)  # mark as recently used
+        except OSError:
+            return False
+
+        dest_dir = os.path.dirname(dest_path)
+        os.makedirs(dest_dir, exist_ok=True)
+        try:
+            self._atomic_copy(entry, dest_path)
+        except FileNotFoundError:
+            # Evicted by another build between utime and copy
+            return False
+        return True
+
+    def put(self, key, exe_path):
+        """Store a freshly built exe, then evict old entries if over the size limit."""
+        entry = self.entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        self._atomic_copy(exe_path, entry)
+        self.evict()
+
+    def entries(self):
+        """Return (path, size, mtime) for every cached exe."""
+        objects_dir = os.path.join(self.root, "objects")
+        found = []
+        if not os.path.isdir(objects_dir):
+            return found
+        for prefix in os.listdir(objects_dir):
+            prefix_dir = os.path.join(objects_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if not name.endswith('.exe'):
+                    continue
+                path = os.path.join(prefix_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, st.st_size, st.st_mtime))
+        return found
+
+    def size(self):
+        """Return (entry_count, total_bytes)."""
+        entries = self.entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass  # already evicted by a parallel build
+            total -= size
+        return removed
+
+    def _atomic_copy(self, src, dest):
+        """Copy via a temp file in the destination folder so readers never see a partial exe."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest), suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
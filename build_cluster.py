@@ -0,0 +1,791 @@
+"""
+Distributed builds (`app_builder.py worker` and `app_builder.py distribute`).
+
+A coordinator splits a manifest into shards of a few apps and hands them to
+build workers over TCP. Each worker builds its shards with build_launcher
+(--jobs at a time, the call the GUI and the build service use) and streams
+status lines, the launcher files and build.log back as each app finishes;
+the coordinator writes them into its own output folder, so the result looks
+like a local `build` run (and is registered in its artifact store).
+
+Every worker is kept busy with up to two shards' worth of apps, and shards
+shrink towards the end of the run so the last apps spread across workers.
+If a worker drops out (connection lost, an error reply, or silence for
+--timeout seconds; workers send a ping every PING_SECONDS while building),
+the apps it hadn't returned go back into the queue for the other workers,
+up to --retries times. Apps that fail to build are reported, not retried:
+the same inputs fail the same way anywhere.
+
+Every message is a frame: a 4-byte big-endian length, a UTF-8 JSON header of
+that length, then header["size"] bytes of payload (none if absent).
+
+    coordinator -> worker   hello {protocol}
+    worker -> coordinator   hello {protocol, host, jobs, toolchain}
+    coordinator -> worker   shard {shard, mode, optimize, apps: [{id, spec, icon_size}]}
+                            + the apps' icon files, back to back
+    worker -> coordinator   status {app, message}               while building
+                            ping {}                              every PING_SECONDS
+                            file {app, path, size} + bytes       launcher files and build.log
+                            result {app, result, exe}            one per app
+                            shard_done {shard}
+    worker -> coordinator   error {message}                      then closes
+
+There is no authentication or encryption: run workers on a trusted build
+network. They listen on 127.0.0.1 unless told otherwise.
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import queue
+import uuid
+import shutil
+import socket
+import struct
+import asyncio
+import tempfile
+import subprocess
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import build_engine
+from build_engine import BuildCancel, BuildError, BuildResult, BuildSpec
+
+PROTOCOL_VERSION = 1
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_WORKER_PORT = 8766
+
+FRAME_LENGTH = struct.Struct(">I")
+MAX_HEADER_BYTES = 1024 * 1024
+MAX_PAYLOAD_BYTES = 1024 * 1024 * 1024
+CHUNK_BYTES = 256 * 1024
+
+# Workers ping this often while building; a coordinator gives up on a worker
+# that has sent nothing for its timeout
+PING_SECONDS = 5.0
+DEFAULT_TIMEOUT = 60.0
+CONNECT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+
+# Worker processes started by start_local_workers() report their address in this line
+LISTENING_LINE = re.compile(r"^Build worker on (\S+):(\d+)")
+
+
+class ProtocolError(Exception):
+    """Raised when the other side sends something that isn't a valid frame or message."""
+
+
+# ---------- Frames ----------
+
+async def send_frame(writer, header, payload=b""):
+    if payload:
+        header = dict(header, size=len(payload))
+    data = json.dumps(header).encode("utf-8")
+    writer.write(FRAME_LENGTH.pack(len(data)) + data)
+    if payload:
+        writer.write(payload)
+    await writer.drain()
+
+
+async def send_file_frame(writer, header, path):
+    """Send a frame whose payload is a file, without reading it into memory."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        data = json.dumps(dict(header, size=size)).encode("utf-8")
+        writer.write(FRAME_LENGTH.pack(len(data)) + data)
+        sent = 0
+        while sent < size:
+            chunk = f.read(min(CHUNK_BYTES, size - sent))
+            if not chunk:
+                raise OSError(f"{path} shrank while it was being sent")
+            writer.write(chunk)
+            sent += len(chunk)
+            await writer.drain()
+    await writer.drain()
+    return size
+
+
+async def _read_exactly(reader, size, timeout):
+    return await asyncio.wait_for(reader.readexactly(size), timeout)
+
+
+async def read_header(reader, timeout=None):
+    """Read a frame's header. Its payload (header["size"] bytes) must be read next."""
+    length, = FRAME_LENGTH.unpack(await _read_exactly(reader, FRAME_LENGTH.size, timeout))
+    if length > MAX_HEADER_BYTES:
+        raise ProtocolError(f"Frame header too large ({length} bytes)")
+    try:
+        header = json.loads((await _read_exactly(reader, length, timeout)).decode("utf-8"))
+    except ValueError:
+        raise ProtocolError("Frame header is not valid JSON")
+    if not isinstance(header, dict) or not isinstance(header.get("type"), str):
+        raise ProtocolError("Frame header has no message type")
+    size = header.setdefault("size", 0)
+    if not isinstance(size, int) or not 0 <= size <= MAX_PAYLOAD_BYTES:
+        raise ProtocolError(f"Invalid payload size: {size!r}")
+    return header
+
+
+async def read_payload(reader, header, timeout=None):
+    return await _read_exactly(reader, header["size"], timeout) if header["size"] else b""
+
+
+async def save_payload(reader, header, path, timeout=None):
+    """Write a frame's payload to path in chunks."""
+    remaining = header["size"]
+    with open(path, "wb") as f:
+        while remaining:
+            chunk = await _read_exactly(reader, min(CHUNK_BYTES, remaining), timeout)
+            f.write(chunk)
+            remaining -= len(chunk)
+
+
+async def read_message(reader, timeout=None):
+    """Read a whole frame: (header, payload)."""
+    header = await read_header(reader, timeout)
+    return header, await read_payload(reader, header, timeout)
+
+
+def safe_relpath(path):
+    """A worker-supplied relative path, checked not to escape the folder it is written to."""
+    if not isinstance(path, str) or not path:
+        raise ProtocolError("File frame has no path")
+    parts = path.replace("\\", "/").split("/")
+    if os.path.isabs(path) or any(part in ("", ".", "..") for part in parts) or ":" in parts[0]:
+        raise ProtocolError(f"Refusing file path from worker: {path!r}")
+    return os.path.join(*parts)
+
+
+def result_from_dict(data, exe_path=None, log_path=None):
+    """Rebuild a BuildResult from BuildResult.to_dict() output, with local paths."""
+    ok = data.get("status") == "ok"
+    result = BuildResult(data.get("name", ""), ok, exe_path=exe_path if ok else None, error=data.get("error"),
+                         exit_code=data.get("exit_code"), seconds=data.get("seconds") or 0.0,
+                         cached={"hit": True, "miss": False}.get(data.get("cache")))
+    result.icon_cached = {"hit": True, "miss": False}.get(data.get("icon_cache"))
+    result.icon_seconds = data.get("icon_seconds") or 0.0
+    result.phase_times = data.get("phases") or {}
+    result.sizes = data.get("sizes")
+    result.log_path = log_path
+    return result
+
+
+# ---------- Worker ----------
+
+class BuildWorker:
+    """
+    Builds shards sent by coordinators, at most `jobs` apps at a time across
+    all connections. make_options(mode, optimize) creates the BuildOptions
+    for a build mode and profile (once each; they are kept for later shards).
+    """
+
+    def __init__(self, output_root, make_options, jobs=None, host=DEFAULT_HOST, port=DEFAULT_WORKER_PORT):
+        self.output_root = output_root
+        self.make_options = make_options
+        self.jobs = max(1, jobs or build_engine.default_jobs())
+        self.host = host
+        self.port = port
+        self.server = None
+        self.toolchain = None
+        self.options = {}
+        self._options_lock = None
+        self._executor = None
+
+    async def start(self):
+        from build_cache import pyinstaller_version
+
+        loop = asyncio.get_running_loop()
+        self._options_lock = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="build")
+        self.toolchain = await loop.run_in_executor(None, pyinstaller_version)
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    async def get_options(self, mode, optimize):
+        key = (mode, optimize)
+        async with self._options_lock:
+            if key not in self.options:
+                def create():
+                    options = self.make_options(mode, optimize)
+                    options.prepare()
+                    return options
+                self.options[key] = await asyncio.get_running_loop().run_in_executor(None, create)
+        return self.options[key]
+
+    async def _handle(self, reader, writer):
+        lock = asyncio.Lock()  # one frame at a time on this connection
+        shards = set()
+        pinger = None
+
+        async def send(header, payload=b""):
+            async with lock:
+                await send_frame(writer, header, payload)
+
+        try:
+            hello, _ = await read_message(reader, DEFAULT_TIMEOUT)
+            if hello["type"] != "hello" or hello.get("protocol") != PROTOCOL_VERSION:
+                raise ProtocolError(f"Expected hello for protocol {PROTOCOL_VERSION}, got {hello['type']} "
+                                    f"{hello.get('protocol')}")
+            await send({"type": "hello", "protocol": PROTOCOL_VERSION, "host": socket.gethostname(),
+                        "jobs": self.jobs, "toolchain": self.toolchain})
+            pinger = asyncio.create_task(self._ping(send))
+            while True:
+                try:
+                    header, payload = await read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break  # the coordinator is done with us
+                if header["type"] != "shard":
+                    raise ProtocolError(f"Unexpected message: {header['type']}")
+                task = asyncio.create_task(self._run_shard(header, payload, send, lock, writer))
+                shards.add(task)
+                task.add_done_callback(shards.discard)
+        except (ProtocolError, BuildError) as e:
+            try:
+                await send({"type": "error", "message": str(e)})
+            except (ConnectionError, OSError):
+                pass
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+            for task in list(shards):
+                task.cancel()
+            await asyncio.gather(*shards, return_exceptions=True)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _ping(self, send):
+        while True:
+            await asyncio.sleep(PING_SECONDS)
+            await send({"type": "ping"})
+
+    async def _run_shard(self, header, payload, send, lock, writer):
+        loop = asyncio.get_running_loop()
+        shard_dir = os.path.join(self.output_root, "shards", uuid.uuid4().hex[:12])
+        cancels = []
+        builds = []
+        try:
+            try:
+                options = await self.get_options(header.get("mode", "standard"), header.get("optimize", "default"))
+            except BuildError as e:
+                # Likely this machine's setup (e.g. no UPX): let the coordinator try elsewhere
+                await send({"type": "error", "message": f"Cannot build here: {e}"})
+                writer.close()
+                return
+
+            offset = 0
+            for app in header.get("apps", []):
+                icon_size = app.get("icon_size") or 0
+                data = app.get("spec") or {}
+                if icon_size:
+                    icon_dir = os.path.join(shard_dir, "icons", str(app["id"]))
+                    os.makedirs(icon_dir, exist_ok=True)
+                    data = dict(data, icon=os.path.join(icon_dir, os.path.basename(data.get("icon") or "icon.ico")))
+                    with open(data["icon"], "wb") as f:
+                        f.write(payload[offset:offset + icon_size])
+                    offset += icon_size
+                cancel = BuildCancel()
+                cancels.append(cancel)
+                builds.append(self._build_app(app["id"], data, shard_dir, options, cancel, send, lock, writer, loop))
+            await asyncio.gather(*builds)
+            await send({"type": "shard_done", "shard": header.get("shard")})
+        except asyncio.CancelledError:
+            for cancel in cancels:
+                cancel.cancel()
+            raise
+        finally:
+            await loop.run_in_executor(None, lambda: shutil.rmtree(shard_dir, ignore_errors=True))
+
+    async def _build_app(self, app_id, data, shard_dir, options, cancel, send, lock, writer, loop):
+        async def send_status(message):
+            try:
+                await send({"type": "status", "app": app_id, "message": message})
+            except (ConnectionError, OSError):
+                pass  # the connection is going away; the shard is cancelled with it
+
+        def status(message):
+            loop.call_soon_threadsafe(asyncio.ensure_future, send_status(message))
+
+        build = loop.run_in_executor(self._executor, self._build, data, shard_dir, options, status, cancel)
+        try:
+            spec, result = await asyncio.shield(build)
+        except asyncio.CancelledError:
+            cancel.cancel()
+            await asyncio.gather(build, return_exceptions=True)
+            raise
+
+        dist_dir = os.path.join(shard_dir, spec.safe_name, "dist") if spec.safe_name else None
+        async with lock:
+            exe = None
+            if result.ok:
+                from artifact_store import launcher_files
+                for path in launcher_files(spec, result.exe_path):
+                    await send_file_frame(writer, {"type": "file", "app": app_id,
+                                                   "path": os.path.relpath(path, dist_dir)}, path)
+                exe = os.path.relpath(result.exe_path, dist_dir)
+            log_path = os.path.join(dist_dir, build_engine.LOG_FILE) if dist_dir else None
+            if log_path and os.path.exists(log_path):
+                await send_file_frame(writer, {"type": "file", "app": app_id, "path": build_engine.LOG_FILE},
+                                      log_path)
+            await send_frame(writer, {"type": "result", "app": app_id, "result": result.to_dict(), "exe": exe})
+
+    def _build(self, data, shard_dir, options, status, cancel):
+        """Runs on a build thread. Returns (spec, BuildResult); failures are results too."""
+        spec = BuildSpec.from_dict(data)
+        try:
+            spec = spec.freeze()
+            return spec, build_engine.build_launcher(spec, shard_dir, status=status, options=options,
+                                                     cancel=cancel)
+        except BuildError as e:
+            return spec, BuildResult(spec.name, False, error=str(e), exit_code=e.exit_code)
+        except Exception as e:
+            return spec, BuildResult(spec.name, False, error=f"Unexpected error: {e}")
+
+
+def run_worker(output_root, make_options, host=DEFAULT_HOST, port=DEFAULT_WORKER_PORT, jobs=None):
+    """Run a build worker until interrupted (Ctrl+C)."""
+    worker = BuildWorker(output_root, make_options, jobs=jobs, host=host, port=port)
+
+    async def main():
+        await worker.start()
+        print(f"Build worker on {worker.host}:{worker.port} ({worker.jobs} concurrent, "
+              f"PyInstaller {worker.toolchain}, work in {output_root})", flush=True)
+        try:
+            await worker.server.serve_forever()
+        finally:
+            await worker.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Build worker stopped")
+    return 0
+
+
+# ---------- Coordinator ----------
+
+class WorkerLink:
+    """One worker as the coordinator sees it: address, what it reported and what it did."""
+
+    def __init__(self, address):
+        self.address = address
+        self.host = None
+        self.jobs = 1
+        self.toolchain = None
+        self.alive = False
+        self.gone = False  # connection failed or ended; set before its apps are swept
+        self.error = None
+        self.in_flight = {}  # app id -> QueuedApp
+        self.shards = 0
+        self.built = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def to_dict(self):
+        return {
+            "address": self.address,
+            "host": self.host,
+            "jobs": self.jobs,
+            "toolchain": self.toolchain,
+            "shards": self.shards,
+            "built": self.built,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "builds_per_min": round(self.built / self.seconds * 60, 1) if self.seconds else None,
+            "error": self.error,
+        }
+
+
+class QueuedApp:
+    def __init__(self, app_id, spec):
+        self.id = app_id
+        self.spec = spec
+        self.attempts = 0
+        self.tried = set()  # addresses of workers it was lost on
+
+
+def parse_address(address, default_port=DEFAULT_WORKER_PORT):
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+    try:
+        return host.strip("[]"), int(port)
+    except ValueError:
+        raise BuildError(f"Invalid worker address: {address}")
+
+
+class Coordinator:
+    """
+    Builds specs on the workers at `addresses` into output_root. on_result is
+    called with each BuildResult as it arrives (results built remotely carry
+    the worker's address in result.worker), on_status with (app name, message) for status lines.
+    """
+
+    def __init__(self, specs, output_root, addresses, mode="standard", optimize="default", shard_size=None,
+                 retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT, store=True, on_result=None, on_status=None):
+        self.specs = specs
+        self.output_root = output_root
+        self.links = [WorkerLink(address) for address in addresses]
+        self.mode = mode
+        self.optimize = optimize
+        self.shard_size = shard_size
+        self.retries = retries
+        self.timeout = timeout
+        self.store = store
+        self.on_result = on_result
+        self.on_status = on_status
+        self.results = [None] * len(specs)
+        self.queue = collections.deque()
+        self.retried = 0
+        self.seconds = 0.0
+        self._shard_ids = 0
+        self._wakeup = None
+
+    @property
+    def unresolved(self):
+        return sum(1 for r in self.results if r is None)
+
+    def run(self):
+        """Build everything; returns the results in manifest order."""
+        start = time.monotonic()
+        asyncio.run(self._run())
+        self.seconds = time.monotonic() - start
+        return self.results
+
+    def summary(self):
+        built = sum(1 for r in self.results if r is not None and r.ok)
+        return {
+            "built": built,
+            "failed": len(self.results) - built,
+            "seconds": round(self.seconds, 3),
+            "builds_per_min": round(built / self.seconds * 60, 1) if self.seconds else None,
+            "bytes": sum(link.bytes for link in self.links),
+            "retried": self.retried,
+            "workers": [link.to_dict() for link in self.links],
+        }
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        seen = {}
+        for index, spec in enumerate(self.specs):
+            # Validate here (the icon check included) so broken entries never travel
+            error = None
+            try:
+                spec.validate()
+            except BuildError as e:
+                error = str(e)
+            if error is None and not spec.safe_name:
+                error = "App name must contain at least one letter or digit"
+            if error is None and spec.safe_name in seen:
+                error = f"Output folder '{spec.safe_name}' already used by '{seen[spec.safe_name]}'"
+            if error is not None:
+                self._resolve(index, BuildResult(spec.name, False, error=error))
+            else:
+                seen[spec.safe_name] = spec.name
+                self.queue.append(QueuedApp(index, spec))
+        if self.queue:
+            await asyncio.gather(*(self._serve(link) for link in self.links))
+        for item in list(self.queue):
+            self._fail(item, "No worker left to build it" + self._lost_note(item))
+
+    def _wake(self):
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def _resolve(self, index, result):
+        self.results[index] = result
+        if self.on_result:
+            self.on_result(result)
+
+    def _fail(self, item, error):
+        if item in self.queue:
+            self.queue.remove(item)
+        self._resolve(item.id, BuildResult(item.spec.name, False, error=error))
+
+    def _lost_note(self, item):
+        return f" (lost on {', '.join(sorted(item.tried))})" if item.tried else ""
+
+    def _take(self, link):
+        """Up to one shard of queued apps this worker hasn't already lost, shrinking near the end."""
+        alive = sum(1 for other in self.links if other.alive) or 1
+        size = max(1, min(self.shard_size or link.jobs, math.ceil(len(self.queue) / alive)))
+        shard = []
+        for item in list(self.queue):
+            if len(shard) >= size:
+                break
+            if link.address not in item.tried:
+                self.queue.remove(item)
+                shard.append(item)
+        return shard
+
+    def _sweep(self):
+        """Fail queued apps that no remaining (or still connecting) worker can take."""
+        remaining = {link.address for link in self.links if not link.gone}
+        for item in list(self.queue):
+            if not remaining - item.tried:
+                self._fail(item, "No other worker left to build it" + self._lost_note(item))
+
+    async def _serve(self, link):
+        host, port = parse_address(link.address)
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            link.error = f"Could not connect: {e or 'timed out'}"
+            link.gone = True
+            self._sweep()
+            self._wake()
+            return
+        receiver = None
+        try:
+            await send_frame(writer, {"type": "hello", "protocol": PROTOCOL_VERSION})
+            hello, _ = await read_message(reader, self.timeout)
+            if hello["type"] != "hello" or hello.get("protocol") != PROTOCOL_VERSION:
+                raise ProtocolError(hello.get("message") or f"Worker speaks protocol {hello.get('protocol')}")
+            link.host = hello.get("host")
+            link.jobs = max(1, int(hello.get("jobs") or 1))
+            link.toolchain = hello.get("toolchain")
+            link.alive = True
+            link.started = time.monotonic()
+
+            receiver = asyncio.create_task(self._receive(link, reader))
+            while self.unresolved and not receiver.done():
+                wakeup = self._wakeup
+                window = 2 * max(link.jobs, self.shard_size or 1)
+                while len(link.in_flight) < window:
+                    shard = self._take(link)
+                    if not shard:
+                        break
+                    await self._send_shard(link, writer, shard)
+                waiter = asyncio.ensure_future(wakeup.wait())
+                await asyncio.wait([receiver, waiter], return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+            if receiver.done():
+                receiver.result()  # raises what ended the connection
+        except asyncio.IncompleteReadError:
+            link.error = "Connection closed by the worker"
+        except asyncio.TimeoutError:
+            link.error = f"No word from the worker for {self.timeout:g}s"
+        except (ProtocolError, ConnectionError, OSError) as e:
+            link.error = str(e) or type(e).__name__
+        finally:
+            link.alive = False
+            link.gone = True
+            link.finished = time.monotonic() if link.started is not None else None
+            # Closing the connection ends a pending read; cancelling alone isn't
+            # enough, as wait_for() drops a cancel that races a finished read
+            writer.close()
+            while receiver is not None and not receiver.done():
+                receiver.cancel()
+                await asyncio.wait([receiver], timeout=0.1)
+            if receiver is not None and not receiver.cancelled():
+                receiver.exception()  # retrieved; it was already reported through link.error
+            self._requeue(link)
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._sweep()
+            self._wake()
+
+    def _requeue(self, link):
+        """Put the apps a dropped worker still had back in the queue (front), or fail them."""
+        lost = list(link.in_flight.values())
+        link.in_flight.clear()
+        for item in lost:
+            self._discard_incoming(item)
+        for item in reversed(lost):
+            item.attempts += 1
+            item.tried.add(link.address)
+            if item.attempts > self.retries:
+                self._fail(item, f"Worker {link.address} dropped out ({link.error}) and "
+                                 f"the retries ran out" + self._lost_note(item))
+            else:
+                self.retried += 1
+                self.queue.appendleft(item)
+
+    async def _send_shard(self, link, writer, shard):
+        self._shard_ids += 1
+        apps = []
+        icons = []
+        for item in shard:
+            icon = b""
+            if item.spec.icon:
+                with open(item.spec.icon, "rb") as f:
+                    icon = f.read()
+            apps.append({"id": item.id, "spec": item.spec.to_dict(), "icon_size": len(icon)})
+            icons.append(icon)
+            link.in_flight[item.id] = item
+        await send_frame(writer, {"type": "shard", "shard": self._shard_ids, "mode": self.mode,
+                                  "optimize": self.optimize, "apps": apps}, b"".join(icons))
+
+    def _incoming_dir(self, item):
+        return os.path.join(self.output_root, item.spec.safe_name, "dist.incoming")
+
+    def _discard_incoming(self, item):
+        shutil.rmtree(self._incoming_dir(item), ignore_errors=True)
+
+    async def _receive(self, link, reader):
+        loop = asyncio.get_running_loop()
+        while True:
+            header = await read_header(reader, self.timeout)
+            kind = header["type"]
+            item = link.in_flight.get(header.get("app"))
+            if kind in ("status", "file", "result") and item is None:
+                raise ProtocolError(f"{kind} for an app this worker wasn't given: {header.get('app')!r}")
+            if kind == "file":
+                path = os.path.join(self._incoming_dir(item), safe_relpath(header.get("path")))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                await save_payload(reader, header, path, self.timeout)
+                link.bytes += header["size"]
+                continue
+            payload = await read_payload(reader, header, self.timeout)
+            if kind == "ping":
+                continue
+            elif kind == "status":
+                if self.on_status:
+                    self.on_status(item.spec.name, str(header.get("message")))
+            elif kind == "result":
+                result = await loop.run_in_executor(None, self._finish, link, item, header)
+                del link.in_flight[item.id]
+                if result.ok:
+                    link.built += 1
+                else:
+                    link.failed += 1
+                self._resolve(item.id, result)
+                self._wake()
+            elif kind == "shard_done":
+                link.shards += 1
+            elif kind == "error":
+                raise ProtocolError(f"Worker error: {header.get('message')}")
+            else:
+                raise ProtocolError(f"Unexpected message: {kind} ({len(payload)} bytes)")
+
+    def _finish(self, link, item, header):
+        """Move an app's received files into its dist folder and register the launcher (build thread)."""
+        spec = item.spec
+        dist_dir = os.path.join(self.output_root, spec.safe_name, "dist")
+        incoming = self._incoming_dir(item)
+        os.makedirs(dist_dir, exist_ok=True)
+        if os.path.isdir(incoming):
+            for name in os.listdir(incoming):
+                dest = os.path.join(dist_dir, name)
+                if os.path.isdir(dest) and not os.path.islink(dest):
+                    shutil.rmtree(dest)
+                os.replace(os.path.join(incoming, name), dest)
+            shutil.rmtree(incoming, ignore_errors=True)
+
+        data = header.get("result") or {}
+        exe_path = os.path.join(dist_dir, safe_relpath(header["exe"])) if header.get("exe") else None
+        log_path = os.path.join(dist_dir, build_engine.LOG_FILE)
+        result = result_from_dict(data, exe_path, log_path if os.path.exists(log_path) else None)
+        result.name = spec.name
+        result.worker = link.address
+        if result.ok and (exe_path is None or not os.path.exists(exe_path)):
+            result.ok = False
+            result.exe_path = None
+            result.error = f"Worker {link.address} reported success but sent no launcher"
+        if result.ok and self.store:
+            import sqlite3
+            from artifact_store import ArtifactStore
+            try:
+                result.dedup_saved = ArtifactStore(os.path.join(self.output_root, build_engine.STORE_FOLDER)).add(
+                    spec, result, mode=self.mode, optimize=self.optimize, toolchain=link.toolchain)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Could not add launcher to artifact store: {e}")
+        return result
+
+
+# ---------- Local workers ----------
+
+def worker_command(args=()):
+    """Command line that starts a worker with this builder (script or frozen exe)."""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, "worker"] + list(args)
+    return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "builder_cli.py"),
+            "worker"] + list(args)
+
+
+def start_local_workers(count, jobs=None, args=(), startup_timeout=30.0):
+    """
+    Start count worker processes on 127.0.0.1 (free ports, each in its own
+    temp folder). Returns (processes, addresses); stop them with
+    stop_local_workers(processes).
+    """
+    processes = []
+    addresses = []
+    try:
+        for _ in range(count):
+            work_dir = tempfile.mkdtemp(prefix="webapp-worker-")
+            cmd = worker_command(["--host", DEFAULT_HOST, "--port", "0", "-o", work_dir] +
+                                 (["-j", str(jobs)] if jobs else []) + list(args))
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                    encoding="utf-8", errors="replace")
+            proc.work_dir = work_dir
+            processes.append(proc)
+        announcements = [_read_output(proc) for proc in processes]
+        deadline = time.monotonic() + startup_timeout
+        for announced in announcements:
+            # The first line announces the address (or says why it couldn't start)
+            try:
+                line = announced.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise BuildError(f"Local worker did not start: nothing printed within {startup_timeout:g}s")
+            match = LISTENING_LINE.match(line)
+            if not match:
+                raise BuildError(f"Local worker did not start: {line.strip() or 'no output'}")
+            addresses.append(f"{match.group(1)}:{match.group(2)}")
+    except BaseException:
+        stop_local_workers(processes)
+        raise
+    return processes, addresses
+
+
+def _read_output(proc):
+    """
+    Read a worker's output on a thread: the first line goes into the
+    returned queue, the rest is dropped, so a chatty worker never blocks on
+    a full pipe.
+    """
+    import threading
+
+    announced = queue.Queue()
+
+    def read():
+        announced.put(proc.stdout.readline())
+        collections.deque(proc.stdout, 0)
+
+    threading.Thread(target=read, daemon=True).start()
+    return announced
+
+
+def stop_local_workers(processes):
+    for proc in processes:
+        if proc.poll() is None:
+            proc.terminate()
+    for proc in processes:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        shutil.rmtree(proc.work_dir, ignore_errors=True)
@@ -0,0 +1,1226 @@
+"""
+Headless build pipeline for web app launchers.
+
+This module holds everything needed to turn an app spec into a launcher exe
+(icon -> launcher script -> PyInstaller -> cleanup) without touching tkinter,
+so it can be shared by the GUI in app_builder.py and the command line
+(`python app_builder.py build manifest.json`).
+"""
+import os
+import re
+import copy
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import threading
+import subprocess
+import importlib.util
+
+from icon_pipeline import IconError, convert_png_to_ico
+from icon_format import IconFormatError, inspect_icon
+from build_log import BuildLog, PhaseTracker
+from build_trace import TRACE_FILE, StageTimer, append_record, make_record
+from workspace import publish
+from launcher_size import SizeError, format_breakdown, missing_required, required_modules, size_breakdown
+from artifact_store import STORE_FOLDER, ArtifactStore, launcher_files, unlink_shared
+
+DEFAULT_WIDTH = 1200
+DEFAULT_HEIGHT = 800
+
+# Every launcher is built from this template plus a bundled config file
+LAUNCHER_TEMPLATE = "main_edge.py"
+CONFIG_FILE = "app_config.json"
+
+# Custom browser flags: --name or --name=value, no quotes or line breaks
+BROWSER_FLAG_PATTERN = re.compile(r'^--[a-z0-9][a-z0-9-]*(=[^"\r\n]*)?$')
+
+# App names become file and folder names (the exe, the dist folder, zips):
+# no path separators, parent references, drive colons or control characters
+UNSAFE_NAME_PATTERN = re.compile(r'[\\/:*?"<>|\x00-\x1f\x7f]|\.\.')
+
+# Switches the launcher writes itself (from the app settings)
+RESERVED_FLAGS = ("--app", "--window-name", "--window-size", "--user-data-dir",
+                  "--disk-cache-dir", "--disk-cache-size")
+
+# Switches that would expose the signed-in session or turn off protections
+UNSAFE_FLAGS = ("--remote-debugging-port", "--remote-debugging-pipe", "--remote-debugging-address",
+                "--remote-allow-origins", "--disable-web-security", "--no-sandbox",
+                "--ignore-certificate-errors", "--allow-running-insecure-content",
+                "--load-extension", "--disable-site-isolation-trials")
+
+# How a launcher is packaged: one self-extracting exe, an exe in a folder
+# (no unpacking at startup), or a VBScript stub that starts the browser directly
+PACKAGING_MODES = ("onefile", "onedir", "stub")
+
+# Build output is spooled here (in the dist folder, next to the exe)
+LOG_FILE = "build.log"
+
+# Log lines included in the error message when PyInstaller fails
+ERROR_TAIL_LINES = 25
+
+
+class BuildError(Exception):
+    """Raised when a launcher cannot be built."""
+
+    def __init__(self, message, exit_code=None):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+# ---------- Specs ----------
+
+class BuildSpec:
+    """
+    Settings for a single launcher build (one app).
+
+    A spec is mutable until freeze(), which returns a validated read-only
+    copy that can be handed to worker threads.
+    """
+
+    FIELDS = ("name", "url", "icon", "width", "height", "frameless", "shortcut", "packaging",
+              "browsers", "browser_path", "single_instance", "profile", "profile_dir",
+              "cache_size_mb", "cache_dir", "presets", "flags", "telemetry")
+    __slots__ = FIELDS + ("frozen",)
+
+    def __init__(self, name, url, icon="", width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT,
+                 frameless=False, shortcut=True, packaging="onefile", browsers=None, browser_path="",
+                 single_instance=False, profile=False, profile_dir="", cache_size_mb=None, cache_dir="",
+                 presets=None, flags=None, telemetry=False):
+        self.frozen = False
+        self.name = (name or "").strip()
+        self.url = (url or "").strip()
+        self.icon = icon or ""
+        self.width = width
+        self.height = height
+        self.frameless = bool(frameless)
+        self.shortcut = bool(shortcut)
+        self.packaging = packaging or "onefile"
+        # Browser preference (channel names, None for the launcher default) and custom exe
+        if isinstance(browsers, str):
+            browsers = [browsers]
+        self.browsers = list(browsers) if browsers else None
+        self.browser_path = (browser_path or "").strip()
+        self.single_instance = bool(single_instance)
+        # Dedicated browser profile (a custom folder implies one, and so does single-instance
+        # mode: it follows the browser process it started, which a shared profile hands off)
+        self.profile_dir = (profile_dir or "").strip()
+        self.profile = bool(profile) or bool(self.profile_dir) or self.single_instance
+        self.cache_size_mb = cache_size_mb if cache_size_mb not in ("", None) else None
+        self.cache_dir = (cache_dir or "").strip()
+        # Browser switch presets (main_edge.FLAG_PRESETS) and custom switches
+        if isinstance(presets, str):
+            presets = [presets]
+        self.presets = [p for p in presets if p] if presets else []
+        if isinstance(flags, str):
+            flags = flags.split()
+        self.flags = [f.strip() for f in flags if f.strip()] if flags else []
+        # Opt-in launch timings in a local log on each user's machine (main_edge.TELEMETRY)
+        self.telemetry = bool(telemetry)
+
+    @classmethod
+    def from_dict(cls, data, base_dir=None):
+        """Create a spec from a manifest entry. Relative icon paths are resolved against base_dir."""
+        icon = data.get("icon") or ""
+        if icon and base_dir and not os.path.isabs(icon):
+            icon = os.path.normpath(os.path.join(base_dir, icon))
+        return cls(
+            name=data.get("name", ""),
+            url=data.get("url", ""),
+            icon=icon,
+            width=data.get("width", DEFAULT_WIDTH),
+            height=data.get("height", DEFAULT_HEIGHT),
+            frameless=data.get("frameless", False),
+            shortcut=data.get("shortcut", True),
+            packaging=data.get("packaging", "onefile"),
+            browsers=data.get("browsers"),
+            browser_path=data.get("browser_path", ""),
+            single_instance=data.get("single_instance", False),
+            profile=data.get("profile", False),
+            profile_dir=data.get("profile_dir", ""),
+            cache_size_mb=data.get("cache_size_mb"),
+            cache_dir=data.get("cache_dir", ""),
+            presets=data.get("presets"),
+            flags=data.get("flags"),
+            telemetry=data.get("telemetry", False),
+        )
+
+    def __setattr__(self, name, value):
+        if getattr(self, "frozen", False):
+            raise AttributeError(f"Build spec '{self.name}' is frozen")
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def freeze(self):
+        """Validate and return a read-only copy (lists become tuples). Raises BuildError."""
+        if self.frozen:
+            return self
+        spec = copy.copy(self)
+        spec.validate()
+        for name in ("browsers", "presets", "flags"):
+            value = getattr(spec, name)
+            if value is not None:
+                setattr(spec, name, tuple(value))
+        spec.frozen = True
+        return spec
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "url": self.url,
+            "icon": self.icon,
+            "width": self.width,
+            "height": self.height,
+            "frameless": self.frameless,
+            "shortcut": self.shortcut,
+            "packaging": self.packaging,
+            "browsers": self.browsers,
+            "browser_path": self.browser_path,
+            "single_instance": self.single_instance,
+            "profile": self.profile,
+            "profile_dir": self.profile_dir,
+            "cache_size_mb": self.cache_size_mb,
+            "cache_dir": self.cache_dir,
+            "presets": self.presets,
+            "flags": self.flags,
+            "telemetry": self.telemetry,
+        }
+
+    @property
+    def safe_name(self):
+        return get_safe_filename(self.name)
+
+    def validate(self):
+        """
+        Check the spec, fill in the default icon and normalise numbers (a frozen
+        spec is only checked). Raises BuildError with a user-facing message.
+        """
+        if not self.name:
+            raise BuildError("Please enter an app name")
+
+        if UNSAFE_NAME_PATTERN.search(self.name):
+            raise BuildError('App name cannot contain \\ / : * ? " < > |, ".." or control characters')
+
+        if not self.url:
+            raise BuildError("Please enter a web URL")
+
+        if not self.url.startswith(('http://', 'https://')):
+            raise BuildError("URL must start with http:// or https://")
+
+        # If no icon specified, use default app_icon.ico
+        icon = self.icon
+        if not icon:
+            icon = get_bundled_icon_path()
+            if not os.path.exists(icon):
+                raise BuildError("Please select an icon file or ensure app_icon.ico exists")
+
+        if not os.path.exists(icon):
+            raise BuildError("Icon file not found")
+
+        # Headers only: rejects broken or oversized icons before PyInstaller runs
+        try:
+            icon_info = inspect_icon(icon)
+        except IconFormatError as e:
+            raise BuildError(f"Icon file is not usable: {e}")
+        if icon_info.kind != ("png" if icon.lower().endswith('.png') else "ico"):
+            raise BuildError(f"Icon file is not usable: {os.path.basename(icon)} holds a {icon_info.kind.upper()} image")
+        if icon_info.kind == "png" and not icon_info.frames[0].ico_ready and not pil_available():
+            raise BuildError(
+                "Converting this PNG requires Pillow library.\n\n"
+                "Install with: pip install Pillow\n\n"
+                "Or use an .ico file, or a square PNG of at most 256x256 pixels."
+            )
+
+        try:
+            width = int(self.width)
+            height = int(self.height)
+            if width < 100 or height < 100:
+                raise ValueError()
+        except (TypeError, ValueError):
+            raise BuildError("Window size must be valid numbers (min 100x100)")
+
+        if self.packaging not in PACKAGING_MODES:
+            raise BuildError(f"Packaging must be one of: {', '.join(PACKAGING_MODES)}")
+
+        cache_size_mb = self.cache_size_mb
+        if cache_size_mb is not None:
+            try:
+                cache_size_mb = int(cache_size_mb)
+                if cache_size_mb < 0:
+                    raise ValueError()
+            except (TypeError, ValueError):
+                raise BuildError("Disk cache size must be a number of MB (0 for the browser default)")
+            cache_size_mb = cache_size_mb or None
+
+        from main_edge import FLAG_PRESETS
+        unknown = [p for p in self.presets if p not in FLAG_PRESETS]
+        if unknown:
+            raise BuildError(f"Unknown flag preset '{unknown[0]}' (choose from: {', '.join(FLAG_PRESETS)})")
+        for flag in self.flags:
+            check_browser_flag(flag)
+
+        if self.single_instance and self.packaging == "stub":
+            raise BuildError("Single-instance mode needs an exe launcher (onefile or onedir packaging)")
+        if self.telemetry and self.packaging == "stub":
+            raise BuildError("Launch telemetry needs an exe launcher (onefile or onedir packaging)")
+
+        if self.browsers is not None:
+            from main_edge import BROWSER_CHANNELS, CUSTOM_BROWSER
+            known = list(BROWSER_CHANNELS) + [CUSTOM_BROWSER]
+            unknown = [b for b in self.browsers if b not in known]
+            if unknown:
+                raise BuildError(f"Unknown browser '{unknown[0]}' (choose from: {', '.join(known)})")
+            if CUSTOM_BROWSER in self.browsers and not self.browser_path:
+                raise BuildError("Browser list includes 'custom' but no browser_path is set")
+
+        # Already normalised if frozen, so this only writes to mutable specs
+        for name, value in (("icon", icon), ("width", width), ("height", height),
+                            ("cache_size_mb", cache_size_mb)):
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+
+
+def check_browser_flag(flag):
+    """Raise BuildError unless flag is a well-formed switch the launcher may pass on."""
+    if not BROWSER_FLAG_PATTERN.match(flag):
+        raise BuildError(f"Invalid browser flag '{flag}' (expected --name or --name=value)")
+    switch = flag.split("=", 1)[0]
+    if switch in RESERVED_FLAGS:
+        raise BuildError(f"Browser flag '{switch}' is set by the launcher; use the app settings instead")
+    if switch in UNSAFE_FLAGS:
+        raise BuildError(f"Browser flag '{switch}' weakens browser security and is not allowed")
+
+
+class BuildResult:
+    """Outcome of one build, as reported in batch summaries."""
+
+    def __init__(self, name, ok, exe_path=None, error=None, exit_code=None, seconds=0.0,
+                 cached=None):
+        self.name = name
+        self.ok = ok
+        self.exe_path = exe_path
+        self.error = error
+        self.exit_code = exit_code
+        self.seconds = seconds
+        # True/False for a build cache hit/miss, None when the cache is disabled
+        self.cached = cached
+        # PNG icon conversion: cache hit/miss (None for .ico or no cache) and time spent
+        self.icon_cached = None
+        self.icon_seconds = 0.0
+        # Seconds spent in each PyInstaller phase (empty if PyInstaller didn't run)
+        self.phase_times = {}
+        self.log_path = None
+        # How the launcher got from the scratch workspace to dist: "rename" or "copy"
+        self.publish = None
+        # Bytes per part of the launcher (launcher_size.size_breakdown), None for script launchers
+        self.sizes = None
+        # Bytes now shared with launchers already in the artifact store (None if it is off)
+        self.dedup_saved = None
+
+    @property
+    def cache_status(self):
+        if self.cached is None:
+            return None
+        return "hit" if self.cached else "miss"
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "status": "ok" if self.ok else "failed",
+            "exit_code": self.exit_code,
+            "seconds": round(self.seconds, 3),
+            "exe_path": self.exe_path,
+            "error": self.error,
+            "cache": self.cache_status,
+            "icon_cache": None if self.icon_cached is None else ("hit" if self.icon_cached else "miss"),
+            "icon_seconds": round(self.icon_seconds, 3),
+            "phases": {phase: round(t, 3) for phase, t in self.phase_times.items()},
+            "log": self.log_path,
+            "sizes": self.sizes,
+            "dedup_saved": self.dedup_saved,
+        }
+
+
+def load_manifest(path):
+    """
+    Load app specs from a JSON or TOML manifest.
+
+    The manifest is either a list of apps or a table with an "apps" list and
+    optional "defaults" applied to every app. Icon paths are relative to the
+    manifest file.
+    """
+    if path.lower().endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise BuildError("TOML manifests require Python 3.11+ or the tomli package")
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    if isinstance(data, list):
+        apps, defaults = data, {}
+    else:
+        apps, defaults = data.get("apps", []), data.get("defaults", {})
+
+    if not apps:
+        raise BuildError(f"No apps found in manifest: {path}")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return [BuildSpec.from_dict(dict(defaults, **app), base_dir) for app in apps]
+
+
+# ---------- Helpers ----------
+
+def get_bundled_path(filename):
+    """Get path to a file bundled with the builder, works for both dev and PyInstaller exe"""
+    if getattr(sys, 'frozen', False):
+        # Running as PyInstaller exe
+        base_path = sys._MEIPASS
+    else:
+        # Running as script
+        base_path = os.path.dirname(os.path.abspath(__file__))
+
+    return os.path.join(base_path, filename)
+
+
+def get_bundled_icon_path():
+    """Get path to bundled default icon, works for both dev and PyInstaller exe"""
+    return get_bundled_path("app_icon.ico")
+
+
+def pil_available():
+    """Whether Pillow is installed; found without importing it (PNG conversion imports it)"""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def get_safe_filename(name):
+    """Convert app name to safe filename (no spaces, special chars)"""
+    # Remove or replace special characters
+    safe_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '' for c in name)
+    # Replace spaces with underscores
+    safe_name = safe_name.replace(' ', '_')
+    # Remove multiple underscores
+    while '__' in safe_name:
+        safe_name = safe_name.replace('__', '_')
+    return safe_name.strip('_')
+
+
+def default_jobs():
+    """Number of parallel builds to run by default (one per core)."""
+    return max(1, os.cpu_count() or 1)
+
+
+def read_launcher_template():
+    """Return the source of the launcher template (main_edge.py)"""
+    with open(get_bundled_path(LAUNCHER_TEMPLATE), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def render_app_config(spec):
+    """Render the app_config.json bundled into the launcher (read by main_edge.load_config)"""
+    config = {
+        "APP_NAME": spec.name,
+        "APP_URL": spec.url,
+        "APP_ID": f"WebApp.{spec.name.replace(' ', '')}.1.0",
+        "WINDOW_WIDTH": int(spec.width),
+        "WINDOW_HEIGHT": int(spec.height),
+        "WINDOW_FRAMELESS": spec.frameless,
+        "CREATE_SHORTCUT": spec.shortcut,
+    }
+    # Only written when set, so the launcher's defaults apply otherwise
+    if spec.browsers:
+        config["BROWSER_PREFERENCE"] = spec.browsers
+    if spec.browser_path:
+        config["BROWSER_PATH"] = spec.browser_path
+    if spec.single_instance:
+        config["SINGLE_INSTANCE"] = True
+    if spec.profile:
+        config["APP_PROFILE"] = True
+    if spec.profile_dir:
+        config["PROFILE_DIR"] = spec.profile_dir
+    if spec.cache_size_mb:
+        config["DISK_CACHE_MB"] = int(spec.cache_size_mb)
+    if spec.cache_dir:
+        config["DISK_CACHE_DIR"] = spec.cache_dir
+    if spec.presets:
+        config["BROWSER_PRESETS"] = spec.presets
+    if spec.flags:
+        config["BROWSER_FLAGS"] = spec.flags
+    if spec.telemetry:
+        config["TELEMETRY"] = True
+    return json.dumps(config, indent=2, sort_keys=True)
+
+
+def generate_main_script(spec, output_dir, template_source=None):
+    """
+    Write the launcher script (the main_edge.py template) and the app's
+    app_config.json into output_dir. Returns the script path.
+    """
+    if template_source is None:
+        template_source = read_launcher_template()
+
+    script_path = os.path.join(output_dir, "app_launcher.py")
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(template_source)
+
+    config_path = os.path.join(output_dir, CONFIG_FILE)
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(render_app_config(spec))
+
+    return script_path
+
+
+def launcher_path(spec, output_dir):
+    """Where the launcher for spec ends up, depending on its packaging."""
+    dist_dir = os.path.join(output_dir, "dist")
+    if spec.packaging == "onedir":
+        return os.path.join(dist_dir, spec.name, f"{spec.name}.exe")
+    if spec.packaging == "stub":
+        return os.path.join(dist_dir, f"{spec.name}.vbs")
+    return os.path.join(dist_dir, f"{spec.name}.exe")
+
+
+def launcher_entries(spec):
+    """Names in the dist folder that make up the launcher (besides a plain exe)."""
+    if spec.packaging == "onedir":
+        return (spec.name,)
+    if spec.packaging == "stub":
+        return (f"{spec.name}.vbs", f"{spec.name}.ico", f"{spec.name}.lnk")
+    return ()
+
+
+def launcher_sizes(spec, exe_path):
+    """Size breakdown of a built launcher (None for script launchers or an unreadable exe)."""
+    if spec.packaging == "stub":
+        return None
+    folder = os.path.dirname(exe_path) if spec.packaging == "onedir" else None
+    try:
+        return size_breakdown(exe_path, folder)
+    except (OSError, ValueError):
+        return None
+
+
+def discard_launcher(path, spec):
+    """Delete a launcher that must not be used (the whole folder for onedir)."""
+    try:
+        if spec.packaging == "onedir":
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def warn_path(work_dir, name):
+    """Where PyInstaller, run in work_dir, writes the warnings for a build named name."""
+    return os.path.join(work_dir, "build", name, f"warn-{name}.txt")
+
+
+def check_size_build(template_source, warn_file, script_path):
+    """
+    After a size-optimized build, raise BuildError if PyInstaller reports a
+    module the launcher needs as missing or excluded. Builds without a
+    warnings file are not checked.
+    """
+    if not os.path.exists(warn_file):
+        return
+    try:
+        problems = missing_required(warn_file, script_path, required_modules(template_source))
+    except OSError as e:
+        raise BuildError(f"Could not read PyInstaller warnings: {e}")
+    if problems:
+        raise BuildError("Size-optimized build is missing required module(s): " + ", ".join(problems)
+                         + f" (from {os.path.basename(warn_file)})")
+
+
+def remove_stale_launchers(spec, output_dir):
+    """Remove launchers left by an earlier build of this app with another packaging."""
+    current = launcher_path(spec, output_dir)
+    for packaging in PACKAGING_MODES:
+        other = BuildSpec(spec.name, spec.url, packaging=packaging)
+        path = launcher_path(other, output_dir)
+        if path == current:
+            continue
+        try:
+            if packaging == "onedir":
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+                if packaging == "stub":
+                    for ext in (".ico", ".lnk"):
+                        extra = os.path.splitext(path)[0] + ext
+                        if os.path.exists(extra):
+                            os.remove(extra)
+        except OSError:
+            pass
+
+
+def cleanup_output_folder(output_dir, keep=()):
+    """
+    Remove everything except exe and log files from output folder.
+    Names in keep (files or folders in dist) are kept as well.
+    """
+    try:
+        dist_dir = os.path.join(output_dir, "dist")
+        build_dir = os.path.join(output_dir, "build")
+
+        # Remove build directory entirely
+        if os.path.exists(build_dir):
+            shutil.rmtree(build_dir)
+
+        # Remove .spec file
+        for file in os.listdir(output_dir):
+            if file.endswith('.spec'):
+                os.remove(os.path.join(output_dir, file))
+
+        # Remove app_launcher.py, app_config.json and app_icon.ico from root output dir
+        launcher_path = os.path.join(output_dir, "app_launcher.py")
+        if os.path.exists(launcher_path):
+            os.remove(launcher_path)
+
+        config_path = os.path.join(output_dir, CONFIG_FILE)
+        if os.path.exists(config_path):
+            os.remove(config_path)
+
+        icon_path = os.path.join(output_dir, "app_icon.ico")
+        if os.path.exists(icon_path):
+            os.remove(icon_path)
+
+        # In dist folder, keep only .exe and .log files
+        if os.path.exists(dist_dir):
+            for file in os.listdir(dist_dir):
+                file_path = os.path.join(dist_dir, file)
+                if file in keep:
+                    continue
+                if os.path.isfile(file_path):
+                    # Keep only exe and log files
+                    if not (file.endswith('.exe') or file.endswith('.log')):
+                        os.remove(file_path)
+                elif os.path.isdir(file_path):
+                    # Remove any subdirectories
+                    shutil.rmtree(file_path)
+    except Exception as e:
+        print(f"Warning: Could not fully clean output folder: {e}")
+
+
+def _startupinfo():
+    """Hide the PyInstaller console window on Windows."""
+    if sys.platform != 'win32':
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
+
+
+class BuildCancel:
+    """
+    Lets another thread stop a build. cancel() kills the PyInstaller process
+    tree the build is running, if any; the build then raises BuildError.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._process = None
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._process is not None:
+                _kill_tree(self._process)
+
+    def check(self):
+        if self.cancelled:
+            raise BuildError("Build cancelled")
+
+    def attach(self, process):
+        with self._lock:
+            self._process = process
+            if self.cancelled and process is not None:
+                _kill_tree(process)
+
+
+def _kill_tree(process):
+    """Kill a process started with its own process group/session, and its children."""
+    if process.poll() is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           startupinfo=_startupinfo())
+        else:
+            import signal
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+
+def run_pyinstaller(cmd, cwd, log=None, on_progress=None, cancel=None):
+    """
+    Run PyInstaller, streaming its output line by line into log (a BuildLog)
+    and reporting phases to on_progress(phase, fraction, phase_elapsed).
+    cancel is an optional BuildCancel that can kill the run.
+    Returns (returncode, phase_times).
+    """
+    log = log if log is not None else BuildLog()
+    tracker = PhaseTracker(on_progress)
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        bufsize=1,
+        startupinfo=_startupinfo(),
+        # Own process group, so a cancel reaches PyInstaller's children too
+        start_new_session=cancel is not None and sys.platform != "win32",
+    )
+    if cancel is not None:
+        cancel.attach(process)
+    try:
+        with process:
+            for line in process.stdout:
+                log.write(line)
+                tracker.feed(line)
+            returncode = process.wait()
+    finally:
+        if cancel is not None:
+            cancel.attach(None)
+    tracker.finish()
+    if cancel is not None:
+        cancel.check()
+    return returncode, dict(tracker.phase_times)
+
+
+# ---------- Pipeline ----------
+
+BUILD_MODES = ("standard", "shared", "stamp")
+
+
+class BuildOptions:
+    """
+    Machine-level build settings shared by every app in a run.
+
+    cache is an optional BuildCache consulted before running PyInstaller.
+    shared_work is an optional SharedWorkspace that reuses PyInstaller's
+    analysis across apps ("shared" mode). stamper is an optional
+    LauncherStamper that copies a prebuilt stub instead of running
+    PyInstaller at all ("stamp" mode). icons is an optional IconPipeline
+    that caches PNG -> ICO conversions. scratch is an optional ScratchSpace
+    to build in instead of the output folder. size is an optional
+    launcher_size.SizeProfile for size-optimized builds. trace controls the
+    build trace: True appends to build_trace.jsonl in the output root, a path
+    appends there, False disables it. store works the same way for the
+    deduplicating artifact store and registry (artifact_store.py), which is
+    kept in .artifacts in the output root.
+    """
+
+    def __init__(self, cache=None, shared_work=None, stamper=None, icons=None, trace=True, scratch=None,
+                 size=None, store=False):
+        self.cache = cache
+        self.shared_work = shared_work
+        self.stamper = stamper
+        self.icons = icons
+        self.trace = trace
+        self.scratch = scratch
+        self.size = size
+        self.store = store
+
+    @classmethod
+    def for_mode(cls, mode="standard", use_cache=True, cache_dir=None, cache_size=None, slots=None,
+                 trace=True, scratch=True, scratch_dir=None, ram_scratch=False, optimize="default",
+                 compress=False, upx_dir=None, store=True):
+        """
+        Create the options for one of BUILD_MODES, keeping everything under one
+        cache folder. Builds run in a scratch folder (under scratch_dir, or a
+        RAM-backed temp folder with ram_scratch) unless scratch is False.
+        optimize is one of OPTIMIZE_PROFILES; compress runs UPX (from upx_dir
+        or PATH) over the launcher's binaries.
+        """
+        from build_cache import BuildCache, DEFAULT_MAX_BYTES
+        from analysis_cache import SharedWorkspace
+        from stamping import LauncherStamper
+        from icon_pipeline import IconPipeline
+        from workspace import ScratchSpace
+        from launcher_size import OPTIMIZE_PROFILES, SizeError, SizeProfile
+
+        if mode not in BUILD_MODES:
+            raise BuildError(f"Unknown build mode: {mode}")
+        if optimize not in OPTIMIZE_PROFILES:
+            raise BuildError(f"Unknown optimization profile: {optimize}")
+
+        if compress and optimize != "size":
+            raise BuildError("UPX compression is only available with the size profile")
+
+        options = cls(trace=trace, store=store)
+        if optimize == "size":
+            options.size = SizeProfile(compress=compress, upx_dir=upx_dir)
+            try:
+                options.size.check_upx()
+            except SizeError as e:
+                raise BuildError(str(e))
+        if scratch:
+            try:
+                options.scratch = ScratchSpace(scratch_dir, ram=ram_scratch)
+            except OSError as e:
+                raise BuildError(str(e))
+        if use_cache:
+            options.cache = BuildCache(cache_dir, max_bytes=cache_size or DEFAULT_MAX_BYTES)
+            options.icons = IconPipeline(os.path.join(cache_dir, "icons") if cache_dir else None)
+        if mode == "shared":
+            options.shared_work = SharedWorkspace(
+                os.path.join(cache_dir, "work") if cache_dir else None, slots=slots, size=options.size)
+        elif mode == "stamp":
+            options.stamper = LauncherStamper(os.path.join(cache_dir, "stubs") if cache_dir else None,
+                                              size=options.size)
+        return options
+
+    @property
+    def workspace(self):
+        """Where builds run: "scratch", "ram" or "in-place" (the output folder)."""
+        return self.scratch.kind if self.scratch is not None else "in-place"
+
+    @property
+    def optimize(self):
+        """The optimization profile: "size" or "default"."""
+        return "size" if self.size is not None else "default"
+
+    @property
+    def mode(self):
+        if self.stamper is not None:
+            return "stamp"
+        if self.shared_work is not None:
+            return "shared"
+        return "standard"
+
+    def toolchain(self):
+        for part in (self.cache, self.shared_work, self.stamper):
+            if part is not None:
+                return part.toolchain()
+        from build_cache import pyinstaller_version
+        return pyinstaller_version()
+
+    def trace_path(self, output_root):
+        if not self.trace:
+            return None
+        return os.path.join(output_root, TRACE_FILE) if self.trace is True else self.trace
+
+    def store_path(self, output_root):
+        if not self.store:
+            return None
+        return os.path.join(output_root, STORE_FOLDER) if self.store is True else self.store
+
+    def prepare(self):
+        """Probe the toolchain once (before forking workers, so they inherit the result)."""
+        for part in (self.cache, self.shared_work, self.stamper):
+            if part is not None:
+                part.toolchain()
+        if self.stamper is not None:
+            self.stamper.ensure_stub(read_launcher_template(), get_bundled_icon_path())
+
+
+def build_launcher(spec, output_root, status=None, options=None, progress=None, cancel=None):
+    """
+    Build one launcher exe into output_root/<safe_name>/dist.
+    status is an optional callable receiving progress messages, options a
+    BuildOptions (defaults to a standard build without cache), progress an
+    optional callable(phase, fraction, phase_elapsed) fed from PyInstaller's
+    output, cancel an optional BuildCancel. The build log is written to
+    dist/build.log and, unless disabled in options, a timing record is
+    appended to the build trace.
+    Returns a BuildResult; raises BuildError on failure.
+    """
+    options = options or BuildOptions()
+    timer = StageTimer()
+    result = None
+    output_dir = work_dir = log_path = None
+    try:
+        # Rejected specs are traced too (ok=False), so summaries count them
+        with timer.stage("validate"):
+            spec.validate()
+            safe_name = spec.safe_name
+            if not safe_name:
+                raise BuildError("App name must contain at least one letter or digit")
+
+        # Create output directory
+        output_dir = os.path.join(output_root, safe_name)
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Build inputs and PyInstaller's work files go to a scratch folder, if enabled
+        work_dir = output_dir
+        if options.scratch is not None:
+            work_dir = options.scratch.create(safe_name)
+
+        log_path = os.path.join(output_dir, "dist", LOG_FILE)
+        with BuildLog(log_path) as log:
+            result = _build_launcher(spec, output_dir, log, status, options, progress, timer, cancel,
+                                     work_dir)
+            store_path = options.store_path(output_root)
+            if store_path:
+                _store_launcher(store_path, spec, result, options, timer, log)
+        return result
+    except BuildError as e:
+        result = BuildResult(spec.name, False, error=str(e), exit_code=e.exit_code)
+        raise
+    finally:
+        trace_path = options.trace_path(output_root) if result is not None else None
+        if work_dir is not None and work_dir != output_dir:
+            _discard_scratch(work_dir, trace_path, spec, options, timer, result, log_path)
+        elif trace_path:
+            _append_trace(trace_path, _trace_record(spec, options, timer, result, log_path))
+
+
+def _store_launcher(store_path, spec, result, options, timer, log):
+    try:
+        with timer.stage("store"):
+            result.dedup_saved = ArtifactStore(store_path).add(
+                spec, result, mode=options.mode, optimize=options.optimize, toolchain=options.toolchain())
+        if result.dedup_saved:
+            log.note(f"Artifact store: {result.dedup_saved} bytes shared with earlier launchers")
+    except (OSError, sqlite3.Error) as e:
+        log.note(f"Warning: Could not add the launcher to the artifact store: {e}")
+        print(f"Warning: Could not add launcher to artifact store: {e}")
+
+
+def _discard_scratch(work_dir, trace_path, spec, options, timer, result, log_path):
+    """
+    Hand the scratch folder to the cleanup thread. The build's trace record is
+    appended once the folder is gone, with the deletion time as io_saved: the
+    cleanup an in-place build would have done before returning.
+    """
+    record = {}
+    ready = threading.Event()
+
+    def deleted(seconds):
+        ready.wait()
+        if record:
+            record["io_saved"] = {"cleanup": round(seconds, 4)}
+            _append_trace(trace_path, record)
+
+    try:
+        with timer.stage("cleanup"):
+            options.scratch.discard(work_dir, deleted if trace_path else None)
+        if trace_path:
+            record.update(_trace_record(spec, options, timer, result, log_path))
+    finally:
+        ready.set()
+
+
+def _append_trace(trace_path, record):
+    try:
+        append_record(trace_path, record)
+    except OSError as e:
+        print(f"Warning: Could not write build trace: {e}")
+
+
+def _trace_record(spec, options, timer, result, log_path):
+    return make_record(
+        spec.name, options.mode, timer, result.ok,
+        exe_path=result.exe_path,
+        icon_path=spec.icon,
+        log_path=log_path,
+        cache=result.cache_status,
+        icon_cache=None if result.icon_cached is None else ("hit" if result.icon_cached else "miss"),
+        phases=result.phase_times,
+        exit_code=result.exit_code,
+        error=result.error,
+        toolchain=options.toolchain(),
+        packaging=spec.packaging,
+        workspace=options.workspace,
+        publish=result.publish,
+        optimize=options.optimize,
+        parts=result.sizes,
+    )
+
+
+def _build_launcher(spec, output_dir, log, status, options, progress, timer, cancel=None, work_dir=None):
+    start = timer.started
+    work_dir = work_dir or output_dir
+    # The build cache, shared workspace and stamp stub all produce a single exe
+    onefile = spec.packaging == "onefile"
+    cache = options.cache if onefile else None
+    shared_work = options.shared_work if onefile else None
+    stamper = options.stamper if onefile else None
+
+    def report(message):
+        log.note(message)
+        if status:
+            status(message)
+
+    # Handle icon file - convert PNG to ICO if needed
+    icon_dest = os.path.join(work_dir, "app_icon.ico")
+    icon_cached, icon_seconds = None, 0.0
+    if spec.icon.lower().endswith('.png'):
+        report("Converting PNG to ICO...")
+        try:
+            with timer.stage("icon"):
+                if options.icons is not None:
+                    icon_cached, icon_seconds = options.icons.convert(spec.icon, icon_dest)
+                else:
+                    icon_start = time.monotonic()
+                    convert_png_to_ico(spec.icon, icon_dest)
+                    icon_seconds = time.monotonic() - icon_start
+        except IconError as e:
+            raise BuildError(str(e))
+    else:
+        # Just copy ICO file
+        with timer.stage("icon"):
+            shutil.copy2(spec.icon, icon_dest)
+
+    def finish(cached=None, phase_times=None, published=None):
+        result = BuildResult(spec.name, True, exe_path=exe_path, exit_code=0,
+                             seconds=time.monotonic() - start, cached=cached)
+        result.icon_cached = icon_cached
+        result.icon_seconds = icon_seconds
+        result.phase_times = phase_times or {}
+        result.log_path = log.path
+        result.publish = published
+        result.sizes = launcher_sizes(spec, exe_path)
+        log.note(f"Built {exe_path} in {result.seconds:.1f}s")
+        if result.sizes:
+            log.note(f"Launcher size: {format_breakdown(result.sizes)}")
+        return result
+
+    # Generate main script
+    with timer.stage("script"):
+        template_source = read_launcher_template()
+        script_path = generate_main_script(spec, work_dir, template_source)
+        if options.size is not None and spec.packaging != "stub":
+            try:
+                options.size.check_template(template_source)
+            except SizeError as e:
+                raise BuildError(str(e))
+    config_path = os.path.join(work_dir, CONFIG_FILE)
+    exe_path = launcher_path(spec, output_dir)
+    keep = launcher_entries(spec)
+    remove_stale_launchers(spec, output_dir)
+    if options.store and (work_dir == output_dir or spec.packaging == "stub"):
+        # This build writes the launcher in place: stop sharing it with the store first
+        unlink_shared(launcher_files(spec, exe_path))
+
+    def cleanup():
+        # Scratch builds leave nothing in the output folder; tidy up after
+        # in-place builds (and output folders from before scratch workspaces)
+        if work_dir == output_dir or os.path.exists(os.path.join(output_dir, "build")):
+            with timer.stage("cleanup"):
+                cleanup_output_folder(output_dir, keep)
+    if not onefile and options.mode != "standard":
+        log.note(f"{spec.packaging} packaging always runs a standard build (build mode '{options.mode}' ignored)")
+
+    if spec.packaging == "stub":
+        # Stub packaging: a script that starts the browser, no PyInstaller at all
+        from script_launcher import STUB_WARNING, write_script_launcher
+
+        log.note(f"Warning: {STUB_WARNING}")
+        report("Writing script launcher...")
+        with timer.stage("write_stub"):
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            os.makedirs(os.path.dirname(exe_path), exist_ok=True)
+            write_script_launcher(config, icon_dest, exe_path)
+
+        cleanup()
+        return finish()
+
+    if stamper is not None:
+        # Stamp mode: copy the generic stub and write this app's config into it
+        from stamping import StampError
+
+        try:
+            with timer.stage("stub"):
+                stub_path = stamper.ensure_stub(template_source, get_bundled_icon_path(), status=report)
+            report("Stamping launcher...")
+            with timer.stage("stamp"):
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config_json = f.read()
+                os.makedirs(os.path.dirname(exe_path), exist_ok=True)
+                stamper.stamp(stub_path, config_json, icon_dest, exe_path)
+        except StampError as e:
+            raise BuildError(f"Stamping failed: {e}")
+
+        cleanup()
+        return finish()
+
+    if shared_work is None:
+        cmd = [
+            "pyinstaller",
+            "--onefile" if onefile else "--onedir",
+            "--windowed",
+            f"--name={spec.name}",
+            f"--icon={icon_dest}",
+            f"--add-data={icon_dest}{os.pathsep}.",
+            f"--add-data={config_path}{os.pathsep}.",
+            "--clean",
+            script_path
+        ]
+        if not onefile:
+            # Replace the previous build's folder without prompting
+            cmd.insert(1, "--noconfirm")
+        if options.size is not None:
+            cmd[-1:-1] = options.size.cli_args()
+    else:
+        # The shared spec is fixed; its key identifies the command line
+        work_key = shared_work.key(template_source)
+        cmd = ["pyinstaller", f"<shared-workspace:{work_key}>", f"--name={spec.name}"]
+
+    # Identical inputs produce an identical exe - reuse it if we have one
+    cache_key = None
+    if cache is not None:
+        with timer.stage("cache_lookup"):
+            with open(config_path, 'r', encoding='utf-8') as f:
+                launcher_source = template_source + "\0" + f.read()
+            cache_key = cache.key(launcher_source, icon_dest, cmd, work_dir)
+            hit = cache.get(cache_key, exe_path)
+        if hit:
+            report("Using cached build...")
+            cleanup()
+            return finish(cached=True)
+
+    # Build with PyInstaller
+    if cancel is not None:
+        cancel.check()
+    report("Running PyInstaller...")
+
+    published = None
+    if shared_work is None:
+        log.note(" ".join(cmd))
+        with timer.stage("pyinstaller"):
+            returncode, phase_times = run_pyinstaller(cmd, work_dir, log, progress, cancel)
+        built_path = launcher_path(spec, work_dir)
+        if returncode == 0 and options.size is not None:
+            try:
+                check_size_build(template_source, warn_path(work_dir, spec.name), script_path)
+            except BuildError:
+                # Don't leave a launcher behind that would fail at startup
+                discard_launcher(built_path, spec)
+                raise
+        if returncode == 0 and work_dir != output_dir and os.path.exists(built_path):
+            # Move the finished launcher (the whole folder for onedir) into dist
+            with timer.stage("publish"):
+                if onefile:
+                    published = publish(built_path, exe_path, options.scratch)
+                else:
+                    published = publish(os.path.dirname(built_path), os.path.dirname(exe_path), options.scratch)
+    else:
+        with shared_work.acquire(work_key) as slot:
+            with timer.stage("pyinstaller"):
+                slot.prepare(template_source, config_path, icon_dest)
+                log.note(" ".join(slot.command()))
+                returncode, phase_times = run_pyinstaller(slot.command(), slot.path, log, progress, cancel)
+            if returncode == 0 and options.size is not None:
+                check_size_build(template_source, slot.warn_path, slot.script_path)
+            if returncode == 0 and os.path.exists(slot.exe_path):
+                with timer.stage("publish"):
+                    published = publish(slot.exe_path, exe_path)
+
+    if returncode != 0:
+        raise BuildError(
+            f"PyInstaller failed (exit code {returncode}). End of the build log:\n\n"
+            f"{log.tail(ERROR_TAIL_LINES)}\n\nFull log: {log.path}",
+            exit_code=returncode)
+
+    if not os.path.exists(exe_path):
+        raise BuildError(f"Executable not found after build\n\nFull log: {log.path}", exit_code=returncode)
+
+    if cache_key is not None:
+        try:
+            with timer.stage("cache_store"):
+                cache.put(cache_key, exe_path)
+        except OSError as e:
+            print(f"Warning: Could not store build in cache: {e}")
+
+    # Clean up output folder - keep only exe and log files
+    cleanup()
+    return finish(cached=False if cache is not None else None, phase_times=phase_times, published=published)
+
+
+def run_build(spec, output_root, options=None):
+    """Build one spec and return a BuildResult instead of raising. Runs inside pool workers."""
+    start = time.monotonic()
+    try:
+        return build_launcher(spec, output_root, options=options)
+    except BuildError as e:
+        result = BuildResult(spec.name, False, error=str(e), exit_code=e.exit_code,
+                             seconds=time.monotonic() - start)
+        log_path = os.path.join(output_root, spec.safe_name, "dist", LOG_FILE)
+        if spec.safe_name and os.path.exists(log_path):
+            result.log_path = log_path
+        return result
+    except Exception as e:
+        return BuildResult(spec.name, False, error=f"{type(e).__name__}: {e}",
+                           seconds=time.monotonic() - start)
+
+
+def build_batch(specs, output_root, jobs=None, on_result=None, options=None):
+    """
+    Build many specs across a bounded process pool.
+    on_result is called with each BuildResult as it finishes.
+    Returns the results in manifest order.
+    """
+    results = [None] * len(specs)
+    pending = []
+
+    # Two apps with the same safe name would build into the same folder
+    seen = {}
+    for index, spec in enumerate(specs):
+        safe_name = spec.safe_name
+        if safe_name in seen:
+            results[index] = BuildResult(
+                spec.name, False,
+                error=f"Output folder '{safe_name}' already used by '{seen[safe_name]}'")
+        else:
+            seen[safe_name] = spec.name
+            pending.append(index)
+
+    for index in range(len(specs)):
+        if results[index] is not None and on_result:
+            on_result(results[index])
+
+    if pending:
+        # multiprocessing is slow to import and only batch builds need it
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        workers = max(1, min(jobs or default_jobs(), len(pending)))
+
+        if options is not None:
+            try:
+                options.prepare()
+            except BuildError:
+                pass  # e.g. stub build failed; every app will report it
+
+            # Convert shared logos once, in parallel, before the builds need them
+            if options.icons is not None:
+                png_icons = [specs[i].icon for i in pending if specs[i].icon.lower().endswith('.png')]
+                options.icons.prefetch(png_icons, jobs=workers)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_build, specs[i], output_root, options): i for i in pending}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Worker process died (e.g. killed) rather than the build failing
+                    result = BuildResult(specs[index].name, False, error=f"Worker failed: {e}")
+                results[index] = result
+                if on_result:
+                    on_result(result)
+
+    return results
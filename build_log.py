@@ -0,0 +1,118 @@
+"""
+Streaming PyInstaller output: log spooling, bounded tail and phase progress.
+
+PyInstaller's output is read line by line instead of being buffered in
+memory. Every line is spooled to a log file next to the built exe, only the
+last TAIL_LINES lines are kept in memory (for error messages), and lines that
+mark PyInstaller's build phases (Analysis, PYZ, PKG, EXE) drive a determinate
+progress value with per-phase elapsed times.
+"""
+import os
+import io
+import time
+import math
+import collections
+
+TAIL_LINES = 200
+
+# (phase, progress fraction at which it starts, markers in PyInstaller's log)
+PHASES = [
+    ("Startup", 0.00, ()),
+    ("Analysis", 0.05, ("checking Analysis", "Building Analysis", "Running Analysis")),
+    ("PYZ", 0.70, ("checking PYZ", "Building PYZ")),
+    ("PKG", 0.78, ("checking PKG", "Building PKG")),
+    ("EXE", 0.92, ("checking EXE", "Building EXE")),
+]
+
+# Lines expected in a phase before its share of the bar is mostly used up
+_LINES_PER_PHASE = 150
+
+
+class BuildLog:
+    """Spools build output to a file and keeps the last lines in a ring buffer."""
+
+    def __init__(self, path=None, tail_lines=TAIL_LINES):
+        self.path = path
+        self.lines = collections.deque(maxlen=tail_lines)
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = io.open(path, 'w', encoding='utf-8', errors='replace')
+
+    def write(self, line):
+        line = line.rstrip('\r\n')
+        self.lines.append(line)
+        if self._file:
+            self._file.write(line + '\n')
+
+    def note(self, message):
+        """Record a builder message (as opposed to PyInstaller output)."""
+        self.write(f"[builder] {message}")
+
+    def tail(self, count=None):
+        lines = list(self.lines)
+        if count is not None:
+            lines = lines[-count:]
+        return "\n".join(lines)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PhaseTracker:
+    """Maps PyInstaller log lines onto phases and an overall progress fraction."""
+
+    def __init__(self, on_progress=None):
+        self.on_progress = on_progress
+        self.index = 0
+        self.lines_in_phase = 0
+        self.phase_started = time.monotonic()
+        self.phase_times = collections.OrderedDict()
+
+    @property
+    def phase(self):
+        return PHASES[self.index][0]
+
+    @property
+    def fraction(self):
+        start = PHASES[self.index][1]
+        end = PHASES[self.index + 1][1] if self.index + 1 < len(PHASES) else 1.0
+        # Creep towards the end of the phase without ever reaching it
+        within = 1.0 - math.exp(-self.lines_in_phase / _LINES_PER_PHASE)
+        return start + (end - start) * 0.95 * within
+
+    def elapsed(self):
+        return time.monotonic() - self.phase_started
+
+    def feed(self, line):
+        for index in range(self.index + 1, len(PHASES)):
+            if any(marker in line for marker in PHASES[index][2]):
+                self._enter(index)
+                break
+        else:
+            self.lines_in_phase += 1
+        self._notify()
+
+    def finish(self):
+        """Close the current phase and report 100%."""
+        self.phase_times[self.phase] = self.phase_times.get(self.phase, 0.0) + self.elapsed()
+        if self.on_progress:
+            self.on_progress(self.phase, 1.0, self.elapsed())
+
+    def _enter(self, index):
+        self.phase_times[self.phase] = self.phase_times.get(self.phase, 0.0) + self.elapsed()
+        self.index = index
+        self.lines_in_phase = 0
+        self.phase_started = time.monotonic()
+
+    def _notify(self):
+        if self.on_progress:
+            self.on_progress(self.phase, self.fraction, self.elapsed())
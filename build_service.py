@@ -0,0 +1,454 @@
+"""
+Local build service (`app_builder.py serve`).
+
+A small HTTP/JSON API for a shared build box, so launchers can be built
+without sitting at the tkinter app. Jobs go through an asyncio scheduler that
+runs at most --jobs builds at a time, each through the same
+build_engine.build_launcher call the GUI uses (on a worker thread), with a
+per-job timeout. Cancelling a running job kills its PyInstaller process tree.
+
+    POST   /jobs                 submit one app (a manifest entry) -> 202 + job
+    GET    /jobs                 list jobs
+    GET    /jobs/<id>            job status and progress
+    GET    /jobs/<id>/log        build log; ?follow=1 streams it until the job ends
+    GET    /jobs/<id>/artifact   download the launcher (onedir/stub as a .zip)
+    DELETE /jobs/<id>            cancel a queued or running job
+
+A submitted app may carry its icon inline as "icon_data" (base64 .ico/.png);
+otherwise "icon" is a path on the build box. There is no authentication:
+the service listens on 127.0.0.1 unless told otherwise.
+"""
+import os
+import json
+import time
+import uuid
+import base64
+import asyncio
+import zipfile
+import collections
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import build_engine
+from build_engine import BuildCancel, BuildError, BuildSpec
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest request body accepted (inline icons included)
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# How often a followed log is checked for new output
+LOG_POLL_SECONDS = 0.25
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled", "timed_out")
+
+HTTP_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+                500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- Jobs ----------
+
+class BuildJob:
+    """One submitted build and everything the API reports about it."""
+
+    def __init__(self, job_id, spec, job_dir):
+        self.id = job_id
+        self.spec = spec
+        self.job_dir = job_dir
+        self.state = "queued"
+        self.status = "Queued"
+        self.phase = None
+        self.fraction = 0.0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.artifact = None
+        self.cancel = BuildCancel()
+        self.done = asyncio.Event()
+
+    @property
+    def log_path(self):
+        return os.path.join(self.job_dir, self.spec.safe_name, "dist", build_engine.LOG_FILE)
+
+    @property
+    def finished_ok(self):
+        return self.state == "succeeded"
+
+    # Called from the build thread; plain attribute writes
+    def on_status(self, message):
+        self.status = message
+
+    def on_progress(self, phase, fraction, phase_elapsed):
+        self.phase = phase
+        self.fraction = fraction
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.spec.name,
+            "state": self.state,
+            "status": self.status,
+            "phase": self.phase,
+            "progress": round(self.fraction, 3),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error,
+            "result": self.result.to_dict() if self.result is not None else None,
+            "links": {
+                "self": f"/jobs/{self.id}",
+                "log": f"/jobs/{self.id}/log",
+                "artifact": f"/jobs/{self.id}/artifact" if self.finished_ok else None,
+            },
+        }
+
+
+class BuildScheduler:
+    """
+    Runs submitted jobs in order, at most `jobs` at a time. Builds run on a
+    thread pool; the event loop only waits for them, enforces the timeout and
+    passes cancellations on.
+    """
+
+    def __init__(self, output_root, options=None, jobs=None, timeout=None):
+        self.output_root = output_root
+        self.options = options or build_engine.BuildOptions()
+        self.concurrency = max(1, jobs or build_engine.default_jobs())
+        self.timeout = timeout
+        self.jobs = collections.OrderedDict()
+        self._queue = None
+        self._workers = []
+        self._executor = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="build")
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for job in self.jobs.values():
+            if job.state in ("queued", "running"):
+                self.cancel(job.id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    def submit(self, spec):
+        """Queue a validated spec. Returns the BuildJob."""
+        job_id = uuid.uuid4().hex[:12]
+        job = BuildJob(job_id, spec, os.path.join(self.output_root, "jobs", job_id))
+        self.jobs[job_id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a job. Returns False if it had already finished."""
+        job = self.jobs[job_id]
+        if job.state in FINISHED_STATES:
+            return False
+        if job.state == "queued":
+            self._finish(job, "cancelled", "Build cancelled")
+        else:
+            job.cancel.cancel()
+        return True
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.state == "queued":
+                await self._run(job)
+
+    async def _run(self, job):
+        job.state = "running"
+        job.started = time.time()
+        loop = asyncio.get_running_loop()
+        build = loop.run_in_executor(self._executor, self._build, job)
+        try:
+            job.result = await asyncio.wait_for(asyncio.shield(build), self.timeout)
+            self._finish(job, "succeeded")
+        except asyncio.TimeoutError:
+            job.cancel.cancel()
+            try:
+                await build
+            except Exception:
+                pass
+            self._finish(job, "timed_out", f"Build timed out after {self.timeout:g}s")
+        except BuildError as e:
+            self._finish(job, "cancelled" if job.cancel.cancelled else "failed", str(e))
+        except Exception as e:
+            self._finish(job, "failed", f"Unexpected error: {e}")
+
+    def _build(self, job):
+        os.makedirs(job.job_dir, exist_ok=True)
+        return build_engine.build_launcher(job.spec, job.job_dir, status=job.on_status, options=self.options,
+                                           progress=job.on_progress, cancel=job.cancel)
+
+    async def artifact(self, job):
+        """
+        The download path of a finished job. Zipping a onedir/stub launcher runs
+        on a worker thread, once per job: concurrent downloads wait for the same zip.
+        """
+        if job.artifact is None:
+            job.artifact = asyncio.get_running_loop().run_in_executor(None, artifact_path, job)
+        try:
+            return await asyncio.shield(job.artifact)
+        except Exception:
+            job.artifact = None
+            raise
+
+    def _finish(self, job, state, error=None):
+        job.state = state
+        job.error = error
+        job.status = {"succeeded": "Done", "failed": "Failed", "cancelled": "Cancelled",
+                      "timed_out": "Timed out"}[state]
+        job.finished = time.time()
+        job.done.set()
+
+
+def spec_from_request(data, job_root):
+    """Build and validate a spec from a submitted app entry, saving an inline icon under job_root."""
+    if not isinstance(data, dict):
+        raise HttpError(400, "Expected a JSON object describing one app")
+    data = dict(data)
+    icon_data = data.pop("icon_data", None)
+    if icon_data:
+        try:
+            icon_bytes = base64.b64decode(icon_data, validate=True)
+        except ValueError:
+            raise HttpError(400, "icon_data is not valid base64")
+        ext = ".png" if icon_bytes.startswith(b"\x89PNG") else ".ico"
+        os.makedirs(job_root, exist_ok=True)
+        icon_path = os.path.join(job_root, f"icon-{uuid.uuid4().hex[:8]}{ext}")
+        with open(icon_path, "wb") as f:
+            f.write(icon_bytes)
+        data["icon"] = icon_path
+    try:
+        spec = BuildSpec.from_dict(data).freeze()
+    except BuildError as e:
+        raise HttpError(400, str(e))
+    if not spec.safe_name:
+        raise HttpError(400, "App name must contain at least one letter or digit")
+    return spec
+
+
+def artifact_path(job):
+    """The file to download for a finished job: the exe, or a zip of a onedir/stub launcher."""
+    exe_path = job.result.exe_path
+    if job.spec.packaging == "onefile":
+        return exe_path
+    dist_dir = os.path.join(job.job_dir, job.spec.safe_name, "dist")
+    zip_path = os.path.join(job.job_dir, f"{job.spec.safe_name}.zip")
+    if not os.path.exists(zip_path):
+        tmp_path = zip_path + ".tmp"
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for entry in build_engine.launcher_entries(job.spec):
+                path = os.path.join(dist_dir, entry)
+                if os.path.isdir(path):
+                    for folder, _, files in os.walk(path):
+                        for name in files:
+                            full = os.path.join(folder, name)
+                            archive.write(full, os.path.relpath(full, dist_dir))
+                elif os.path.exists(path):
+                    archive.write(path, entry)
+        os.replace(tmp_path, zip_path)
+    return zip_path
+
+
+# ---------- HTTP ----------
+
+class BuildService:
+    """Minimal HTTP/1.1 front end for a BuildScheduler (one request per connection)."""
+
+    def __init__(self, scheduler, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.scheduler = scheduler
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        await self.scheduler.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.scheduler.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, query, body = await self._read_request(reader)
+            await self._route(writer, method, path, query, body)
+        except HttpError as e:
+            await self._send_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            try:
+                await self._send_json(writer, 500, {"error": f"Unexpected error: {e}"})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length") or "0"
+        if not (length.isascii() and length.isdigit()):
+            raise HttpError(400, f"Invalid Content-Length: {length!r}")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        url = urllib.parse.urlsplit(target)
+        return method.upper(), url.path.rstrip("/") or "/", urllib.parse.parse_qs(url.query), body
+
+    async def _route(self, writer, method, path, query, body):
+        parts = [p for p in path.split("/") if p]
+        if parts[:1] != ["jobs"] or len(parts) > 3:
+            raise HttpError(404, f"No such endpoint: {path}")
+
+        if len(parts) == 1:
+            if method == "GET":
+                await self._send_json(writer, 200, {"jobs": [j.to_dict() for j in self.scheduler.jobs.values()]})
+            elif method == "POST":
+                await self._submit(writer, body)
+            else:
+                raise HttpError(405, "Use GET or POST on /jobs")
+            return
+
+        job = self.scheduler.jobs.get(parts[1])
+        if job is None:
+            raise HttpError(404, f"No such job: {parts[1]}")
+        action = parts[2] if len(parts) == 3 else None
+
+        if action is None and method == "GET":
+            await self._send_json(writer, 200, job.to_dict())
+        elif action is None and method == "DELETE":
+            if not self.scheduler.cancel(job.id):
+                raise HttpError(409, f"Job already {job.state}")
+            await self._send_json(writer, 202, job.to_dict())
+        elif action == "log" and method == "GET":
+            await self._send_log(writer, job, follow=query.get("follow", ["0"])[0] not in ("0", "false", ""))
+        elif action == "artifact" and method == "GET":
+            if not job.finished_ok:
+                raise HttpError(409, f"Job is {job.state}; no artifact")
+            path = await self.scheduler.artifact(job)
+            await self._send_file(writer, path)
+        else:
+            raise HttpError(404 if action not in (None, "log", "artifact") else 405,
+                            f"Unsupported request: {method} {path}")
+
+    async def _submit(self, writer, body):
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except ValueError:
+            raise HttpError(400, "Request body is not valid JSON")
+        spec = spec_from_request(data, os.path.join(self.scheduler.output_root, "uploads"))
+        job = self.scheduler.submit(spec)
+        await self._send_json(writer, 202, job.to_dict())
+
+    # ----- responses -----
+
+    async def _send_head(self, writer, status, content_type, length=None, extra=()):
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+                 f"Content-Type: {content_type}", "Connection: close", "Cache-Control: no-store"]
+        lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+        lines.extend(extra)
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _send_json(self, writer, status, payload):
+        body = (json.dumps(payload, indent=2) + "\n").encode("utf-8")
+        await self._send_head(writer, status, "application/json", len(body))
+        writer.write(body)
+        await writer.drain()
+
+    async def _send_file(self, writer, path):
+        size = os.path.getsize(path)
+        name = os.path.basename(path).replace('"', "")
+        await self._send_head(writer, 200, "application/octet-stream", size,
+                              [f'Content-Disposition: attachment; filename="{name}"'])
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(256 * 1024), b""):
+                writer.write(chunk)
+                await writer.drain()
+
+    async def _send_log(self, writer, job, follow):
+        """Send the build log; when following, keep sending new output until the job ends."""
+        await self._send_head(writer, 200, "text/plain; charset=utf-8")
+        offset = 0
+        while True:
+            finished = job.done.is_set()
+            try:
+                with open(job.log_path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+            except OSError:
+                data = b""
+            if data:
+                offset += len(data)
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+            if finished or not follow:
+                break
+            try:
+                await asyncio.wait_for(job.done.wait(), LOG_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def run_service(output_root, host=DEFAULT_HOST, port=DEFAULT_PORT, jobs=None, timeout=None, options=None):
+    """Run the build service until interrupted (Ctrl+C)."""
+    scheduler = BuildScheduler(output_root, options=options, jobs=jobs, timeout=timeout)
+    service = BuildService(scheduler, host, port)
+
+    async def main():
+        await service.start()
+        print(f"Build service on http://{service.host}:{service.port}/jobs "
+              f"({scheduler.concurrency} concurrent, output in {output_root})", flush=True)
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Build service stopped")
+    return 0
@@ -0,0 +1,222 @@
+"""
+Per-stage build timing and the JSONL build trace.
+
+Every launcher build is timed stage by stage (validation, icon conversion,
+script generation, cache lookup, PyInstaller, stamping, publishing, cache
+store, artifact store, cleanup) with monotonic timers. One JSON record per
+build is appended to build_trace.jsonl in the output folder, together with
+artifact sizes (and the launcher's size breakdown), cache status, the
+workspace the build ran in (with the cleanup time a scratch workspace kept
+off the build) and host/toolchain info. `app_builder.py trace summarize`
+reads the trace back and prints p50/p95 per stage and launcher size.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import contextlib
+import collections
+
+TRACE_FILE = "build_trace.jsonl"
+
+# Bump when the record layout changes
+TRACE_VERSION = 1
+
+# Order stages are listed in by the summary (unknown stages go last)
+STAGE_ORDER = ["validate", "icon", "script", "write_stub", "cache_lookup", "stub", "stamp",
+               "pyinstaller", "publish", "cache_store", "store", "cleanup", "total"]
+
+
+class StageTimer:
+    """Accumulates monotonic durations per named stage."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages = collections.OrderedDict()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self):
+        return time.monotonic() - self.started
+
+
+def host_info():
+    return {
+        "host": socket.gethostname(),
+        "os": f"{platform.system()} {platform.release()}",
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "frozen": bool(getattr(sys, 'frozen', False)),
+    }
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path) if path else None
+    except OSError:
+        return None
+
+
+def make_record(name, mode, timer, ok, exe_path=None, icon_path=None, log_path=None,
+                cache=None, icon_cache=None, phases=None, exit_code=None, error=None,
+                toolchain=None, packaging=None, workspace=None, publish=None, optimize=None, parts=None,
+                io_saved=None):
+    """
+    Build one trace record (a plain dict) for a finished or failed build.
+    parts is the launcher's size breakdown (launcher_size.size_breakdown),
+    io_saved the seconds of file work kept off the build ({"cleanup": s} for
+    scratch builds, whose folder is deleted in the background).
+    """
+    stages = collections.OrderedDict((k, round(v, 4)) for k, v in timer.stages.items())
+    stages["total"] = round(timer.total(), 4)
+    return {
+        "v": TRACE_VERSION,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "app": name,
+        "mode": mode,
+        "packaging": packaging,
+        "workspace": workspace,
+        "publish": publish,
+        "io_saved": io_saved,
+        "optimize": optimize,
+        "ok": ok,
+        "exit_code": exit_code,
+        "error": error.strip().splitlines()[0] if error and error.strip() else error,
+        "stages": stages,
+        "phases": {k: round(v, 4) for k, v in (phases or {}).items()},
+        "cache": cache,
+        "icon_cache": icon_cache,
+        "sizes": {
+            "exe": _file_size(exe_path),
+            "icon": _file_size(icon_path),
+            "log": _file_size(log_path),
+            "parts": parts,
+        },
+        "toolchain": toolchain,
+        "host": host_info(),
+    }
+
+
+def append_record(path, record):
+    """
+    Append one record as a single line. The line is written with one write()
+    on an O_APPEND descriptor so parallel builds don't interleave records.
+    """
+    line = (json.dumps(record, sort_keys=True) + "\n").encode("utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def load_records(path):
+    """Read every record from a trace file, skipping lines that don't parse."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+    return records
+
+
+# ---------- Summary ----------
+
+def percentile(values, pct):
+    """Percentile with linear interpolation between closest ranks."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _stage_sort_key(name):
+    base = name.split("/")[0]
+    order = STAGE_ORDER.index(base) if base in STAGE_ORDER else len(STAGE_ORDER)
+    return (order, name)
+
+
+def summarize(records):
+    """
+    Return rows of (stage, count, p50, p95, max) across records. PyInstaller
+    phases are listed as pyinstaller/<phase>, I/O kept off the build (by a
+    scratch workspace) as saved/<stage> after the total.
+    """
+    samples = collections.defaultdict(list)
+    for record in records:
+        for stage, seconds in (record.get("stages") or {}).items():
+            samples[stage].append(seconds)
+        for phase, seconds in (record.get("phases") or {}).items():
+            samples[f"pyinstaller/{phase}"].append(seconds)
+        for stage, seconds in (record.get("io_saved") or {}).items():
+            samples[f"saved/{stage}"].append(seconds)
+
+    rows = []
+    for stage in sorted(samples, key=_stage_sort_key):
+        values = samples[stage]
+        rows.append((stage, len(values), percentile(values, 50), percentile(values, 95), max(values)))
+    return rows
+
+
+def summarize_sizes(records):
+    """
+    Return rows of (part, count, p50, p95, max) in bytes for the launcher size
+    breakdowns in records; empty if no record has one.
+    """
+    from launcher_size import SIZE_PARTS
+
+    samples = collections.defaultdict(list)
+    for record in records:
+        parts = (record.get("sizes") or {}).get("parts")
+        if not parts:
+            continue
+        for part in SIZE_PARTS + ("total",):
+            if part in parts:
+                samples[part].append(parts[part])
+
+    rows = []
+    for part in SIZE_PARTS + ("total",):
+        values = samples.get(part)
+        if values:
+            rows.append((part, len(values), percentile(values, 50), percentile(values, 95), max(values)))
+    return rows
+
+
+def group_records(records, by=None):
+    """
+    Split records by "toolchain", "mode", "packaging", "workspace", "optimize"
+    or "host" (None keeps them together).
+    """
+    if not by:
+        return collections.OrderedDict([("all", records)])
+    groups = collections.OrderedDict()
+    for record in records:
+        if by == "host":
+            value = (record.get("host") or {}).get("host")
+        else:
+            value = record.get(by)
+        groups.setdefault(str(value), []).append(record)
+    return groups
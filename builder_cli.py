@@ -0,0 +1,808 @@
+"""
+Command line interface for Web App Builder.
+
+    python app_builder.py build manifest.json [--output DIR] [--jobs N] [--json]
+    python app_builder.py watch manifest.json [--output DIR] [--jobs N] [--poll] [--debounce S]
+    python app_builder.py trace summarize [output/build_trace.jsonl] [--by toolchain]
+    python app_builder.py args manifest.json [--browser PATH] [--json]
+    python app_builder.py serve [--host 127.0.0.1] [--port 8765] [--jobs N] [--timeout S]
+    python app_builder.py worker [--host 127.0.0.1] [--port 8766] [--jobs N]
+    python app_builder.py distribute manifest.json --worker HOST:PORT... [--local N] [--retries N] [--json]
+    python app_builder.py list [--output DIR] [--json] [--prune] [--verify]
+    python app_builder.py icon inspect FILE... [--json]
+    python app_builder.py icon pack OUT.ico PNG...
+    python app_builder.py telemetry aggregate PATH... [--by app,launcher] [--json]
+
+Runs without tkinter so launchers can be rebuilt on a headless build box.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+import build_engine
+from build_cache import CacheStats, DEFAULT_MAX_BYTES
+from launcher_size import OPTIMIZE_PROFILES, format_size
+
+
+def cmd_build(args):
+    try:
+        specs = build_engine.load_manifest(args.manifest)
+    except (OSError, ValueError, build_engine.BuildError) as e:
+        print(f"Error: could not load manifest: {e}", file=sys.stderr)
+        return 2
+    warn_stub_packaging(specs)
+
+    output_root = os.path.abspath(args.output)
+    jobs = max(1, min(args.jobs or build_engine.default_jobs(), len(specs)))
+    if not args.json:
+        print(f"Building {len(specs)} app(s) into {output_root} with {jobs} worker(s)...")
+
+    try:
+        options = build_options(args, jobs)
+    except build_engine.BuildError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    cache = options.cache
+
+    def on_result(result):
+        if not args.json:
+            mark = "✓" if result.ok else "✗"
+            note = " cache hit" if result.cached else ""
+            print(f"  {mark} {result.name} ({result.seconds:.1f}s{note})", flush=True)
+
+    start = time.monotonic()
+    results = build_engine.build_batch(specs, output_root, jobs=jobs, on_result=on_result,
+                                       options=options)
+    elapsed = time.monotonic() - start
+    if options.scratch is not None:
+        options.scratch.wait()
+
+    stats = CacheStats()
+    for r in results:
+        if r.ok and r.cached is not None:
+            stats.record(r.cached)
+
+    failed = [r for r in results if not r.ok]
+    if args.json:
+        print(json.dumps({
+            "results": [r.to_dict() for r in results],
+            "built": len(results) - len(failed),
+            "failed": len(failed),
+            "seconds": round(elapsed, 3),
+            "jobs": jobs,
+            "mode": options.mode,
+            "optimize": options.optimize,
+            "cache": cache_summary(cache, stats),
+            "icons": icon_summary(options.icons),
+            "store": store_summary(options, output_root),
+        }, indent=2))
+    else:
+        print_summary(results)
+        print(f"{len(results) - len(failed)} built, {len(failed)} failed in {elapsed:.1f}s")
+        if cache is not None and options.mode != "stamp":
+            entries, total = cache.size()
+            print(f"Build cache: {stats} ({entries} entries, {total / (1024 * 1024):.1f} MB in {cache.root})")
+        if options.icons is not None and (options.icons.stats.converted or options.icons.stats.hits):
+            print(f"Icons: {options.icons.stats}")
+        store = store_summary(options, output_root)
+        if store is not None:
+            print(f"Artifact store: {usage_text(store)}")
+
+    return 1 if failed else 0
+
+
+def cmd_watch(args):
+    import watch
+
+    try:
+        manifest = watch.ManifestWatch(args.manifest)
+    except (OSError, ValueError, build_engine.BuildError) as e:
+        print(f"Error: could not load manifest: {e}", file=sys.stderr)
+        return 2
+    warn_stub_packaging(manifest.specs.values())
+
+    output_root = os.path.abspath(args.output)
+    jobs = max(1, args.jobs or build_engine.default_jobs())
+    try:
+        options = build_options(args, jobs)
+    except build_engine.BuildError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    def on_result(result):
+        mark = "✓" if result.ok else "✗"
+        note = " cache hit" if result.cached else ""
+        error = f": {result.error.strip().splitlines()[0]}" if result.error and result.error.strip() else ""
+        print(f"  {mark} {result.name} ({result.seconds:.1f}s{note}){error}", flush=True)
+
+    def rebuild(specs):
+        start = time.monotonic()
+        results = build_engine.build_batch(specs, output_root, jobs=min(jobs, len(specs)),
+                                           on_result=on_result, options=options)
+        if options.scratch is not None:
+            options.scratch.wait()
+        failed = sum(1 for r in results if not r.ok)
+        print(f"{len(results) - failed} built, {failed} failed in {time.monotonic() - start:.1f}s", flush=True)
+
+    specs = list(manifest.specs.values())
+    if not args.no_initial:
+        print(f"Building {len(specs)} app(s) into {output_root}...", flush=True)
+        rebuild(specs)
+
+    watcher = watch.make_watcher(manifest.paths(), poll=args.poll)
+    print(f"Watching {args.manifest} and {len(manifest.paths()) - 1} icon(s) ({watcher.kind}); "
+          f"press Ctrl+C to stop", flush=True)
+    try:
+        for changed in watch.changes(watcher, debounce=args.debounce):
+            names = ", ".join(sorted(os.path.basename(path) for path in changed))
+            try:
+                specs = manifest.affected(changed)
+            except build_engine.BuildError as e:
+                print(f"Changed: {names} - {e}; keeping the previous apps", file=sys.stderr, flush=True)
+                continue
+            watcher.set_paths(manifest.paths())
+            if not specs:
+                print(f"Changed: {names} - no app affected", flush=True)
+                continue
+            print(f"Changed: {names} - rebuilding {', '.join(spec.name for spec in specs)}", flush=True)
+            rebuild(specs)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        watcher.close()
+    return 0
+
+
+def cmd_verify_stamp(args):
+    import stamping
+
+    config = stamping.read_stamp(args.exe)
+    if config is None:
+        print(f"✗ No stamped config found in {args.exe}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(config, indent=2, sort_keys=True))
+    if not args.manifest:
+        return 0
+
+    try:
+        specs = build_engine.load_manifest(args.manifest)
+    except (OSError, ValueError, build_engine.BuildError) as e:
+        print(f"Error: could not load manifest: {e}", file=sys.stderr)
+        return 2
+
+    spec = next((s for s in specs if s.name == config.get("APP_NAME")), None)
+    if spec is None:
+        print(f"✗ '{config.get('APP_NAME')}' is not in {args.manifest}", file=sys.stderr)
+        return 1
+
+    try:
+        spec.validate()
+        stamping.verify_stamp(args.exe, json.loads(build_engine.render_app_config(spec)))
+    except (build_engine.BuildError, stamping.StampError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+
+    print(f"✓ Stamped config matches manifest entry '{spec.name}'")
+    return 0
+
+
+def cmd_trace_summarize(args):
+    import build_trace
+
+    try:
+        records = build_trace.load_records(args.trace)
+    except OSError as e:
+        print(f"Error: could not read trace: {e}", file=sys.stderr)
+        return 2
+    if args.last:
+        records = records[-args.last:]
+    if not records:
+        print(f"No build records in {args.trace}", file=sys.stderr)
+        return 1
+
+    groups = build_trace.group_records(records, args.by)
+    if args.json:
+        print(json.dumps({
+            group: [
+                {"stage": stage, "count": count, "p50": round(p50, 4), "p95": round(p95, 4), "max": round(top, 4)}
+                for stage, count, p50, p95, top in build_trace.summarize(group_records)
+            ] + [
+                {"size": part, "count": count, "p50": p50, "p95": p95, "max": top}
+                for part, count, p50, p95, top in build_trace.summarize_sizes(group_records)
+            ]
+            for group, group_records in groups.items()
+        }, indent=2))
+        return 0
+
+    for group, group_records in groups.items():
+        failed = sum(1 for r in group_records if not r.get("ok"))
+        title = f"{len(group_records)} build(s), {failed} failed"
+        print(f"{args.by}: {group} ({title})" if args.by else title)
+        rows = build_trace.summarize(group_records)
+        width = max([len("Stage")] + [len(row[0]) for row in rows])
+        print(f"  {'Stage':<{width}}  {'N':>5}  {'p50':>8}  {'p95':>8}  {'max':>8}")
+        for stage, count, p50, p95, top in rows:
+            print(f"  {stage:<{width}}  {count:>5}  {p50:>7.2f}s  {p95:>7.2f}s  {top:>7.2f}s")
+        size_rows = build_trace.summarize_sizes(group_records)
+        if size_rows:
+            print()
+            print(f"  {'Size':<{width}}  {'N':>5}  {'p50':>8}  {'p95':>8}  {'max':>8}")
+            for part, count, p50, p95, top in size_rows:
+                print(f"  {part:<{width}}  {count:>5}  {format_size(p50):>8}  {format_size(p95):>8}  "
+                      f"{format_size(top):>8}")
+        print()
+    return 0
+
+
+def cmd_list(args):
+    from artifact_store import ArtifactStore
+
+    store = ArtifactStore(os.path.join(os.path.abspath(args.output), build_engine.STORE_FOLDER))
+    try:
+        if args.prune:
+            removed = store.prune()
+            if not args.json:
+                print(f"Removed {removed} launcher(s) that no longer exist from the registry")
+        damaged = store.verify() if args.verify else []
+        launchers = store.launchers(args.name)
+        usage = store.usage()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error: could not read the artifact registry: {e}", file=sys.stderr)
+        return 2
+
+    for launcher in launchers:
+        launcher["exists"] = os.path.exists(launcher["path"])
+    if args.json:
+        print(json.dumps({"launchers": launchers, "usage": usage, "damaged": damaged}, indent=2))
+        return 1 if damaged else 0
+
+    if not launchers:
+        print(f"No launchers registered in {store.root}")
+    else:
+        width = max([len("App")] + [len(item["name"]) for item in launchers])
+        print(f"{'App':<{width}}  {'Packaging':<9}  {'Size':>8}  {'Built':<16}  {'PyInstaller':<12}  URL")
+        for item in launchers:
+            built = time.strftime("%Y-%m-%d %H:%M", time.localtime(item["built"]))
+            missing = "" if item["exists"] else "  (missing)"
+            print(f"{item['name']:<{width}}  {item['packaging']:<9}  {format_size(item['size']):>8}  "
+                  f"{built:<16}  {item['toolchain'] or '-':<12}  {item['url']}{missing}")
+        print()
+        print(usage_text(usage))
+        if any(item["packaging"] == "onefile" for item in launchers):
+            print("Note: deduplication shares identical files only; onefile launchers embed their app's "
+                  "config and icon, so they share storage with rebuilds of the same app, not with other apps")
+    for path in damaged:
+        print(f"✗ Stored object changed on disk: {path}", file=sys.stderr)
+    return 1 if damaged else 0
+
+
+def cmd_icon_inspect(args):
+    from icon_format import IconFormatError, inspect_icon
+
+    infos = {}
+    for path in args.files:
+        try:
+            infos[path] = inspect_icon(path)
+        except IconFormatError as e:
+            infos[path] = e
+    failed = sum(1 for info in infos.values() if isinstance(info, IconFormatError))
+    if args.json:
+        print(json.dumps({path: {"error": str(info)} if isinstance(info, IconFormatError) else info.to_dict()
+                          for path, info in infos.items()}, indent=2))
+        return 1 if failed else 0
+    for path, info in infos.items():
+        if isinstance(info, IconFormatError):
+            print(f"✗ {path}: {info}")
+        else:
+            print(f"✓ {path}: {format_size(info.file_size)} {info}")
+    return 1 if failed else 0
+
+
+def cmd_icon_pack(args):
+    from icon_format import IconFormatError, pack_pngs
+
+    try:
+        frames = pack_pngs(args.pngs, args.ico)
+    except IconFormatError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote {args.ico}: " + ", ".join(str(frame) for frame in frames))
+    return 0
+
+
+def cmd_telemetry_aggregate(args):
+    import launch_telemetry
+
+    by = tuple(key.strip() for key in args.by.split(",") if key.strip())
+    unknown = [key for key in by if key not in launch_telemetry.GROUP_KEYS]
+    if unknown:
+        print(f"Error: can't group by '{unknown[0]}' (choose from: {', '.join(launch_telemetry.GROUP_KEYS)})",
+              file=sys.stderr)
+        return 2
+    try:
+        records, skipped = launch_telemetry.load_launches(args.paths)
+    except OSError as e:
+        print(f"Error: could not read telemetry: {e}", file=sys.stderr)
+        return 2
+    if not records:
+        print("No launch records found", file=sys.stderr)
+        return 1
+
+    groups = launch_telemetry.group_launches(records, by)
+    pct_names = [f"p{pct}" for pct in launch_telemetry.PERCENTILES]
+    if args.json:
+        print(json.dumps({
+            "launches": len(records),
+            "skipped": skipped,
+            "by": list(by),
+            "groups": [
+                {"group": dict(zip(by, key)), "launches": len(group),
+                 "milestones": [dict(zip(["milestone", "count"] + pct_names + ["max"],
+                                         [name, count] + [round(v, 1) for v in values]))
+                                for name, count, *values in launch_telemetry.summarize_launches(group)]}
+                for key, group in groups.items()
+            ],
+        }, indent=2))
+        return 0
+
+    note = f", {skipped} unreadable line(s) skipped" if skipped else ""
+    print(f"{len(records)} launch(es){note}")
+    print()
+    for key, group in groups.items():
+        print(", ".join(f"{name}: {value}" for name, value in zip(by, key)) + f" ({len(group)} launch(es))")
+        rows = launch_telemetry.summarize_launches(group)
+        width = max([len("Milestone")] + [len(row[0]) for row in rows])
+        print(f"  {'Milestone':<{width}}  {'N':>6}  " + "  ".join(f"{name:>9}" for name in pct_names + ["max"]))
+        for name, count, *values in rows:
+            print(f"  {name:<{width}}  {count:>6}  " + "  ".join(f"{value:>7.1f}ms" for value in values))
+        print()
+    return 0
+
+
+def cmd_args(args):
+    import subprocess
+    import main_edge
+
+    try:
+        specs = build_engine.load_manifest(args.manifest)
+    except (OSError, ValueError, build_engine.BuildError) as e:
+        print(f"Error: could not load manifest: {e}", file=sys.stderr)
+        return 2
+
+    commands = {}
+    for spec in specs:
+        try:
+            spec.validate()
+        except build_engine.BuildError as e:
+            print(f"Error: {spec.name or '(unnamed app)'}: {e}", file=sys.stderr)
+            return 1
+        config = json.loads(build_engine.render_app_config(spec))
+        commands[spec.name] = main_edge.app_browser_args(args.browser, config=config)
+
+    if args.json:
+        print(json.dumps(commands, indent=2))
+    else:
+        for name, argv in commands.items():
+            print(f"{name}:\n  {subprocess.list2cmdline(argv)}")
+    return 0
+
+
+def cmd_serve(args):
+    import build_service
+
+    output_root = os.path.abspath(args.output)
+    jobs = max(1, args.jobs or build_engine.default_jobs())
+    try:
+        options = build_engine.BuildOptions.for_mode(
+            args.mode,
+            use_cache=not args.no_cache,
+            cache_dir=os.path.abspath(args.cache_dir) if args.cache_dir else None,
+            slots=jobs,
+            # Jobs build into their own folders; keep one trace and store for the whole service
+            trace=False if args.no_trace else os.path.join(output_root, build_engine.TRACE_FILE),
+            store=False if args.no_store else os.path.join(output_root, build_engine.STORE_FOLDER),
+            **scratch_options(args),
+            **size_options(args),
+        )
+        options.prepare()
+    except build_engine.BuildError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    return build_service.run_service(output_root, host=args.host, port=args.port, jobs=jobs,
+                                     timeout=args.timeout, options=options)
+
+
+def cmd_worker(args):
+    import build_cluster
+
+    output_root = os.path.abspath(args.output)
+    jobs = max(1, args.jobs or build_engine.default_jobs())
+
+    def make_options(mode, optimize):
+        # The coordinator registers the launchers it receives; shard folders are temporary
+        return build_engine.BuildOptions.for_mode(
+            mode,
+            use_cache=not args.no_cache,
+            cache_dir=os.path.abspath(args.cache_dir) if args.cache_dir else None,
+            slots=jobs,
+            trace=False if args.no_trace else os.path.join(output_root, build_engine.TRACE_FILE),
+            store=False,
+            optimize=optimize,
+            **scratch_options(args),
+        )
+
+    try:
+        make_options("standard", "default")
+    except build_engine.BuildError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    try:
+        return build_cluster.run_worker(output_root, make_options, host=args.host, port=args.port, jobs=jobs)
+    except OSError as e:
+        # Typically the port is taken; start_local_workers() reports this first line
+        print(f"Error: cannot listen on {args.host}:{args.port}: {e.strerror or e}", file=sys.stderr, flush=True)
+        return 2
+
+
+def cmd_distribute(args):
+    import build_cluster
+
+    try:
+        specs = build_engine.load_manifest(args.manifest)
+    except (OSError, ValueError, build_engine.BuildError) as e:
+        print(f"Error: could not load manifest: {e}", file=sys.stderr)
+        return 2
+    if not args.worker and not args.local:
+        print("Error: give at least one --worker HOST:PORT or --local N", file=sys.stderr)
+        return 2
+    warn_stub_packaging(specs)
+
+    output_root = os.path.abspath(args.output)
+    processes = []
+    addresses = list(args.worker)
+    try:
+        if args.local:
+            processes, local = build_cluster.start_local_workers(args.local, jobs=args.local_jobs)
+            addresses += local
+        if not args.json:
+            print(f"Distributing {len(specs)} app(s) across {len(addresses)} worker(s) into {output_root}...",
+                  flush=True)
+
+        def on_result(result):
+            if not args.json:
+                mark = "✓" if result.ok else "✗"
+                where = getattr(result, "worker", None)
+                note = (" cache hit" if result.cached else "") + (f" on {where}" if where else "")
+                print(f"  {mark} {result.name} ({result.seconds:.1f}s{note})", flush=True)
+
+        def on_status(name, message):
+            if args.verbose and not args.json:
+                print(f"    {name}: {message}", flush=True)
+
+        coordinator = build_cluster.Coordinator(
+            specs, output_root, addresses, mode=args.mode, optimize=args.optimize, shard_size=args.shard_size,
+            retries=args.retries, timeout=args.timeout, store=not args.no_store,
+            on_result=on_result, on_status=on_status)
+        results = coordinator.run()
+    except build_engine.BuildError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        build_cluster.stop_local_workers(processes)
+
+    summary = coordinator.summary()
+    if args.json:
+        print(json.dumps(dict({"results": [dict(r.to_dict(), worker=getattr(r, "worker", None)) for r in results]},
+                              **summary), indent=2))
+    else:
+        print_summary(results)
+        print(f"{summary['built']} built, {summary['failed']} failed in {summary['seconds']:.1f}s "
+              f"({summary['builds_per_min'] or 0:.1f} builds/min, {format_size(summary['bytes'])} received, "
+              f"{summary['retried']} app(s) retried)")
+        for worker in summary["workers"]:
+            if worker["host"] is None:
+                print(f"  {worker['address']}: {worker['error']}")
+                continue
+            rate = f", {worker['builds_per_min']:.1f} builds/min" if worker["builds_per_min"] else ""
+            dropped = f", dropped: {worker['error']}" if worker["error"] else ""
+            print(f"  {worker['address']} ({worker['host']}, {worker['jobs']} job(s)): {worker['built']} built, "
+                  f"{worker['failed']} failed, {format_size(worker['bytes'])}{rate}{dropped}")
+    return 1 if summary["failed"] else 0
+
+
+def scratch_options(args):
+    return {
+        "scratch": not args.no_scratch,
+        "scratch_dir": os.path.abspath(args.scratch_dir) if args.scratch_dir else None,
+        "ram_scratch": args.ram_scratch,
+    }
+
+
+def add_scratch_arguments(parser):
+    parser.add_argument("--scratch-dir", default=None,
+                        help="Folder to build in before moving launchers into the output "
+                             "(default: system temp folder, or WEBAPP_BUILDER_SCRATCH)")
+    parser.add_argument("--ram-scratch", action="store_true",
+                        help="Build in a RAM-backed temp folder (/dev/shm)")
+    parser.add_argument("--no-scratch", action="store_true",
+                        help="Build directly in the output folder and clean it up afterwards")
+
+
+def size_options(args):
+    return {
+        "optimize": args.optimize,
+        "compress": args.compress,
+        "upx_dir": os.path.abspath(args.upx_dir) if args.upx_dir else None,
+    }
+
+
+def build_options(args, slots):
+    return build_engine.BuildOptions.for_mode(
+        args.mode,
+        use_cache=not args.no_cache,
+        cache_dir=os.path.abspath(args.cache_dir) if args.cache_dir else None,
+        cache_size=int(args.cache_size * 1024 * 1024),
+        slots=slots,
+        trace=not args.no_trace,
+        store=not args.no_store,
+        **scratch_options(args),
+        **size_options(args),
+    )
+
+
+def add_build_arguments(parser):
+    parser.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "output"),
+                        help="Output root folder (default: ./output)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Parallel builds (default: number of CPU cores)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always run PyInstaller, don't read or write the build cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Build cache folder (default: per-user cache, or WEBAPP_BUILDER_CACHE)")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Build cache size limit in MB (least recently used exes are evicted)")
+    parser.add_argument("--mode", choices=build_engine.BUILD_MODES, default="standard",
+                        help="standard: full PyInstaller build per app; "
+                             "shared: reuse one persistent PyInstaller analysis, only the EXE is assembled per app; "
+                             "stamp: build one generic launcher once and stamp each app's config into a copy")
+    parser.add_argument("--no-trace", action="store_true",
+                        help="Don't append timing records to build_trace.jsonl in the output folder")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Don't deduplicate launchers or register them in the artifact store")
+    add_scratch_arguments(parser)
+    add_size_arguments(parser)
+
+
+def add_size_arguments(parser):
+    parser.add_argument("--optimize", choices=OPTIMIZE_PROFILES, default="default",
+                        help="size: exclude modules the launcher doesn't use (tkinter, PIL, email, http, "
+                             "unittest, ...) and fail if a required module is missing")
+    parser.add_argument("--compress", action="store_true",
+                        help="With --optimize size, compress the launcher's binaries with UPX")
+    parser.add_argument("--upx-dir", default=None, help="Folder containing upx (default: PATH)")
+
+
+def store_summary(options, output_root):
+    from artifact_store import ArtifactStore
+
+    store_path = options.store_path(output_root)
+    if not store_path:
+        return None
+    try:
+        return ArtifactStore(store_path).usage()
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def usage_text(usage):
+    return (f"{usage['launchers']} launcher(s), {format_size(usage['logical'])} in the output folder, "
+            f"{format_size(usage['stored'])} on disk ({format_size(usage['saved'])} saved by deduplication)")
+
+
+def icon_summary(icons):
+    if icons is None:
+        return None
+    return {
+        "converted": icons.stats.converted,
+        "hits": icons.stats.hits,
+        "seconds": round(icons.stats.seconds, 3),
+    }
+
+
+def cache_summary(cache, stats):
+    if cache is None:
+        return None
+    entries, total = cache.size()
+    return {
+        "hits": stats.hits,
+        "misses": stats.misses,
+        "entries": entries,
+        "bytes": total,
+        "dir": cache.root,
+    }
+
+
+def warn_stub_packaging(specs):
+    """Print a warning naming the apps packaged as script stubs, if any."""
+    names = [spec.name for spec in specs if spec.packaging == "stub"]
+    if names:
+        from script_launcher import STUB_WARNING
+        print(f"Warning: {', '.join(names)}: {STUB_WARNING}", file=sys.stderr)
+
+
+def print_summary(results):
+    width = max([len("App")] + [len(r.name) for r in results])
+    print()
+    print(f"{'App':<{width}}  {'Status':<7} {'Exit':>4}  {'Time':>8}  {'Cache':<5}  {'Size':>8}")
+    for r in results:
+        exit_code = "-" if r.exit_code is None else str(r.exit_code)
+        status = "ok" if r.ok else "failed"
+        cache = r.cache_status or "-"
+        size = format_size(r.sizes["total"]) if r.sizes else "-"
+        print(f"{r.name:<{width}}  {status:<7} {exit_code:>4}  {r.seconds:>7.1f}s  {cache:<5}  {size:>8}")
+        if r.error:
+            first_line = r.error.strip().splitlines()[0] if r.error.strip() else r.error
+            print(f"{'':<{width}}  -> {first_line}")
+            if r.log_path:
+                print(f"{'':<{width}}     log: {r.log_path}")
+    print()
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog="app_builder.py",
+        description="Build web app launchers without the GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Build every app in a JSON/TOML manifest")
+    build.add_argument("manifest", help="Path to manifest.json or manifest.toml")
+    build.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    add_build_arguments(build)
+    build.set_defaults(func=cmd_build)
+
+    watching = subparsers.add_parser("watch", help="Build a manifest, then rebuild apps whose entry or icon changes")
+    watching.add_argument("manifest", help="Path to manifest.json or manifest.toml")
+    add_build_arguments(watching)
+    watching.add_argument("--poll", action="store_true",
+                          help="Compare file timestamps every 0.5 s instead of using inotify")
+    watching.add_argument("--debounce", type=float, default=0.3,
+                          help="Wait until files have been quiet this many seconds before rebuilding (default: 0.3)")
+    watching.add_argument("--no-initial", action="store_true",
+                          help="Don't build every app on start, only rebuild apps as they change")
+    watching.set_defaults(func=cmd_watch)
+
+    verify = subparsers.add_parser("verify-stamp",
+                                   help="Check that a stamped launcher reads back the expected config")
+    verify.add_argument("exe", help="Path to a launcher built with --mode stamp")
+    verify.add_argument("--manifest", help="Compare against this app's entry in a manifest")
+    verify.set_defaults(func=cmd_verify_stamp)
+
+    trace = subparsers.add_parser("trace", help="Inspect the per-stage build timing trace")
+    trace_commands = trace.add_subparsers(dest="trace_command", required=True)
+    summarize = trace_commands.add_parser("summarize", help="Print p50/p95 duration per build stage")
+    summarize.add_argument("trace", nargs="?", default=os.path.join(os.getcwd(), "output", "build_trace.jsonl"),
+                           help="Trace file (default: ./output/build_trace.jsonl)")
+    summarize.add_argument("--by", choices=["toolchain", "mode", "packaging", "workspace", "optimize", "host"],
+                           default=None,
+                           help="Summarize each toolchain/mode/packaging/workspace/optimization profile/host "
+                                "separately")
+    summarize.add_argument("--last", type=int, default=None, help="Only use the last N builds")
+    summarize.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    summarize.set_defaults(func=cmd_trace_summarize)
+
+    listing = subparsers.add_parser("list", help="List built launchers from the artifact registry")
+    listing.add_argument("name", nargs="?", default=None, help="Only this app (its folder name)")
+    listing.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "output"),
+                         help="Output root folder (default: ./output)")
+    listing.add_argument("--json", action="store_true", help="Print the launchers as JSON")
+    listing.add_argument("--prune", action="store_true",
+                         help="Forget launchers that were deleted and free their stored files")
+    listing.add_argument("--verify", action="store_true",
+                         help="Re-hash stored files and report any that changed (exit code 1)")
+    listing.set_defaults(func=cmd_list)
+
+    icon = subparsers.add_parser("icon", help="Check icon files or pack PNG frames into an ICO (no Pillow needed)")
+    icon_commands = icon.add_subparsers(dest="icon_command", required=True)
+    inspect = icon_commands.add_parser("inspect", help="Print the sizes and bit depths in .ico/.png files")
+    inspect.add_argument("files", nargs="+", help="Icon files to check (exit code 1 if any is unusable)")
+    inspect.add_argument("--json", action="store_true", help="Print the frames as JSON")
+    inspect.set_defaults(func=cmd_icon_inspect)
+    pack = icon_commands.add_parser("pack", help="Write a multi-size ICO from pre-sized square PNGs")
+    pack.add_argument("ico", help="ICO file to write")
+    pack.add_argument("pngs", nargs="+", help="One PNG per size, each square and at most 256x256")
+    pack.set_defaults(func=cmd_icon_pack)
+
+    telemetry = subparsers.add_parser("telemetry", help="Work with launch telemetry collected from users' machines")
+    telemetry_commands = telemetry.add_subparsers(dest="telemetry_command", required=True)
+    aggregate = telemetry_commands.add_parser("aggregate", help="Print launch latency percentiles per app and version")
+    aggregate.add_argument("paths", nargs="+",
+                           help="launches.jsonl files, or folders holding them (searched recursively)")
+    aggregate.add_argument("--by", default="app,launcher",
+                           help="Comma-separated grouping: app, launcher, bundle, browser, outcome "
+                                "(default: app,launcher)")
+    aggregate.add_argument("--json", action="store_true", help="Print the percentiles as JSON")
+    aggregate.set_defaults(func=cmd_telemetry_aggregate)
+
+    browser_args = subparsers.add_parser("args", help="Print the browser command line each launcher will run")
+    browser_args.add_argument("manifest", help="Path to manifest.json or manifest.toml")
+    browser_args.add_argument("--browser", default="msedge.exe", help="Browser path to show (default: msedge.exe)")
+    browser_args.add_argument("--json", action="store_true", help="Print the argv lists as JSON")
+    browser_args.set_defaults(func=cmd_args)
+
+    serve = subparsers.add_parser("serve", help="Run a local HTTP/JSON build service")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765; 0 picks one)")
+    serve.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "output"),
+                       help="Output root folder; each job builds into jobs/<id> (default: ./output)")
+    serve.add_argument("-j", "--jobs", type=int, default=None,
+                       help="Builds running at once (default: number of CPU cores)")
+    serve.add_argument("--timeout", type=float, default=None,
+                       help="Cancel builds running longer than this many seconds (default: no limit)")
+    serve.add_argument("--mode", choices=build_engine.BUILD_MODES, default="standard",
+                       help="Build mode for every job (see build --mode)")
+    serve.add_argument("--no-cache", action="store_true", help="Don't read or write the build cache")
+    serve.add_argument("--cache-dir", default=None,
+                       help="Build cache folder (default: per-user cache, or WEBAPP_BUILDER_CACHE)")
+    serve.add_argument("--no-trace", action="store_true",
+                       help="Don't append timing records to build_trace.jsonl in the output folder")
+    serve.add_argument("--no-store", action="store_true",
+                       help="Don't deduplicate launchers or register them in the artifact store")
+    add_scratch_arguments(serve)
+    add_size_arguments(serve)
+    serve.set_defaults(func=cmd_serve)
+
+    worker = subparsers.add_parser("worker", help="Build shards of a manifest for a `distribute` coordinator")
+    worker.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    worker.add_argument("--port", type=int, default=8766, help="Port to listen on (default: 8766; 0 picks one)")
+    worker.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "output"),
+                        help="Work folder; shards build in shards/<id> and are removed once sent (default: ./output)")
+    worker.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Builds running at once (default: number of CPU cores)")
+    worker.add_argument("--no-cache", action="store_true", help="Don't read or write the build cache")
+    worker.add_argument("--cache-dir", default=None,
+                        help="Build cache folder (default: per-user cache, or WEBAPP_BUILDER_CACHE)")
+    worker.add_argument("--no-trace", action="store_true",
+                        help="Don't append timing records to build_trace.jsonl in the work folder")
+    add_scratch_arguments(worker)
+    worker.set_defaults(func=cmd_worker)
+
+    distribute = subparsers.add_parser("distribute", help="Build a manifest on several build workers")
+    distribute.add_argument("manifest", help="Path to manifest.json or manifest.toml")
+    distribute.add_argument("-w", "--worker", action="append", default=[], metavar="HOST:PORT",
+                            help="A worker started with `worker` (repeat for each)")
+    distribute.add_argument("--local", type=int, default=0, metavar="N",
+                            help="Also start N worker processes on this machine for the run")
+    distribute.add_argument("--local-jobs", type=int, default=None,
+                            help="Builds at once per local worker (default: number of CPU cores)")
+    distribute.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "output"),
+                            help="Output root folder (default: ./output)")
+    distribute.add_argument("--mode", choices=build_engine.BUILD_MODES, default="standard",
+                            help="Build mode on the workers (see build --mode)")
+    distribute.add_argument("--optimize", choices=OPTIMIZE_PROFILES, default="default",
+                            help="Optimization profile on the workers (see build --optimize)")
+    distribute.add_argument("--shard-size", type=int, default=None,
+                            help="Apps per shard (default: the worker's job count)")
+    distribute.add_argument("--retries", type=int, default=2,
+                            help="How often an app lost with a worker is sent to another one (default: 2)")
+    distribute.add_argument("--timeout", type=float, default=60.0,
+                            help="Drop a worker that has sent nothing for this many seconds (default: 60)")
+    distribute.add_argument("--no-store", action="store_true",
+                            help="Don't deduplicate launchers or register them in the artifact store")
+    distribute.add_argument("-v", "--verbose", action="store_true", help="Print the workers' status lines")
+    distribute.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    distribute.set_defaults(func=cmd_distribute)
+
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+PNG -> ICO conversion with a content-addressed cache.
+
+Converted icons are cached by a hash of the PNG bytes and the conversion
+parameters, so apps sharing a logo convert it only once. Each ICO size is
+produced from a pre-downscale chain (repeated 2x box reductions, then one
+Lanczos resize) rather than resizing the full-size source for every size.
+
+During batch builds the unique PNGs of a manifest are converted up front in a
+process pool (IconPipeline.prefetch) and the per-app builds then hit the cache.
+"""
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+
+from build_cache import default_cache_dir
+from icon_format import IconFormatError, pack_pngs
+
+# Bump when the conversion algorithm changes so cached icons are regenerated
+PIPELINE_VERSION = 1
+
+# Sizes embedded in ICO files converted from PNG
+ICON_SIZES = [(256, 256), (128, 128), (64, 64), (48, 48), (32, 32), (16, 16)]
+
+
+class IconError(Exception):
+    """Raised when an icon cannot be converted."""
+
+
+class IconStats:
+    """Conversion counters for one session (a GUI session or one CLI run)."""
+
+    def __init__(self):
+        self.converted = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def record(self, hit, seconds):
+        if hit:
+            self.hits += 1
+        else:
+            self.converted += 1
+            self.seconds += seconds
+
+    def __str__(self):
+        return f"{self.converted} converted in {self.seconds:.2f}s, {self.hits} from cache"
+
+
+def downscale_chain(img, sizes=ICON_SIZES):
+    """
+    Return one RGBA frame per size (largest first). The source is padded to a
+    square, then halved with box reductions while it is at least twice the
+    target size, and each frame is finished with a single Lanczos resize.
+    """
+    from PIL import Image
+
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+
+    # Pad non-square images instead of distorting them
+    if img.width != img.height:
+        side = max(img.width, img.height)
+        canvas = Image.new('RGBA', (side, side), (0, 0, 0, 0))
+        canvas.paste(img, ((side - img.width) // 2, (side - img.height) // 2))
+        img = canvas
+
+    frames = []
+    current = img
+    for width, height in sorted(sizes, reverse=True):
+        while current.width >= 2 * width and current.height >= 2 * height:
+            current = current.reduce(2)
+        if current.size == (width, height):
+            frames.append(current)
+        else:
+            frames.append(current.resize((width, height), Image.LANCZOS))
+    return frames
+
+
+def convert_png_to_ico(png_path, ico_path, sizes=ICON_SIZES):
+    """
+    Convert PNG file to ICO format with multiple sizes. Without Pillow, a PNG
+    that already fits an ICO frame is wrapped as a single-size ICO instead.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        try:
+            pack_pngs([png_path], ico_path)
+        except IconFormatError as e:
+            raise IconError(f"Failed to convert PNG to ICO (Pillow is not installed):\n{str(e)}")
+        return
+
+    try:
+        with Image.open(png_path) as img:
+            img.load()
+            frames = downscale_chain(img, sizes)
+        frames[0].save(ico_path, format='ICO', sizes=[f.size for f in frames],
+                       append_images=frames[1:])
+    except Exception as e:
+        raise IconError(f"Failed to convert PNG to ICO:\n{str(e)}")
+
+
+def _pillow_version():
+    try:
+        import PIL
+        return PIL.__version__
+    except ImportError:
+        return "none"
+
+
+def _atomic_write_from(src_writer, dest_path):
+    """Call src_writer(tmp_path) and move the result into dest_path atomically."""
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), suffix=".tmp.ico")
+    os.close(fd)
+    try:
+        src_writer(tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class IconPipeline:
+    """Cached PNG -> ICO conversion, optionally fanned out over a process pool."""
+
+    def __init__(self, root=None, sizes=ICON_SIZES):
+        self.root = root or os.path.join(default_cache_dir(), "icons")
+        self.sizes = list(sizes)
+        self.stats = IconStats()
+
+    def key(self, png_path):
+        h = hashlib.sha256()
+        h.update(f"webapp-icon:{PIPELINE_VERSION}:{_pillow_version()}:{self.sizes}\0".encode())
+        with open(png_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.ico")
+
+    def convert(self, png_path, ico_path=None):
+        """
+        Make sure png_path is converted and cached; copy the ICO to ico_path if given.
+        Returns (cache_hit, seconds).
+        """
+        start = time.monotonic()
+        entry = self.entry_path(self.key(png_path))
+        hit = os.path.exists(entry)
+        if not hit:
+            _atomic_write_from(lambda tmp: convert_png_to_ico(png_path, tmp, self.sizes), entry)
+        if ico_path:
+            shutil.copyfile(entry, ico_path)
+        seconds = time.monotonic() - start
+        self.stats.record(hit, seconds)
+        return hit, seconds
+
+    def prefetch(self, png_paths, jobs=None):
+        """
+        Convert the unique PNGs in png_paths across a process pool so later builds
+        hit the cache. Errors are left for the individual builds to report.
+        """
+        unique = sorted({os.path.abspath(p) for p in png_paths if os.path.isfile(p)})
+        if not unique:
+            return self.stats
+
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(unique)))
+        if workers == 1:
+            for path in unique:
+                try:
+                    self.convert(path)
+                except IconError:
+                    pass
+            return self.stats
+
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_prefetch_one, self.root, self.sizes, path) for path in unique]
+            for future in as_completed(futures):
+                try:
+                    hit, seconds = future.result()
+                except Exception:
+                    continue
+                self.stats.record(hit, seconds)
+        return self.stats
+
+
+def _prefetch_one(root, sizes, png_path):
+    pipeline = IconPipeline(root, sizes)
+    return pipeline.convert(png_path)
@@ -0,0 +1,88 @@
+"""
+Aggregation of launcher telemetry logs.
+
+Launchers built with telemetry on (main_edge.TELEMETRY) append one JSON line
+per launch to %LOCALAPPDATA%\\WebAppBuilder\\telemetry\\launches.jsonl, rolled
+over to launches.jsonl.1. Collect those files from users' machines into one
+folder (any layout) and `app_builder.py telemetry aggregate FOLDER` prints
+latency percentiles for each launch milestone, per app and launcher version.
+
+Milestones are milliseconds since the launcher process was created (the
+onefile bootloader, for onefile launchers): meipass (Python running, bundle
+unpacked), browser (browser resolved), popen (browser spawned), shortcut
+(taskbar ID and Start Menu shortcut done) and handover (passed to a running
+single instance).
+"""
+import os
+import re
+import json
+import collections
+
+from build_trace import percentile
+
+MILESTONES = ("meipass", "browser", "popen", "shortcut", "handover")
+GROUP_KEYS = ("app", "launcher", "bundle", "browser", "outcome")
+PERCENTILES = (50, 90, 99)
+
+# launches.jsonl and its rolled-over launches.jsonl.1
+LOG_NAME = re.compile(r"\.jsonl(\.\d+)?$")
+
+
+def log_files(paths):
+    """Telemetry log files among paths; folders are searched recursively."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                files.extend(os.path.join(dirpath, name) for name in sorted(filenames) if LOG_NAME.search(name))
+        else:
+            files.append(path)
+    return files
+
+
+def load_launches(paths):
+    """
+    Read the launch records in paths. Returns (records, skipped) where skipped
+    counts lines that aren't launcher telemetry (corrupt or cut off).
+    """
+    records = []
+    skipped = 0
+    for path in log_files(paths):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                if not isinstance(record, dict) or not isinstance(record.get("ms"), dict):
+                    skipped += 1
+                    continue
+                records.append(record)
+    return records, skipped
+
+
+def group_launches(records, by=("app", "launcher")):
+    """Split records by a tuple of GROUP_KEYS; keys are tuples of their values."""
+    groups = collections.defaultdict(list)
+    for record in records:
+        groups[tuple(str(record.get(key) or "-") for key in by)].append(record)
+    return collections.OrderedDict(sorted(groups.items()))
+
+
+def summarize_launches(records):
+    """Return rows of (milestone, count, p50, p90, p99, max) in ms, in MILESTONES order."""
+    samples = collections.defaultdict(list)
+    for record in records:
+        for name, value in record["ms"].items():
+            if isinstance(value, (int, float)):
+                samples[name].append(value)
+    rows = []
+    for name in sorted(samples, key=lambda n: (MILESTONES.index(n) if n in MILESTONES else len(MILESTONES), n)):
+        values = samples[name]
+        rows.append((name, len(values)) + tuple(percentile(values, pct) for pct in PERCENTILES) + (max(values),))
+    return rows
@@ -0,0 +1,268 @@
+"""
+Size-optimized launcher builds and per-build size reports.
+
+The launcher only needs a handful of stdlib modules, but PyInstaller's
+analysis follows every import it can see, so a default build carries test
+frameworks, mail and HTTP packages and, on most machines, Tcl/Tk. The "size"
+profile excludes those modules (and can compress binaries with UPX); a
+smaller onefile exe also unpacks faster on every launch.
+
+Excluding a module the launcher actually imports produces an exe that dies at
+startup, so size builds are checked twice: the launcher template's imports
+are compared with the exclude list before PyInstaller runs, and PyInstaller's
+warn-<name>.txt is read afterwards for required modules that ended up
+missing or excluded.
+
+size_breakdown() reads PyInstaller's archive table of contents from a built
+launcher and splits its bytes into bootloader, PYZ, binaries and data.
+"""
+import os
+import re
+import ast
+import sys
+import shutil
+import struct
+import hashlib
+
+OPTIMIZE_PROFILES = ("default", "size")
+
+# Modules the launcher never uses but analysis tends to pull in
+SIZE_EXCLUDES = (
+    "tkinter", "_tkinter", "PIL", "email", "http", "xml", "xmlrpc", "unittest", "pydoc",
+    "doctest", "pdb", "lib2to3", "distutils", "setuptools", "pkg_resources", "sqlite3",
+    "asyncio", "multiprocessing", "concurrent", "test", "idlelib", "ensurepip", "venv",
+    "curses", "turtle",
+)
+
+# Only present on Windows; PyInstaller reports them missing on other build hosts
+WINDOWS_ONLY_MODULES = ("_winapi", "msvcrt", "winreg", "_overlapped", "nt")
+
+# PyInstaller's CArchive cookie (appended to the exe) and TOC entry layouts
+COOKIE_MAGIC = b"MEI\014\013\012\013\016"
+COOKIE_FORMAT = "!8sIIii64s"
+TOC_ENTRY_FORMAT = "!iIIIBc"
+# The cookie is near the end: only a stamped config or a signature follows it
+COOKIE_SEARCH_BYTES = 64 * 1024
+
+# Archive entry type codes -> report category
+ENTRY_CATEGORIES = {
+    "z": "pyz", "Z": "pyz",
+    "b": "binaries", "n": "binaries",
+    "x": "data",
+    "s": "scripts", "m": "scripts", "M": "scripts",
+}
+
+BINARY_EXTENSIONS = (".dll", ".pyd", ".so", ".dylib")
+
+# Report order; "other" is the archive's own TOC, runtime options and trailers
+SIZE_PARTS = ("bootloader", "pyz", "binaries", "data", "scripts", "other")
+
+WARN_LINE = re.compile(r"^(missing|excluded) module named (\S+) - imported by (.*)$")
+IMPORTER = re.compile(r"^(.*?) \(([^()]*)\)$")
+
+
+class SizeError(Exception):
+    """Raised when a size-optimized build would drop a module the launcher needs."""
+
+
+# ---------- Profile ----------
+
+class SizeProfile:
+    """
+    Module excludes and UPX settings for a size-optimized build. The same
+    settings go on the PyInstaller command line (standard builds), into the
+    shared workspace's spec file and into the stamp stub build.
+    """
+
+    def __init__(self, excludes=SIZE_EXCLUDES, compress=False, upx_dir=None):
+        self.excludes = tuple(excludes)
+        self.compress = compress
+        self.upx_dir = upx_dir
+
+    def cli_args(self):
+        args = [f"--exclude-module={name}" for name in self.excludes]
+        if not self.compress:
+            args.append("--noupx")
+        elif self.upx_dir:
+            args.append(f"--upx-dir={self.upx_dir}")
+        return args
+
+    def spec_values(self):
+        """(excludes, upx) for a spec file. The UPX folder can't be set there; it must be on PATH."""
+        return list(self.excludes), bool(self.compress)
+
+    def key(self):
+        h = hashlib.sha256()
+        h.update("\0".join(self.excludes).encode("utf-8"))
+        h.update(f"\0upx={bool(self.compress)}".encode())
+        return h.hexdigest()[:16]
+
+    def check_upx(self):
+        """Raise SizeError if compression is on but no upx executable can be found."""
+        if self.compress and shutil.which("upx", path=self.upx_dir) is None:
+            where = self.upx_dir or "PATH"
+            raise SizeError(f"UPX compression requested but upx was not found in {where}")
+
+    def check_template(self, template_source):
+        """Raise SizeError if the launcher template imports an excluded module."""
+        conflicts = sorted(name for name in required_modules(template_source) if self.excludes_module(name))
+        if conflicts:
+            raise SizeError("The size profile excludes module(s) the launcher imports: " + ", ".join(conflicts))
+
+    def excludes_module(self, name):
+        return any(name == ex or name.startswith(ex + ".") for ex in self.excludes)
+
+
+def required_modules(source):
+    """Modules the source imports outside try blocks (which would fail if they were missing)."""
+    tree = ast.parse(source)
+    found = set()
+
+    def visit(node, guarded):
+        if isinstance(node, ast.Try):
+            guarded = True
+        if not guarded:
+            if isinstance(node, ast.Import):
+                found.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                found.add(node.module)
+        for child in ast.iter_child_nodes(node):
+            visit(child, guarded)
+
+    visit(tree, False)
+    return found
+
+
+# ---------- Build warnings ----------
+
+def read_warnings(warn_path):
+    """
+    Parse PyInstaller's warn-<name>.txt into (kind, module, importers) tuples,
+    kind being "missing" or "excluded" and importers a list of
+    (importer, {"top-level", "delayed", "optional", ...}).
+    """
+    warnings = []
+    with open(warn_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            match = WARN_LINE.match(line.strip())
+            if not match:
+                continue
+            importers = []
+            for part in match.group(3).split(", "):
+                m = IMPORTER.match(part.strip())
+                if m:
+                    importers.append((m.group(1), {k.strip() for k in m.group(2).split(",")}))
+            warnings.append((match.group(1), match.group(2), importers))
+    return warnings
+
+
+def missing_required(warn_path, script_path, required):
+    """
+    Required modules a finished build lacks, as "module (reason)" strings:
+    anything the launcher script imports without a fallback that PyInstaller
+    reports missing or excluded, and excluded modules a required module
+    imports at top level.
+    """
+    script_names = {script_path, os.path.basename(script_path),
+                    os.path.splitext(os.path.basename(script_path))[0], "__main__"}
+    problems = []
+    for kind, module, importers in read_warnings(warn_path):
+        if sys.platform != 'win32' and module.split(".")[0] in WINDOWS_ONLY_MODULES:
+            continue
+        for importer, kinds in importers:
+            if "optional" in kinds:
+                continue
+            if importer in script_names:
+                problems.append(f"{module} ({kind}, imported by the launcher)")
+                break
+            if kind == "excluded" and importer in required and "top-level" in kinds:
+                problems.append(f"{module} (excluded, imported by {importer})")
+                break
+    return problems
+
+
+# ---------- Size report ----------
+
+def size_breakdown(exe_path, folder=None):
+    """
+    Split a launcher's bytes into SIZE_PARTS (plus "total"). The archive
+    appended to the exe is read from its table of contents; for onedir builds,
+    pass the launcher folder and the files next to the exe are counted as
+    well. Returns None if the exe has no PyInstaller archive and no folder.
+    """
+    sizes = dict.fromkeys(SIZE_PARTS, 0)
+    archive = _archive_parts(exe_path)
+    if archive is None and folder is None:
+        return None
+    if archive is None:
+        sizes["bootloader"] = os.path.getsize(exe_path)
+    else:
+        for part, size in archive.items():
+            sizes[part] += size
+
+    if folder is not None:
+        exe_real = os.path.realpath(exe_path)
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.realpath(path) == exe_real:
+                    continue
+                lower = filename.lower()
+                if lower.endswith(".pyz") or lower == "base_library.zip":
+                    part = "pyz"
+                elif lower.endswith(BINARY_EXTENSIONS) or ".so." in lower:
+                    part = "binaries"
+                else:
+                    part = "data"
+                sizes[part] += os.path.getsize(path)
+
+    sizes["total"] = sum(sizes[part] for part in SIZE_PARTS)
+    return sizes
+
+
+def _archive_parts(exe_path):
+    file_size = os.path.getsize(exe_path)
+    cookie_size = struct.calcsize(COOKIE_FORMAT)
+    with open(exe_path, "rb") as f:
+        search = min(file_size, COOKIE_SEARCH_BYTES)
+        f.seek(file_size - search)
+        tail = f.read(search)
+        pos = tail.rfind(COOKIE_MAGIC)
+        if pos < 0 or pos + cookie_size > len(tail):
+            return None
+        _, pkg_len, toc_offset, toc_len, _, _ = struct.unpack_from(COOKIE_FORMAT, tail, pos)
+        cookie_end = file_size - search + pos + cookie_size
+        pkg_start = cookie_end - pkg_len
+        if pkg_start < 0 or toc_offset + toc_len > pkg_len:
+            return None
+        f.seek(pkg_start + toc_offset)
+        toc = memoryview(f.read(toc_len))
+
+    parts = dict.fromkeys(SIZE_PARTS, 0)
+    parts["bootloader"] = pkg_start
+    entry_size = struct.calcsize(TOC_ENTRY_FORMAT)
+    offset = 0
+    accounted = 0
+    while offset + entry_size <= len(toc):
+        entry_len, _, length, _, _, typecode = struct.unpack_from(TOC_ENTRY_FORMAT, toc, offset)
+        if entry_len < entry_size:
+            return None  # corrupt table of contents
+        category = ENTRY_CATEGORIES.get(typecode.decode("ascii", "replace"), "other")
+        parts[category] += length
+        accounted += length
+        offset += entry_len
+    # TOC, cookie and whatever follows the archive (stamped config, signature)
+    parts["other"] += file_size - pkg_start - accounted
+    return parts
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.0f} KB"
+
+
+def format_breakdown(sizes):
+    """One line: total, then every non-empty part."""
+    parts = ", ".join(f"{part} {format_size(sizes[part])}" for part in SIZE_PARTS if sizes.get(part))
+    return f"{format_size(sizes['total'])} ({parts})"
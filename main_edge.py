@@ -1,8 +1,16 @@
 import os
 import sys
+import json
+import time
+import shutil
 import subprocess
 import ctypes
 
+# Start of the launcher, for the time-to-spawn figure (Python is up and, in
+# a PyInstaller bundle, _MEIPASS is unpacked by now)
+LAUNCH_STARTED = time.perf_counter()
+LAUNCH_STARTED_TIME = time.time()
+
 APP_NAME = "NGWTM"
 APP_URL = "https://ngwtm.intel.com"
 ICON_FILE = "favicon.ico"
@@ -11,6 +19,129 @@ ICON_FILE = "favicon.ico"
 WINDOW_WIDTH = 1200          # Window width in pixels
 WINDOW_HEIGHT = 800          # Window height in pixels
 WINDOW_FRAMELESS = True     # Set to True to remove title bar
+CREATE_SHORTCUT = True       # Create/refresh the Start Menu shortcut on launch
+APP_ID = None                # Taskbar AppUserModelID (default: Intel.<name>.WebApp.1.0)
+SINGLE_INSTANCE = False      # A second launch hands over to the running one instead of opening another window
+TELEMETRY = False            # Keep a local log of launch timings (see TELEMETRY_FILE)
+
+# Browser profile: a dedicated profile keeps this app's HTTP cache apart from normal browsing
+APP_PROFILE = False          # Use a profile of its own (default folder: see PROFILES_FOLDER)
+PROFILE_DIR = None           # Profile folder instead of the default; %VARS% are expanded
+DISK_CACHE_MB = None         # Disk cache size in MB (None: browser default)
+DISK_CACHE_DIR = None        # Disk cache folder (None: inside the profile); %VARS% are expanded
+
+# Extra browser switches: named presets (see FLAG_PRESETS) and custom flags, in that order
+BROWSER_PRESETS = []
+BROWSER_FLAGS = []
+
+# Browser selection
+BROWSER_PREFERENCE = ["edge", "edge-beta", "edge-dev", "chrome", "chromium"]
+BROWSER_PATH = None          # Custom browser exe, tried first (or where "custom" is in the list)
+
+# Launchers built by Web App Builder carry their settings either stamped onto
+# the end of the exe (trailer) or bundled as this file. They override the
+# defaults above, so one template serves every app.
+CONFIG_FILE = "app_config.json"
+CONFIG_TRAILER_MAGIC = b"WEBAPPCF"   # trailer: <config json><uint32 LE length><magic>
+CONFIG_KEYS = (
+    "APP_NAME", "APP_URL", "WINDOW_WIDTH", "WINDOW_HEIGHT",
+    "WINDOW_FRAMELESS", "CREATE_SHORTCUT", "APP_ID",
+    "BROWSER_PREFERENCE", "BROWSER_PATH", "SINGLE_INSTANCE",
+    "APP_PROFILE", "PROFILE_DIR", "DISK_CACHE_MB", "DISK_CACHE_DIR",
+    "BROWSER_PRESETS", "BROWSER_FLAGS", "TELEMETRY",
+)
+
+# Browser channels BROWSER_PREFERENCE can name: display name and install
+# locations as (environment variable of the base folder, relative path)
+BROWSER_CHANNELS = {
+    "edge": ("Microsoft Edge", (
+        ("ProgramFiles(x86)", r"Microsoft\Edge\Application\msedge.exe"),
+        ("ProgramFiles", r"Microsoft\Edge\Application\msedge.exe"),
+        ("LOCALAPPDATA", r"Microsoft\Edge\Application\msedge.exe"),
+    )),
+    "edge-beta": ("Microsoft Edge Beta", (
+        ("ProgramFiles(x86)", r"Microsoft\Edge Beta\Application\msedge.exe"),
+        ("ProgramFiles", r"Microsoft\Edge Beta\Application\msedge.exe"),
+        ("LOCALAPPDATA", r"Microsoft\Edge Beta\Application\msedge.exe"),
+    )),
+    "edge-dev": ("Microsoft Edge Dev", (
+        ("ProgramFiles(x86)", r"Microsoft\Edge Dev\Application\msedge.exe"),
+        ("ProgramFiles", r"Microsoft\Edge Dev\Application\msedge.exe"),
+        ("LOCALAPPDATA", r"Microsoft\Edge Dev\Application\msedge.exe"),
+    )),
+    "chrome": ("Google Chrome", (
+        ("ProgramFiles", r"Google\Chrome\Application\chrome.exe"),
+        ("ProgramFiles(x86)", r"Google\Chrome\Application\chrome.exe"),
+        ("LOCALAPPDATA", r"Google\Chrome\Application\chrome.exe"),
+    )),
+    "chromium": ("Chromium", (
+        ("LOCALAPPDATA", r"Chromium\Application\chrome.exe"),
+        ("ProgramFiles", r"Chromium\Application\chrome.exe"),
+        ("ProgramFiles(x86)", r"Chromium\Application\chrome.exe"),
+    )),
+}
+CUSTOM_BROWSER = "custom"
+
+# Switch presets BROWSER_PRESETS can name
+FLAG_PRESETS = {
+    # No background traffic or add-ons: nothing runs but the app
+    "lean": (
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-extensions",
+        "--disable-sync",
+        "--disable-default-apps",
+        "--disable-features=MediaRouter,OptimizationHints",
+    ),
+    # Fewer, shared renderer processes for crowded VDI hosts
+    "low-memory": (
+        "--renderer-process-limit=2",
+        "--process-per-site",
+        "--enable-low-end-device-mode",
+    ),
+}
+
+# Switches that take a comma-separated list; the browser only reads the last
+# occurrence, so every value is merged into one
+LIST_SWITCHES = ("--enable-features", "--disable-features")
+
+# Per-user cache of the resolved browser, shared by every launcher
+BROWSER_CACHE_VERSION = 1
+
+# Per-user stamp of the shortcuts each launcher last wrote
+SHORTCUT_STAMP_VERSION = 1
+
+# Full path of a browser to use instead (portable installs, benchmarks)
+BROWSER_ENV = "WEBAPP_BROWSER"
+
+# Browser commands looked up on PATH when no installed Edge/Chrome is found
+PATH_BROWSERS = (
+    ("msedge", "Microsoft Edge"),
+    ("chrome", "Google Chrome"),
+)
+
+# Dedicated profiles live in %LOCALAPPDATA%\<PROFILES_FOLDER>\<app>
+PROFILES_FOLDER = r"WebAppBuilder\Profiles"
+
+# Seconds a second launch waits for the running instance to answer
+INSTANCE_TIMEOUT = 2.0
+
+# Append one JSON line per launch (app, browser, spawn_ms) to this file
+LAUNCH_LOG_ENV = "WEBAPP_LAUNCH_LOG"
+
+# Reported with launch telemetry; bump when this template changes
+LAUNCHER_VERSION = "1.0.0"
+
+# Launch telemetry: one JSON line per launch in a per-user log, rolled over
+# to <file>.1 beyond TELEMETRY_MAX_BYTES. "0"/"1" in TELEMETRY_ENV turns it
+# off/on on this machine whatever the app was built with.
+TELEMETRY_ENV = "WEBAPP_TELEMETRY"
+TELEMETRY_FILE = os.path.join("telemetry", "launches.jsonl")
+TELEMETRY_MAX_BYTES = 256 * 1024
+TELEMETRY_VERSION = 1
+
+# perf_counter() at each launch milestone; only written out once the browser is up
+LAUNCH_MARKS = {}
 
 # ---------- Utilities ----------
 
@@ -24,176 +155,946 @@ def resource_path(rel_path):
         base = os.path.abspath(".")
     return os.path.join(base, rel_path)
 
-def create_shortcut(lpath, target, args="", icon=None, desc=None):
+def read_config_trailer(exe_path):
+    """
+    Read an app config stamped onto the end of an exe.
+    Returns the config dict, or None if the file has no trailer.
+    """
+    footer_size = 4 + len(CONFIG_TRAILER_MAGIC)
+    try:
+        with open(exe_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size < footer_size:
+                return None
+            f.seek(size - footer_size)
+            footer = f.read(footer_size)
+            if footer[4:] != CONFIG_TRAILER_MAGIC:
+                return None
+            length = int.from_bytes(footer[:4], "little")
+            if length > size - footer_size:
+                return None
+            f.seek(size - footer_size - length)
+            return json.loads(f.read(length).decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def load_config():
     """
-    Create a Windows .lnk shortcut using COM.
-    Returns True on success, False on failure.
+    Apply the app config over the module defaults: the trailer stamped onto
+    this exe first, then the bundled config file.
+    Returns True if a config was found.
     """
+    config = None
+    if getattr(sys, 'frozen', False):
+        config = read_config_trailer(sys.executable)
+
+    if config is None:
+        config_path = resource_path(CONFIG_FILE)
+        if not os.path.exists(config_path):
+            return False
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+    for key in CONFIG_KEYS:
+        if key in config:
+            globals()[key] = config[key]
+    return True
+
+def user_cache_path(filename, env=None):
+    """Per-user cache file (%LOCALAPPDATA%\\WebAppBuilder, or ~/.cache elsewhere)."""
+    env = os.environ if env is None else env
+    if env.get("LOCALAPPDATA"):
+        return os.path.join(env["LOCALAPPDATA"], "WebAppBuilder", filename)
+    base = env.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "web-app-builder", filename)
+
+def file_sha256(path):
+    import hashlib
+    digest = hashlib.sha256()
     try:
-        import win32com.client
-        shell = win32com.client.Dispatch("WScript.Shell")
-        shortcut = shell.CreateShortCut(lpath)
-        shortcut.Targetpath = target
-        shortcut.Arguments = args
-        
-        # Set icon - for compiled exe, use the exe itself as icon source
-        if icon and os.path.exists(icon):
-            if icon.lower().endswith('.ico'):
-                shortcut.IconLocation = icon
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def message_box(title, text, flags=0x40 | 0x0):
+    ctypes.windll.user32.MessageBoxW(0, text, title, flags)
+
+# ---------- Browser ----------
+
+def browser_cache_path(env=None):
+    """Per-user browser cache file, shared by every launcher."""
+    return user_cache_path("browser_cache.json", env)
+
+def browser_locations(preference=None, custom_path=None):
+    """
+    Yield (name, base_env_var, relative_path) for every candidate in preference
+    order. The custom path comes first unless the list places "custom" itself;
+    its base_env_var is None. Unknown channels are skipped.
+    """
+    order = list(BROWSER_PREFERENCE if preference is None else preference)
+    if custom_path and CUSTOM_BROWSER not in order:
+        order.insert(0, CUSTOM_BROWSER)
+    for channel in order:
+        if channel == CUSTOM_BROWSER:
+            if custom_path:
+                yield "Custom browser", None, custom_path
+        elif channel in BROWSER_CHANNELS:
+            name, locations = BROWSER_CHANNELS[channel]
+            for base_var, rel_path in locations:
+                yield name, base_var, rel_path
+
+class BrowserResolver:
+    """
+    Finds the browser executable for the preference list.
+
+    The result is cached per user together with the exe's mtime; a later launch
+    only stats that one file and probes every candidate again when it is gone or
+    changed (e.g. after a browser update). env and cache_path can be pointed at
+    a fake tree, so the resolver runs the same on any OS.
+    """
+
+    def __init__(self, preference=None, custom_path=None, env=None, cache_path=None):
+        self.preference = list(BROWSER_PREFERENCE if preference is None else preference)
+        self.custom_path = custom_path or None
+        self.env = os.environ if env is None else env
+        self.cache_path = cache_path or browser_cache_path(self.env)
+        self.probes = 0   # files checked by the last resolve()
+
+    def candidates(self):
+        """Yield (name, path) with the base folders expanded from env."""
+        for name, base_var, rel_path in browser_locations(self.preference, self.custom_path):
+            if base_var is None:
+                yield name, os.path.expandvars(rel_path)
+                continue
+            base = self.env.get(base_var)
+            if base:
+                yield name, os.path.join(base, *rel_path.split("\\"))
+
+    def resolve(self):
+        """Return (path, name), or (None, None) if no browser is installed."""
+        self.probes = 0
+        override = self.env.get(BROWSER_ENV)
+        if override and os.path.isfile(override):
+            return override, "Custom browser"
+
+        cached = self._read_cache()
+        if cached is not None:
+            return cached
+
+        path, name = self.probe()
+        if path:
+            self._write_cache(path, name)
+        return path, name
+
+    def probe(self):
+        """Check every candidate in order, then PATH. Returns (path, name) or (None, None)."""
+        for name, path in self.candidates():
+            self.probes += 1
+            if os.path.isfile(path):
+                return path, name
+
+        # Last resort: a browser on PATH (portable installs)
+        for command, name in PATH_BROWSERS:
+            self.probes += 1
+            path = shutil.which(command, path=self.env.get("PATH"))
+            if path:
+                return path, name
+        return None, None
+
+    def _key(self):
+        return json.dumps([self.preference, self.custom_path])
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entry = data["entries"][self._key()]
+            if data.get("version") != BROWSER_CACHE_VERSION:
+                return None
+            self.probes += 1
+            if os.stat(entry["path"]).st_mtime != entry["mtime"]:
+                return None
+            return entry["path"], entry["name"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, path, name):
+        try:
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != BROWSER_CACHE_VERSION:
+                    raise ValueError()
+            except (OSError, ValueError):
+                data = {"version": BROWSER_CACHE_VERSION, "entries": {}}
+            data["entries"][self._key()] = {"path": path, "name": name, "mtime": os.stat(path).st_mtime}
+
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # the cache is only an optimisation
+
+def find_browser():
+    """
+    Find the browser to launch: WEBAPP_BROWSER if set, else the first installed
+    browser in BROWSER_PREFERENCE (Edge first - better Windows Integrated Auth
+    support), else one on PATH. Returns (path, name), or (None, None).
+    """
+    path, name = BrowserResolver(BROWSER_PREFERENCE, BROWSER_PATH).resolve()
+    if path:
+        print(f"Using {name} at: {path}")
+    return path, name
+
+def profile_folder_name(app_name):
+    """Folder name of an app's default profile (the app name, filesystem-safe)."""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in app_name).strip(".") or "app"
+
+def app_profile_dir(config, env=None):
+    """
+    Folder of an app's browser profile, or None to use the browser's default
+    profile. Single-instance apps always get one: in a shared profile the
+    spawned browser hands the window to the running browser and exits.
+    """
+    if config.get("PROFILE_DIR"):
+        return os.path.expandvars(config["PROFILE_DIR"])
+    if not config.get("APP_PROFILE") and not config.get("SINGLE_INSTANCE"):
+        return None
+    env = os.environ if env is None else env
+    folder = profile_folder_name(config["APP_NAME"])
+    if env.get("LOCALAPPDATA"):
+        return os.path.join(env["LOCALAPPDATA"], *PROFILES_FOLDER.split("\\"), folder)
+    return user_cache_path(os.path.join("profiles", folder), env)
+
+def profile_args(profile_dir=None, cache_size_mb=None, cache_dir=None):
+    """Browser switches for a profile folder and its disk cache."""
+    args = []
+    if profile_dir:
+        args.append(f"--user-data-dir={profile_dir}")
+    if cache_dir:
+        args.append(f"--disk-cache-dir={cache_dir}")
+    if cache_size_mb:
+        args.append(f"--disk-cache-size={int(cache_size_mb) * 1024 * 1024}")
+    return args
+
+def preset_flags(presets):
+    """Switches of the named presets, in order. Unknown names are skipped."""
+    flags = []
+    for name in presets or ():
+        flags.extend(FLAG_PRESETS.get(name, ()))
+    return flags
+
+def merge_list_switches(args):
+    """
+    Combine repeated --enable-features/--disable-features into one switch each
+    (at the first one's position), keeping every value once. Other arguments
+    are left alone.
+    """
+    values = {}
+    merged = []
+    for arg in args:
+        switch, _, value = arg.partition("=")
+        if switch not in LIST_SWITCHES:
+            merged.append(arg)
+            continue
+        if switch not in values:
+            values[switch] = []
+            merged.append(switch)
+        for item in value.split(","):
+            if item and item not in values[switch]:
+                values[switch].append(item)
+    return [f"{arg}={','.join(values[arg])}" if arg in values else arg for arg in merged]
+
+def build_browser_args(browser_path, url, name, width, height, frameless,
+                       profile_dir=None, cache_size_mb=None, cache_dir=None, flags=()):
+    """
+    Command line that opens url as an app window. flags (preset and custom
+    switches) go last. A pure function of its arguments.
+    """
+    args = [
+        browser_path,
+        f"--app={url}",
+        f"--window-name={name}",
+        f"--window-size={width},{height}",
+        "--no-first-run",
+        "--no-default-browser-check"
+    ]
+    args.extend(profile_args(profile_dir, cache_size_mb, cache_dir))
+    
+    # Add options for frameless window (removes title bar but keeps window controls)
+    if frameless:
+        # Use app mode with borderless for a cleaner look
+        # This removes the title bar but keeps minimize/maximize/close buttons
+        args.append("--app-auto-launched")
+        args.append("--disable-features=OverlayScrollbar")
+    args.extend(flags)
+    return merge_list_switches(args)
+
+def current_config():
+    """This launcher's settings (the defaults above with the loaded config applied)."""
+    return {key: globals()[key] for key in CONFIG_KEYS}
+
+def app_browser_args(browser_path, url=None, config=None, env=None):
+    """
+    build_browser_args for an app config (default: this launcher's own), with
+    its window, profile and flag settings. url defaults to the app URL.
+    """
+    config = current_config() if config is None else config
+    cache_dir = config.get("DISK_CACHE_DIR")
+    return build_browser_args(
+        browser_path, url or config["APP_URL"], config["APP_NAME"],
+        config["WINDOW_WIDTH"], config["WINDOW_HEIGHT"], config["WINDOW_FRAMELESS"],
+        profile_dir=app_profile_dir(config, env), cache_size_mb=config.get("DISK_CACHE_MB"),
+        cache_dir=os.path.expandvars(cache_dir) if cache_dir else None,
+        flags=preset_flags(config.get("BROWSER_PRESETS")) + list(config.get("BROWSER_FLAGS") or ()))
+
+# ---------- Shortcuts ----------
+
+class ShortcutBackend:
+    """Where shortcuts live. ShortcutKeeper only needs these three calls."""
+
+    def exists(self, lpath):
+        raise NotImplementedError
+
+    def remove(self, lpath):
+        raise NotImplementedError
+
+    def create(self, lpath, target, args="", icon=None, desc=None):
+        """Write the shortcut. Returns True on success, False on failure."""
+        raise NotImplementedError
+
+class ComShortcutBackend(ShortcutBackend):
+    """
+    Writes .lnk files through WScript.Shell. pywin32 is only imported when a
+    shortcut is actually written, so a launch that finds its shortcut up to
+    date never loads COM.
+    """
+
+    def exists(self, lpath):
+        return os.path.exists(lpath)
+
+    def remove(self, lpath):
+        os.remove(lpath)
+
+    def create(self, lpath, target, args="", icon=None, desc=None):
+        """
+        Create a Windows .lnk shortcut using COM.
+        Returns True on success, False on failure.
+        """
+        try:
+            import win32com.client
+            shell = win32com.client.Dispatch("WScript.Shell")
+            shortcut = shell.CreateShortCut(lpath)
+            shortcut.Targetpath = target
+            shortcut.Arguments = args
+
+            # Set icon - for compiled exe, use the exe itself as icon source
+            if icon and os.path.exists(icon):
+                if icon.lower().endswith('.ico'):
+                    shortcut.IconLocation = icon
+                elif target.lower().endswith('.exe'):
+                    shortcut.IconLocation = f"{target},0"
+                else:
+                    shortcut.IconLocation = icon
             elif target.lower().endswith('.exe'):
                 shortcut.IconLocation = f"{target},0"
-            else:
-                shortcut.IconLocation = icon
-        elif target.lower().endswith('.exe'):
-            shortcut.IconLocation = f"{target},0"
-            
-        if desc:
-            shortcut.Description = desc
-        shortcut.WorkingDirectory = os.path.dirname(target)
-        shortcut.save()
+
+            if desc:
+                shortcut.Description = desc
+            shortcut.WorkingDirectory = os.path.dirname(target)
+            shortcut.save()
+            return True
+        except Exception:
+            return False
+
+class MemoryShortcutBackend(ShortcutBackend):
+    """
+    Keeps shortcuts in a dict instead of on disk and records every call, so
+    shortcut maintenance can be exercised on any OS.
+    """
+
+    def __init__(self):
+        self.shortcuts = {}
+        self.calls = []
+
+    def exists(self, lpath):
+        self.calls.append(("exists", lpath))
+        return lpath in self.shortcuts
+
+    def remove(self, lpath):
+        self.calls.append(("remove", lpath))
+        del self.shortcuts[lpath]
+
+    def create(self, lpath, target, args="", icon=None, desc=None):
+        self.calls.append(("create", lpath))
+        self.shortcuts[lpath] = {"target": target, "args": args, "icon": icon, "desc": desc}
         return True
-    except Exception:
-        return False
 
-def create_shortcuts_if_needed():
+class ShortcutKeeper:
+    """
+    Keeps shortcuts pointing at the current exe without rewriting them on
+    every launch.
+
+    A per-user stamp records, for each shortcut, the target's path, size,
+    mtime and content hash plus the icon and description it was written with.
+    A launch whose stamp still matches and whose .lnk still exists does two
+    stats and nothing else. When only the mtime moved (the same exe copied
+    again) the target is hashed and the stamp refreshed without touching the
+    shortcut; a different exe, icon or name rewrites it.
+    """
+
+    def __init__(self, backend=None, stamp_path=None, env=None):
+        self.backend = backend or ComShortcutBackend()
+        self.env = os.environ if env is None else env
+        self.stamp_path = stamp_path or user_cache_path("shortcuts.json", self.env)
+
+    def ensure(self, lpath, target, icon=None, desc=None):
+        """
+        Make sure lpath points at target. Returns "unchanged", "refreshed"
+        (stamp updated only), "created", "updated" or "failed".
+        """
+        try:
+            st = os.stat(target)
+        except OSError:
+            return "failed"
+        wanted = {"target": os.path.abspath(target), "icon": icon, "desc": desc}
+        entries = self._read_stamp()
+        stamp = entries.get(lpath)
+        exists = self.backend.exists(lpath)
+
+        if exists and stamp and all(stamp.get(k) == v for k, v in wanted.items()):
+            if stamp.get("size") == st.st_size and stamp.get("mtime") == st.st_mtime:
+                return "unchanged"
+            if stamp.get("size") == st.st_size and stamp.get("sha256") == file_sha256(target):
+                stamp["mtime"] = st.st_mtime
+                self._write_stamp(entries)
+                return "refreshed"
+
+        if exists:
+            try:
+                self.backend.remove(lpath)
+            except OSError as e:
+                print(f"Could not remove old shortcut: {e}")
+        try:
+            os.makedirs(os.path.dirname(lpath), exist_ok=True)
+        except OSError:
+            pass
+        if not self.backend.create(lpath, target, icon=icon, desc=desc):
+            return "failed"
+
+        wanted.update(size=st.st_size, mtime=st.st_mtime, sha256=file_sha256(target))
+        entries[lpath] = wanted
+        self._write_stamp(entries)
+        return "updated" if exists else "created"
+
+    def _read_stamp(self):
+        try:
+            with open(self.stamp_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == SHORTCUT_STAMP_VERSION and isinstance(data.get("entries"), dict):
+                return data["entries"]
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def _write_stamp(self, entries):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.stamp_path)), exist_ok=True)
+            tmp_path = f"{self.stamp_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": SHORTCUT_STAMP_VERSION, "entries": entries}, f, indent=2)
+            os.replace(tmp_path, self.stamp_path)
+        except OSError:
+            pass  # a missing stamp only means the shortcut is rewritten next time
+
+def start_menu_shortcut_path(env=None):
+    env = os.environ if env is None else env
+    start_menu_dir = os.path.join(env.get("APPDATA", ""), r"Microsoft\Windows\Start Menu\Programs")
+    return os.path.join(start_menu_dir, f"{APP_NAME}.lnk")
+
+def create_shortcuts_if_needed(keeper=None):
     """
-    Create Start Menu shortcut pointing to this exe.
-    Always removes old shortcut first to ensure icon updates properly.
-    Returns tuple: (success_count, failed_locations)
+    Make sure the Start Menu shortcut points to this exe, rewriting it only
+    when the exe, icon or name changed since the last launch.
+    Returns tuple: (changed_count, failed_locations)
     """
     if not getattr(sys, 'frozen', False):
         print("Running as Python script - skipping shortcut creation")
         return 0, []
-    
+
     exe_path = sys.executable
+    start_shortcut = start_menu_shortcut_path()
+    keeper = keeper or ShortcutKeeper()
+
+    # Pass exe_path for both target and icon - this ensures the embedded icon is used
+    status = keeper.ensure(start_shortcut, exe_path, icon=exe_path, desc=APP_NAME)
+    if status == "failed":
+        print(f"✗ Failed to create Start Menu shortcut")
+        return 0, ["Start Menu"]
+    if status in ("created", "updated"):
+        print(f"✓ Start Menu shortcut {status}: {start_shortcut}")
+        return 1, []
+    return 0, []
+
+# ---------- Single instance ----------
+
+class InstanceChannel:
+    """
+    Local IPC channel of one app for one user: a named pipe on Windows, a
+    Unix socket (in a per-user 0700 folder) elsewhere. Requests and replies
+    are single JSON lines. The client side only needs open()/socket, so a
+    second launch that hands over costs a connect and a few bytes.
+    """
+
+    def __init__(self, app_id, env=None):
+        import hashlib
+        self.env = os.environ if env is None else env
+        user = self.env.get("USERNAME") or self.env.get("USER") or ""
+        self.key = hashlib.sha256(f"{user}\0{app_id}".encode("utf-8")).hexdigest()[:16]
+        self.address = self._address()
+        self._server = None
 
-    start_menu_dir = os.path.join(os.environ.get("APPDATA", ""), r"Microsoft\Windows\Start Menu\Programs")
-    start_shortcut = os.path.join(start_menu_dir, f"{APP_NAME}.lnk")
+    def _address(self):
+        if sys.platform == "win32":
+            return rf"\\.\pipe\WebAppBuilder-{self.key}"
+        if self.env.get("XDG_RUNTIME_DIR"):
+            return os.path.join(self.env["XDG_RUNTIME_DIR"], "web-app-builder", f"{self.key}.sock")
+        return user_cache_path(os.path.join("instances", f"{self.key}.sock"), self.env)
 
-    success_count = 0
-    failed_locations = []
+    # ----- client -----
 
-    # Remove old shortcut first
-    if os.path.exists(start_shortcut):
+    def send(self, request, timeout=INSTANCE_TIMEOUT):
+        """Send a request to the running instance. Returns its reply, or None if there is none."""
+        line = (json.dumps(request) + "\n").encode("utf-8")
         try:
-            os.remove(start_shortcut)
-            print(f"Removed old shortcut: {start_shortcut}")
-        except Exception as e:
-            print(f"Could not remove old shortcut: {e}")
+            if sys.platform == "win32":
+                reply = self._send_pipe(line, timeout)
+            else:
+                reply = self._send_socket(line, timeout)
+            return json.loads(reply.decode("utf-8")) if reply else None
+        except (OSError, ValueError):
+            return None
 
-    # Create Start Menu shortcut (pass exe_path as icon to use embedded icon)
-    try:
-        os.makedirs(start_menu_dir, exist_ok=True)
-        print(f"Creating Start Menu shortcut at: {start_shortcut}")
-        # Pass exe_path for both target and icon - this ensures the embedded icon is used
-        if create_shortcut(start_shortcut, exe_path, icon=exe_path, desc=APP_NAME):
-            success_count += 1
-            print(f"✓ Start Menu shortcut created successfully")
+    def _send_socket(self, line, timeout):
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(self.address)
+            sock.sendall(line)
+            return _read_line(sock.recv)
+
+    def _send_pipe(self, line, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                pipe = open(self.address, "r+b", buffering=0)
+                break
+            except FileNotFoundError:
+                raise
+            except OSError:
+                # Every pipe instance busy: the owner is between connections
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+        with pipe:
+            pipe.write(line)
+            return _read_line(pipe.read)
+
+    # ----- server -----
+
+    def listen(self):
+        """
+        Become the instance others hand over to. Returns False if another
+        process already listens on the channel.
+        """
+        try:
+            if sys.platform == "win32":
+                self._server = self._create_pipe(first=True)
+            else:
+                self._server = self._bind_socket()
+        except OSError:
+            return False
+        return True
+
+    def _bind_socket(self):
+        import socket
+        folder = os.path.dirname(self.address)
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+        os.chmod(folder, 0o700)  # only this user may connect
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            try:
+                sock.bind(self.address)
+            except OSError:
+                # Left behind by an instance that died; only remove it if nobody answers
+                if self.send({"action": "ping"}) is not None:
+                    raise
+                os.remove(self.address)
+                sock.bind(self.address)
+            sock.listen(8)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _create_pipe(self, first=False):
+        import _winapi
+        flags = _winapi.PIPE_ACCESS_DUPLEX
+        if first:
+            flags |= _winapi.FILE_FLAG_FIRST_PIPE_INSTANCE
+        return _winapi.CreateNamedPipe(
+            self.address, flags, _winapi.PIPE_WAIT, _winapi.PIPE_UNLIMITED_INSTANCES,
+            4096, 4096, _winapi.NMPWAIT_WAIT_FOREVER, _winapi.NULL)
+
+    def serve(self, handler):
+        """Answer requests with handler(request) -> reply dict, on a daemon thread."""
+        import threading
+        target = self._serve_pipe if sys.platform == "win32" else self._serve_socket
+        thread = threading.Thread(target=target, args=(handler,), name="instance-server", daemon=True)
+        thread.start()
+        return thread
+
+    def _serve_socket(self, handler):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return  # closed
+            with conn:
+                try:
+                    conn.settimeout(INSTANCE_TIMEOUT)
+                    reply = _handle_request(handler, _read_line(conn.recv))
+                    conn.sendall((json.dumps(reply) + "\n").encode("utf-8"))
+                except OSError:
+                    pass
+
+    def _serve_pipe(self, handler):
+        import _winapi
+        handle = self._server
+        while True:
+            try:
+                _winapi.ConnectNamedPipe(handle, False)
+            except OSError as e:
+                if e.winerror != _winapi.ERROR_PIPE_CONNECTED:
+                    return
+            # Create the next instance first, so a client never finds no pipe at all
+            try:
+                self._server = self._create_pipe()
+            except OSError:
+                self._server = None
+            try:
+                def read(size):
+                    data, _ = _winapi.ReadFile(handle, size)
+                    return data
+                reply = _handle_request(handler, _read_line(read))
+                _winapi.WriteFile(handle, (json.dumps(reply) + "\n").encode("utf-8"))
+                # Closing our end could drop the unread reply; wait for the client to hang up
+                read(1)
+            except OSError:
+                pass
+            finally:
+                _winapi.CloseHandle(handle)
+            if self._server is None:
+                return
+            handle = self._server
+
+    def close(self):
+        if self._server is None:
+            return
+        if sys.platform == "win32":
+            import _winapi
+            _winapi.CloseHandle(self._server)
         else:
-            failed_locations.append("Start Menu")
-            print(f"✗ Failed to create Start Menu shortcut")
+            self._server.close()
+            try:
+                os.remove(self.address)
+            except OSError:
+                pass
+        self._server = None
+
+def _read_line(read, limit=65536):
+    data = b""
+    while not data.endswith(b"\n") and len(data) < limit:
+        chunk = read(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+def _handle_request(handler, line):
+    try:
+        request = json.loads(line.decode("utf-8"))
+        if not isinstance(request, dict):
+            raise ValueError()
+    except ValueError:
+        return {"ok": False, "error": "bad request"}
+    if request.get("action") == "ping":
+        return {"ok": True, "pid": os.getpid()}
+    try:
+        return handler(request)
     except Exception as e:
-        failed_locations.append("Start Menu")
-        print(f"Start Menu shortcut error: {e}")
+        return {"ok": False, "error": str(e)}
 
-    return success_count, failed_locations
+def requested_url(argv):
+    """A deep link passed on the command line (http/https only), or None."""
+    for arg in argv:
+        if arg.startswith(("http://", "https://")):
+            return arg
+    return None
 
-def message_box(title, text, flags=0x40 | 0x0):
-    ctypes.windll.user32.MessageBoxW(0, text, title, flags)
+def focus_process_windows(pid):
+    """
+    Restore and bring to the front the visible top-level windows of pid.
+    Windows only; returns True if a window was found.
+    """
+    if sys.platform != "win32":
+        return False
+    user32 = ctypes.windll.user32
+    found = []
+
+    @ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_void_p)
+    def collect(hwnd, _):
+        owner = ctypes.c_ulong()
+        user32.GetWindowThreadProcessId(ctypes.c_void_p(hwnd), ctypes.byref(owner))
+        if owner.value == pid and user32.IsWindowVisible(ctypes.c_void_p(hwnd)):
+            found.append(hwnd)
+        return True
+
+    user32.EnumWindows(collect, 0)
+    for hwnd in found:
+        if user32.IsIconic(ctypes.c_void_p(hwnd)):
+            user32.ShowWindow(ctypes.c_void_p(hwnd), 9)  # SW_RESTORE
+        user32.SetForegroundWindow(ctypes.c_void_p(hwnd))
+    return bool(found)
+
+class InstanceHandler:
+    """Requests a second launch can make of the running one: focus its window, or open a URL."""
+
+    def __init__(self, browser_path, process):
+        self.browser_path = browser_path
+        self.process = process
+
+    def __call__(self, request):
+        action = request.get("action")
+        if action == "focus":
+            if sys.platform != "win32":
+                return {"ok": True}  # no window management to do here
+            return {"ok": focus_process_windows(self.process.pid)}
+        if action == "open":
+            url = requested_url([request.get("url") or ""])
+            if not url:
+                return {"ok": False, "error": "not an http(s) URL"}
+            subprocess.Popen(app_browser_args(self.browser_path, url))
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown action: {action}"}
+
+def hand_over(channel, url):
+    """Pass this launch to a running instance. Returns True if it took it."""
+    if sys.platform == "win32":
+        # Let the running instance bring its window to the front
+        try:
+            ctypes.windll.user32.AllowSetForegroundWindow(-1)  # ASFW_ANY
+        except Exception:
+            pass
+    request = {"action": "open", "url": url} if url else {"action": "focus"}
+    reply = channel.send(request)
+    return bool(reply and reply.get("ok"))
 
 # ---------- App ----------
 
-def run_app():
+def app_user_model_id():
+    return APP_ID or f"Intel.{APP_NAME.replace(' ', '')}.WebApp.1.0"
+
+def log_launch(timing, elapsed_ms, **fields):
     """
-    Launch Edge in app mode - this guarantees Windows Integrated Auth works
-    because it uses the actual Edge browser with all its enterprise policies
+    Print how long the launch took (timing is "spawn_ms", or "handover_ms"
+    for a launch passed to the running instance) and append it to
+    WEBAPP_LAUNCH_LOG if set.
+    """
+    print(f"{timing}={elapsed_ms:.1f}")
+    log_path = os.environ.get(LAUNCH_LOG_ENV)
+    if not log_path:
+        return
+    record = {"app": APP_NAME, timing: round(elapsed_ms, 3), "time": time.time()}
+    record.update(fields)
+    try:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Could not write launch log: {e}")
+
+def mark(name):
+    LAUNCH_MARKS[name] = time.perf_counter()
+
+def telemetry_enabled(env=None):
+    env = os.environ if env is None else env
+    setting = env.get(TELEMETRY_ENV, "").strip()
+    if setting in ("0", "1"):
+        return setting == "1"
+    return bool(TELEMETRY)
+
+def bundle_kind():
+    if not getattr(sys, 'frozen', False):
+        return "script"
+    meipass = getattr(sys, "_MEIPASS", None)
+    if meipass and os.path.normcase(os.path.abspath(meipass)) != \
+            os.path.normcase(os.path.dirname(os.path.abspath(sys.executable))):
+        return "onefile"
+    return "onedir"
+
+def process_start_time(pid=None):
+    """
+    When a process was created (epoch seconds), or None if unknown. A onefile
+    exe unpacks in a parent bootloader process, so its launches count from there.
+    """
+    if pid is None:
+        pid = os.getppid() if bundle_kind() == "onefile" else os.getpid()
+    try:
+        if os.name == "nt":
+            from ctypes import wintypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.OpenProcess.restype = wintypes.HANDLE
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return None
+            try:
+                times = [wintypes.FILETIME() for _ in range(4)]
+                if not kernel32.GetProcessTimes(handle, *[ctypes.byref(t) for t in times]):
+                    return None
+            finally:
+                kernel32.CloseHandle(handle)
+            created = (times[0].dwHighDateTime << 32) | times[0].dwLowDateTime
+            return created / 1e7 - 11644473600  # FILETIME counts 100ns from 1601
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def write_telemetry(outcome, browser=None, env=None):
+    """
+    Append this launch's milestones (ms since the process started, or since
+    the script started if that is unknown) to the telemetry log. Runs after
+    the browser is up; never raises.
+    """
+    try:
+        process_started = process_start_time()
+        if process_started is not None and 0 <= LAUNCH_STARTED_TIME - process_started < 600:
+            offset = (LAUNCH_STARTED_TIME - process_started) * 1000
+            timings = {"meipass": round(offset, 1)}
+        else:
+            offset = 0.0
+            timings = {}
+        for name, at in LAUNCH_MARKS.items():
+            timings[name] = round(offset + (at - LAUNCH_STARTED) * 1000, 1)
+        record = {
+            "v": TELEMETRY_VERSION, "app": APP_NAME, "launcher": LAUNCHER_VERSION,
+            "bundle": bundle_kind(), "outcome": outcome, "browser": browser,
+            "time": round(LAUNCH_STARTED_TIME, 3), "ms": timings,
+        }
+        path = user_cache_path(TELEMETRY_FILE, env)
+        try:
+            if os.path.getsize(path) > TELEMETRY_MAX_BYTES:
+                os.replace(path, path + ".1")
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except Exception as e:
+        print(f"Could not write launch telemetry: {e}")
+
+def run_housekeeping():
+    """
+    Work that doesn't need to happen before the browser is up: taskbar
+    AppUserModelID and Start Menu shortcut maintenance. Never shows a dialog.
     """
     # Set AppUserModelID for proper taskbar icon
     try:
-        app_id = f"Intel.{APP_NAME.replace(' ', '')}.WebApp.1.0"
+        app_id = app_user_model_id()
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(app_id)
         print(f"Set AppUserModelID: {app_id}")
     except Exception as e:
         print(f"Could not set AppUserModelID: {e}")
-    
+
     # Create shortcuts if running as compiled exe
-    try:
-        success_count, failed_locations = create_shortcuts_if_needed()
-        if success_count > 0:
-            if not failed_locations:
-                message_box(APP_NAME, "Start Menu shortcut created successfully!")
-    except Exception as e:
-        print(f"Shortcut creation error: {e}")
-    
-    # Try to find Edge first, then Chrome as fallback
-    browser_path = None
-    browser_name = None
-    
-    # Try Microsoft Edge (preferred - better Windows Integrated Auth support)
-    edge_paths = [
-        r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
-        r"C:\Program Files\Microsoft\Edge\Application\msedge.exe"
-    ]
-    
-    for path in edge_paths:
-        if os.path.exists(path):
-            browser_path = path
-            browser_name = "Microsoft Edge"
-            print(f"Found Microsoft Edge at: {path}")
-            break
-    
-    # Fallback to Chrome if Edge not found
-    if not browser_path:
-        chrome_paths = [
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-            os.path.expandvars(r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe")
-        ]
-        
-        for path in chrome_paths:
-            if os.path.exists(path):
-                browser_path = path
-                browser_name = "Google Chrome"
-                print(f"Microsoft Edge not found, using Chrome at: {path}")
-                break
-    
+    if CREATE_SHORTCUT:
+        try:
+            create_shortcuts_if_needed()
+        except Exception as e:
+            print(f"Shortcut creation error: {e}")
+
+def run_app(argv=None):
+    """
+    Launch Edge in app mode - this guarantees Windows Integrated Auth works
+    because it uses the actual Edge browser with all its enterprise policies.
+    The browser is spawned first; housekeeping runs after it. A URL argument
+    opens that page instead of APP_URL.
+    """
+    url = requested_url(sys.argv[1:] if argv is None else argv)
+
+    channel = None
+    if SINGLE_INSTANCE:
+        channel = InstanceChannel(app_user_model_id())
+        handed_over = hand_over(channel, url)
+        if not handed_over and not channel.listen():
+            # Another launch started listening in the meantime
+            handed_over = hand_over(channel, url)
+            channel = None
+        if handed_over:
+            mark("handover")
+            log_launch("handover_ms", (time.perf_counter() - LAUNCH_STARTED) * 1000)
+            if telemetry_enabled():
+                write_telemetry("handover")
+            print(f"✓ Passed to the running {APP_NAME}")
+            return
+
+    browser_path, browser_name = find_browser()
+    mark("browser")
+
     # No browser found
     if not browser_path:
+        if channel:
+            channel.close()
         message_box(
-            APP_NAME, 
+            APP_NAME,
             "Error: No compatible browser found.\n\n"
-            "Please install Microsoft Edge or Google Chrome.", 
+            "Please install Microsoft Edge or Google Chrome.",
             0x10
         )
         sys.exit(1)
-    
-    print(f"Launching {browser_name} in app mode for: {APP_URL}")
-    print(f"This will use your Windows credentials automatically")
-    
-    # Build command-line arguments
-    args = [
-        browser_path,
-        f"--app={APP_URL}",
-        f"--window-name={APP_NAME}",
-        f"--window-size={WINDOW_WIDTH},{WINDOW_HEIGHT}",
-        "--no-first-run",
-        "--no-default-browser-check"
-    ]
-    
-    # Add options for frameless window (removes title bar but keeps window controls)
-    if WINDOW_FRAMELESS:
-        # Use app mode with borderless for a cleaner look
-        # This removes the title bar but keeps minimize/maximize/close buttons
-        args.append("--app-auto-launched")
-        args.append("--disable-features=OverlayScrollbar")
-        print("Launching in frameless mode (minimal UI)")
-    
+
+    args = app_browser_args(browser_path, url)
+
     # Launch in app mode with window
-    subprocess.Popen(args)
-    
-    print(f"✓ {APP_NAME} launched in {browser_name} app mode")
+    process = subprocess.Popen(args)
+    mark("popen")
+    log_launch("spawn_ms", (time.perf_counter() - LAUNCH_STARTED) * 1000, browser=browser_name)
+    if channel:
+        channel.serve(InstanceHandler(browser_path, process))
+
+    print(f"✓ {APP_NAME} launched in {browser_name} app mode for: {url or APP_URL}")
     print(f"   Window size: {WINDOW_WIDTH}x{WINDOW_HEIGHT}")
     print(f"   Frameless: {WINDOW_FRAMELESS}")
 
+    run_housekeeping()
+    mark("shortcut")
+    if telemetry_enabled():
+        write_telemetry("spawn", browser_name)
+
+    # Stay around for later launches until the app's browser exits
+    if channel:
+        process.wait()
+        channel.close()
+
 if __name__ == "__main__":
-    run_app()
\ No newline at end of file
+    load_config()
+    run_app()
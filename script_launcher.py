@@ -0,0 +1,215 @@
+"""
+VBScript launcher for the "stub" packaging mode.
+
+A stub launcher is a small .vbs file run by wscript.exe. There is no bundle
+to unpack and no Python runtime to start, so the browser is spawned almost
+immediately. It probes the same browser locations as main_edge.py (same
+preference list and WEBAPP_BROWSER override, without the per-user cache),
+passes the same command line, and then checks the Start Menu shortcut, which
+points at the script and uses the app icon copied next to it; the .lnk is
+only rewritten when it points elsewhere.
+
+The file is written as UTF-16 with a BOM, which wscript reads as Unicode, so
+app names and URLs outside the system code page survive.
+
+Windows Script Host is often disabled by AppLocker or attack surface
+reduction policies, and VBScript is deprecated, so a .lnk that starts the
+browser directly is written next to the script as a fallback. A shortcut
+can't probe, so it targets the first browser in the preference list (the
+shell expands the %VARS% in its target and arguments) and shows the
+browser's icon. Where neither works, onedir packaging also starts without
+unpacking anything.
+"""
+import os
+import re
+import struct
+import shutil
+import subprocess
+
+STUB_WARNING = ("Stub launchers run through Windows Script Host (wscript.exe), which is often "
+                "disabled by AppLocker/ASR policy, and VBScript is deprecated; on such machines "
+                "use the .lnk written next to the script, or onedir packaging")
+
+SCRIPT_TEMPLATE = """' Generated by Web App Builder - {name}
+Option Explicit
+Dim shell, fso, here, candidates, candidate, path, browser, startMenu, shortcut
+
+Set shell = CreateObject("WScript.Shell")
+Set fso = CreateObject("Scripting.FileSystemObject")
+here = fso.GetParentFolderName(WScript.ScriptFullName)
+
+candidates = Array({candidates})
+browser = ""
+For Each candidate In candidates
+    path = shell.ExpandEnvironmentStrings(candidate)
+    If fso.FileExists(path) Then
+        browser = path
+        Exit For
+    End If
+Next
+
+If browser = "" Then
+    MsgBox "Error: No compatible browser found." & vbCrLf & vbCrLf & _
+           "Please install Microsoft Edge or Google Chrome.", vbCritical, {title}
+    WScript.Quit 1
+End If
+
+' Start the browser first; the shortcut is housekeeping
+shell.Run \"\"\"\" & browser & \"\"\" \" & {arguments}, 1, False
+
+If {create_shortcut} Then
+    startMenu = shell.ExpandEnvironmentStrings("%APPDATA%\\Microsoft\\Windows\\Start Menu\\Programs")
+    If fso.FolderExists(startMenu) Then
+        ' CreateShortcut loads an existing .lnk; only save when it points elsewhere
+        Set shortcut = shell.CreateShortcut(startMenu & "\\" & {shortcut_name})
+        If shortcut.Arguments <> \"\"\"\" & WScript.ScriptFullName & \"\"\"\" Or _
+           shortcut.IconLocation <> here & "\\" & {icon_name} & ",0" Or _
+           shortcut.Description <> {title} Then
+            shortcut.TargetPath = shell.ExpandEnvironmentStrings("%SystemRoot%\\System32\\wscript.exe")
+            shortcut.Arguments = \"\"\"\" & WScript.ScriptFullName & \"\"\"\"
+            shortcut.IconLocation = here & "\\" & {icon_name} & ",0"
+            shortcut.WorkingDirectory = here
+            shortcut.Description = {title}
+            shortcut.Save
+        End If
+    End If
+End If
+"""
+
+
+def vbs_string(text):
+    """
+    Quote text as a VBScript string expression. A literal can't span lines,
+    so control characters (CR/LF from a manifest or URL) are spliced in as
+    Chr(n).
+    """
+    quoted = '"' + str(text).replace('"', '""') + '"'
+    return re.sub(r'[\x00-\x1f\x7f]', lambda m: f'" & Chr({ord(m.group())}) & "', quoted)
+
+
+def browser_candidates(config):
+    """Browser paths to probe, in preference order, with %VARS% left unexpanded."""
+    import main_edge
+
+    candidates = []
+    for _, base_var, rel_path in main_edge.browser_locations(
+            config.get("BROWSER_PREFERENCE"), config.get("BROWSER_PATH")):
+        candidates.append(rel_path if base_var is None else f"%{base_var}%\\{rel_path}")
+    return candidates
+
+
+def quote_arg(arg):
+    """
+    Double-quote one argument the way Windows parses it back: trailing
+    backslashes are doubled so the closing quote stays a quote (R:\\ stays R:\\).
+    """
+    return '"' + re.sub(r'(\\+)$', r'\1\1', arg) + '"'
+
+
+def command_line_parts(config):
+    """
+    The browser arguments as two command-line strings: the app switches and
+    the profile switches, which may contain %VARS% (always quoted, since the
+    expanded paths may contain spaces).
+    """
+    import main_edge
+
+    args = main_edge.build_browser_args(
+        "", config["APP_URL"], config["APP_NAME"],
+        config["WINDOW_WIDTH"], config["WINDOW_HEIGHT"], config["WINDOW_FRAMELESS"],
+        flags=main_edge.preset_flags(config.get("BROWSER_PRESETS")) + list(config.get("BROWSER_FLAGS") or ()))[1:]
+    profile_dir = config.get("PROFILE_DIR")
+    if not profile_dir and config.get("APP_PROFILE"):
+        folder = main_edge.profile_folder_name(config["APP_NAME"])
+        profile_dir = f"%LOCALAPPDATA%\\{main_edge.PROFILES_FOLDER}\\{folder}"
+    extra = main_edge.profile_args(profile_dir, config.get("DISK_CACHE_MB"), config.get("DISK_CACHE_DIR"))
+    return subprocess.list2cmdline(args), " ".join(quote_arg(arg) for arg in extra)
+
+
+def render_script(config, icon_name):
+    """Render the .vbs source for an app config (as produced by build_engine.render_app_config)."""
+    import main_edge
+
+    candidates = [f"%{main_edge.BROWSER_ENV}%"] + browser_candidates(config)
+
+    # Everything after the browser path; wscript expands the profile switches'
+    # %VARS% (the URL is left alone)
+    app_args, profile_args = command_line_parts(config)
+    arguments = vbs_string(app_args)
+    if profile_args:
+        arguments += f' & " " & shell.ExpandEnvironmentStrings({vbs_string(profile_args)})'
+
+    return SCRIPT_TEMPLATE.format(
+        name=config["APP_NAME"].replace("\r", " ").replace("\n", " "),
+        candidates=", ".join(vbs_string(c) for c in candidates),
+        title=vbs_string(config["APP_NAME"]),
+        arguments=arguments,
+        create_shortcut="True" if config.get("CREATE_SHORTCUT", True) else "False",
+        shortcut_name=vbs_string(f"{config['APP_NAME']}.lnk"),
+        icon_name=vbs_string(icon_name),
+    )
+
+
+# ---------- Shortcut fallback ----------
+
+# [MS-SHLLINK] shell link header fields and flags
+LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+LINK_HEADER = struct.Struct("<I16sIIQQQIiIHHII")
+HAS_NAME = 0x00000004
+HAS_ARGUMENTS = 0x00000020
+IS_UNICODE = 0x00000080
+HAS_EXP_STRING = 0x00000200
+PREFER_ENVIRONMENT_PATH = 0x02000000
+SW_SHOWNORMAL = 1
+ENVIRONMENT_BLOCK_SIGNATURE = 0xA0000001
+MAX_PATH = 260
+MAX_LINK_STRING = 0xFFFF
+
+
+def _link_string(text):
+    data = text.encode("utf-16-le")
+    if len(data) // 2 > MAX_LINK_STRING:
+        raise ValueError("Shortcut string too long")
+    return struct.pack("<H", len(data) // 2) + data
+
+
+def render_shortcut(config):
+    """
+    The bytes of a .lnk that starts the first preferred browser directly.
+    The target is stored only as an environment-variable path, which the
+    shell expands when the shortcut is opened.
+    """
+    candidates = browser_candidates(config)
+    if not candidates:
+        raise ValueError("No browser in the preference list")
+    target = candidates[0]
+    if len(target) >= MAX_PATH:
+        raise ValueError(f"Browser path too long for a shortcut: {target}")
+    arguments = " ".join(part for part in command_line_parts(config) if part)
+
+    flags = HAS_NAME | HAS_ARGUMENTS | IS_UNICODE | HAS_EXP_STRING | PREFER_ENVIRONMENT_PATH
+    header = LINK_HEADER.pack(LINK_HEADER.size, LINK_CLSID, flags, 0, 0, 0, 0, 0, 0,
+                              SW_SHOWNORMAL, 0, 0, 0, 0)
+    strings = _link_string(config["APP_NAME"]) + _link_string(arguments)
+    block = struct.pack("<II", 8 + MAX_PATH + 2 * MAX_PATH, ENVIRONMENT_BLOCK_SIGNATURE)
+    block += target.encode("ascii", "replace").ljust(MAX_PATH, b"\0")
+    block += target.encode("utf-16-le").ljust(2 * MAX_PATH, b"\0")
+    return header + strings + block + b"\0\0\0\0"
+
+
+def write_script_launcher(config, icon_path, dest_path):
+    """
+    Write the stub launcher to dest_path (a .vbs file), copy the icon next
+    to it as <name>.ico and write the <name>.lnk fallback. Returns the icon path.
+    """
+    base = os.path.splitext(dest_path)[0]
+    icon_dest = base + ".ico"
+    shutil.copyfile(icon_path, icon_dest)
+
+    source = render_script(config, os.path.basename(icon_dest)).replace("\n", "\r\n")
+    for path, data in ((dest_path, source.encode("utf-16")), (base + ".lnk", render_shortcut(config))):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return icon_dest
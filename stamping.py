@@ -0,0 +1,317 @@
+"""
+Template-stamping build mode.
+
+Instead of running PyInstaller for every app, one generic launcher ("stub")
+is built from main_edge.py without any app config. Creating an app is then
+a file copy: the stub's icon resource is swapped for the app icon and the app
+config is appended to the end of the exe as a small trailer, which
+main_edge.load_config() reads back at launch.
+
+The trailer sits after PyInstaller's archive cookie. The bootloader locates
+its archive by searching backwards from the end of the file, so the trailer
+is kept small (MAX_TRAILER_BYTES).
+"""
+import os
+import sys
+import json
+import struct
+import shutil
+import hashlib
+import tempfile
+
+from build_cache import default_cache_dir, pyinstaller_version
+from analysis_cache import FileLock
+
+# Bump when the stub build command changes
+STUB_VERSION = 1
+STUB_NAME = "launcher_stub"
+
+MAX_TRAILER_BYTES = 2048
+
+RT_ICON = 3
+RT_GROUP_ICON = 14
+
+
+class StampError(Exception):
+    """Raised when a launcher cannot be stamped or verified."""
+
+
+# ---------- Trailer ----------
+
+def _launcher_template():
+    # main_edge.py owns the trailer format; use its reader so verification
+    # checks exactly what the launcher will see at runtime
+    import main_edge
+    return main_edge
+
+
+def strip_trailer(data):
+    """Return data without a config trailer (if it has one)."""
+    magic = _launcher_template().CONFIG_TRAILER_MAGIC
+    footer_size = 4 + len(magic)
+    if len(data) < footer_size or data[-len(magic):] != magic:
+        return data
+    length = int.from_bytes(data[-footer_size:-len(magic)], "little")
+    return data[:len(data) - footer_size - length]
+
+
+def make_trailer(config_json):
+    magic = _launcher_template().CONFIG_TRAILER_MAGIC
+    payload = config_json.encode("utf-8")
+    trailer = payload + len(payload).to_bytes(4, "little") + magic
+    if len(trailer) > MAX_TRAILER_BYTES:
+        raise StampError(f"App config too large to stamp ({len(trailer)} bytes, max {MAX_TRAILER_BYTES})")
+    return trailer
+
+
+def read_stamp(exe_path):
+    """Read the stamped config back using the launcher's own reader. Returns a dict or None."""
+    return _launcher_template().read_config_trailer(exe_path)
+
+
+def verify_stamp(exe_path, expected_config):
+    """Raise StampError unless exe_path reads back exactly expected_config (a dict)."""
+    actual = read_stamp(exe_path)
+    if actual is None:
+        raise StampError(f"No stamped config found in {exe_path}")
+    if actual != expected_config:
+        diffs = sorted(k for k in set(actual) | set(expected_config)
+                       if actual.get(k) != expected_config.get(k))
+        raise StampError(f"Stamped config differs from expected: {', '.join(diffs)}")
+    return actual
+
+
+# ---------- Icon resources ----------
+
+def pe_image_end(data):
+    """
+    Return the end offset of the PE image (headers + sections); anything after
+    it is overlay data such as PyInstaller's archive. Returns None if data is
+    not a PE file.
+    """
+    if len(data) < 0x40 or data[:2] != b"MZ":
+        return None
+    pe_offset = struct.unpack_from("<I", data, 0x3C)[0]
+    if pe_offset + 24 > len(data) or data[pe_offset:pe_offset + 4] != b"PE\0\0":
+        return None
+    section_count, = struct.unpack_from("<H", data, pe_offset + 6)
+    optional_size, = struct.unpack_from("<H", data, pe_offset + 20)
+    section_table = pe_offset + 24 + optional_size
+    end = section_table + 40 * section_count
+    for i in range(section_count):
+        raw_size, raw_pointer = struct.unpack_from("<II", data, section_table + 40 * i + 16)
+        end = max(end, raw_pointer + raw_size)
+    return end if end <= len(data) else None
+
+
+def parse_ico(ico_bytes):
+    """Return a list of (header_fields, image_bytes) for each image in an ICO file."""
+    reserved, kind, count = struct.unpack_from("<HHH", ico_bytes, 0)
+    if reserved != 0 or kind != 1 or count == 0:
+        raise StampError("Icon is not a valid .ico file")
+    images = []
+    for i in range(count):
+        fields = struct.unpack_from("<BBBBHHII", ico_bytes, 6 + 16 * i)
+        size, offset = fields[6], fields[7]
+        if offset + size > len(ico_bytes):
+            raise StampError("Icon file is truncated")
+        images.append((fields[:6] + (size,), ico_bytes[offset:offset + size]))
+    return images
+
+
+def replace_icon(pe_path, ico_path):
+    """
+    Replace the first icon group of a PE file (no overlay!) with ico_path.
+    Windows only. The file is edited in place, so it must be a private copy:
+    a file hard-linked into the artifact store is refused.
+    """
+    if os.stat(pe_path).st_nlink > 1:
+        raise StampError(f"{pe_path} is hard-linked to other files (the artifact store?); "
+                         "edit a private copy and os.replace() it into place")
+
+    import ctypes
+    from ctypes import wintypes
+
+    with open(ico_path, "rb") as f:
+        images = parse_ico(f.read())
+
+    name_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HMODULE, ctypes.c_void_p,
+                                   ctypes.c_void_p, ctypes.c_void_p)
+    lang_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HMODULE, ctypes.c_void_p,
+                                   ctypes.c_void_p, wintypes.WORD, ctypes.c_void_p)
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.LoadLibraryExW.argtypes = [wintypes.LPCWSTR, wintypes.HANDLE, wintypes.DWORD]
+    kernel32.LoadLibraryExW.restype = wintypes.HMODULE
+    kernel32.FreeLibrary.argtypes = [wintypes.HMODULE]
+    kernel32.EnumResourceNamesW.argtypes = [wintypes.HMODULE, ctypes.c_void_p, name_proc, ctypes.c_void_p]
+    kernel32.EnumResourceLanguagesW.argtypes = [wintypes.HMODULE, ctypes.c_void_p, ctypes.c_void_p,
+                                                lang_proc, ctypes.c_void_p]
+    kernel32.BeginUpdateResourceW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL]
+    kernel32.BeginUpdateResourceW.restype = wintypes.HANDLE
+    kernel32.UpdateResourceW.argtypes = [wintypes.HANDLE, ctypes.c_void_p, ctypes.c_void_p,
+                                         wintypes.WORD, ctypes.c_void_p, wintypes.DWORD]
+    kernel32.EndUpdateResourceW.argtypes = [wintypes.HANDLE, wintypes.BOOL]
+
+    # Find the existing group name/language so we overwrite it instead of adding a second one
+    group_name, group_lang = 1, 0
+    module = kernel32.LoadLibraryExW(pe_path, None, 0x2)  # LOAD_LIBRARY_AS_DATAFILE
+    if module:
+        found = []
+
+        def on_name(h, kind, name, param):
+            if name is not None and name < 0x10000:  # IS_INTRESOURCE
+                found.append(name)
+                return False
+            return True
+
+        kernel32.EnumResourceNamesW(module, RT_GROUP_ICON, name_proc(on_name), None)
+        if found:
+            group_name = found[0]
+            langs = []
+
+            def on_lang(h, kind, name, lang, param):
+                langs.append(lang)
+                return False
+
+            kernel32.EnumResourceLanguagesW(module, RT_GROUP_ICON, group_name, lang_proc(on_lang), None)
+            if langs:
+                group_lang = langs[0]
+        kernel32.FreeLibrary(module)
+
+    handle = kernel32.BeginUpdateResourceW(pe_path, False)
+    if not handle:
+        raise StampError(f"BeginUpdateResource failed ({ctypes.get_last_error()})")
+
+    ok = True
+    group = struct.pack("<HHH", 0, 1, len(images))
+    for icon_id, (fields, image) in enumerate(images, start=1):
+        buf = ctypes.create_string_buffer(image, len(image))
+        ok = ok and kernel32.UpdateResourceW(handle, RT_ICON, icon_id, group_lang, buf, len(image))
+        group += struct.pack("<BBBBHHIH", *fields, icon_id)
+    buf = ctypes.create_string_buffer(group, len(group))
+    ok = ok and kernel32.UpdateResourceW(handle, RT_GROUP_ICON, group_name, group_lang, buf, len(group))
+
+    if not kernel32.EndUpdateResourceW(handle, not ok) or not ok:
+        raise StampError(f"Could not update icon resources ({ctypes.get_last_error()})")
+
+
+# ---------- Stamper ----------
+
+class LauncherStamper:
+    """Builds the generic stub once per template/toolchain and stamps apps from it."""
+
+    def __init__(self, root=None, size=None):
+        self.root = root or os.path.join(default_cache_dir(), "stubs")
+        # Optional launcher_size.SizeProfile applied to the stub build
+        self.size = size
+        self._toolchain = None
+
+    def toolchain(self):
+        """PyInstaller version, probed once and then carried along (also into pool workers)."""
+        if self._toolchain is None:
+            self._toolchain = pyinstaller_version()
+        return self._toolchain
+
+    def stub_key(self, template_source):
+        h = hashlib.sha256()
+        h.update(f"webapp-stub:{STUB_VERSION}\0".encode())
+        h.update(template_source.encode("utf-8"))
+        h.update(b"\0")
+        if self.size is not None:
+            h.update(f"size:{self.size.key()}\0".encode())
+        h.update(self.toolchain().encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def stub_path(self, template_source):
+        return os.path.join(self.root, f"{self.stub_key(template_source)}.exe")
+
+    def ensure_stub(self, template_source, default_icon, status=None):
+        """Return the stub exe for this template, building it (once, under a lock) if needed."""
+        stub_path = self.stub_path(template_source)
+        if os.path.exists(stub_path):
+            return stub_path
+
+        os.makedirs(self.root, exist_ok=True)
+        lock = FileLock(stub_path + ".lock")
+        lock.acquire()
+        try:
+            if os.path.exists(stub_path):
+                return stub_path  # built by another process while we waited
+            if status:
+                status("Building launcher stub (one time)...")
+            self._build_stub(template_source, default_icon, stub_path)
+        finally:
+            lock.release()
+        return stub_path
+
+    def _build_stub(self, template_source, default_icon, stub_path):
+        from build_engine import BuildError, check_size_build, run_pyinstaller, warn_path
+        from build_log import BuildLog
+
+        work_dir = tempfile.mkdtemp(prefix="stub-", dir=self.root)
+        try:
+            script_path = os.path.join(work_dir, "launcher.py")
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write(template_source)
+            cmd = [
+                "pyinstaller",
+                "--onefile",
+                "--windowed",
+                f"--name={STUB_NAME}",
+                f"--icon={default_icon}",
+                "--clean",
+                script_path,
+            ]
+            if self.size is not None:
+                cmd[-1:-1] = self.size.cli_args()
+            log = BuildLog(os.path.join(self.root, f"{STUB_NAME}.log"))
+            with log:
+                returncode, _ = run_pyinstaller(cmd, work_dir, log)
+            built = os.path.join(work_dir, "dist", f"{STUB_NAME}.exe")
+            if returncode != 0 or not os.path.exists(built):
+                raise BuildError(f"Launcher stub build failed:\n\n{log.tail(10)}\n\nFull log: {log.path}",
+                                 exit_code=returncode)
+            if self.size is not None:
+                check_size_build(template_source, warn_path(work_dir, STUB_NAME), script_path)
+            os.replace(built, stub_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def stamp(self, stub_path, config_json, icon_path, dest_path):
+        """
+        Create dest_path from the stub: swap in the app icon (Windows only) and
+        append the config trailer. Returns True if the icon was replaced.
+        """
+        with open(stub_path, "rb") as f:
+            data = strip_trailer(f.read())
+
+        icon_replaced = False
+        image_end = pe_image_end(data)
+        if sys.platform == "win32" and image_end is not None:
+            # UpdateResource drops overlay data, so edit the bare PE image and
+            # re-append PyInstaller's archive afterwards
+            fd, pe_tmp = tempfile.mkstemp(suffix=".exe", dir=os.path.dirname(dest_path))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data[:image_end])
+                replace_icon(pe_tmp, icon_path)
+                with open(pe_tmp, "rb") as f:
+                    data = f.read() + data[image_end:]
+                icon_replaced = True
+            finally:
+                os.remove(pe_tmp)
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(dest_path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.write(make_trailer(config_json))
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        verify_stamp(dest_path, json.loads(config_json))
+        return icon_replaced
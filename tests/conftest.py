@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+
+
+@pytest.fixture
+def fake_pyinstaller(tmp_path, monkeypatch):
+    """Put benchmarks/fake_pyinstaller.py first on PATH as `pyinstaller`, with quick builds."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    tool = bin_dir / "pyinstaller"
+    tool.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCH_DIR, "fake_pyinstaller.py")}" "$@"\n')
+    tool.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ.get("PATH", ""))
+    monkeypatch.setenv("BENCH_PYI_DELAY", "0.5")
+    monkeypatch.setenv("BENCH_PYI_LINES", "20")
+    monkeypatch.setenv("BENCH_PYI_EXE_BYTES", "65536")
+    monkeypatch.setenv("WEBAPP_BUILDER_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setenv("WEBAPP_BUILDER_SCRATCH", str(tmp_path / "scratch"))
@@ -0,0 +1,44 @@
+"""Slot locking in the shared PyInstaller workspace."""
+import os
+import threading
+
+import pytest
+
+from analysis_cache import SharedWorkspace
+
+KEY = "0123456789abcdef"
+
+
+def make_workspace(tmp_path, slots):
+    workspace = SharedWorkspace(root=str(tmp_path / "work"), slots=slots)
+    workspace._toolchain = "6.0"
+    return workspace
+
+
+def test_free_slots_are_taken_in_order(tmp_path):
+    workspace = make_workspace(tmp_path, 3)
+    slots = [workspace.acquire(KEY) for _ in range(3)]
+    assert [os.path.basename(slot.path) for slot in slots] == ["slot-0", "slot-1", "slot-2"]
+    for slot in slots:
+        slot.release()
+
+
+@pytest.mark.parametrize("freed", [0, 1])
+def test_waiting_thread_takes_whichever_slot_frees(tmp_path, freed):
+    # All waiters share one pid (GUI, build service): any freed slot must let one through
+    workspace = make_workspace(tmp_path, 2)
+    held = [workspace.acquire(KEY), workspace.acquire(KEY)]
+    got = []
+
+    def build():
+        slot = workspace.acquire(KEY)
+        got.append(os.path.basename(slot.path))
+        slot.release()
+
+    waiter = threading.Thread(target=build)
+    waiter.start()
+    held[freed].release()
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+    assert got == [f"slot-{freed}"]
+    held[1 - freed].release()
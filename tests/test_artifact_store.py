@@ -0,0 +1,102 @@
+"""ArtifactStore: deduplication accounting and the registry queries behind `list`."""
+import os
+
+import pytest
+
+import stamping
+from artifact_store import ArtifactStore
+from build_engine import BuildResult, BuildSpec
+
+EXE = b"MZ" + bytes(range(256)) * 64
+
+
+def build(tmp_path, name, data=EXE):
+    """A 'built' onefile launcher at output/<safe_name>/dist/<name>.exe."""
+    spec = BuildSpec(name, f"https://{name.lower().replace(' ', '')}.example")
+    dist = tmp_path / "output" / spec.safe_name / "dist"
+    dist.mkdir(parents=True, exist_ok=True)
+    exe = dist / f"{name}.exe"
+    exe.write_bytes(data)
+    return spec, BuildResult(name, True, exe_path=str(exe), seconds=1.0)
+
+
+def only_hash(store):
+    with store.connect() as db:
+        hashes = [row["hash"] for row in db.execute("SELECT hash FROM files")]
+    assert len(hashes) == 1
+    return hashes[0]
+
+
+def make_store(tmp_path):
+    return ArtifactStore(str(tmp_path / "output" / ".artifacts"))
+
+
+def test_identical_files_are_stored_once(tmp_path):
+    store = make_store(tmp_path)
+    first = build(tmp_path, "App One")
+    second = build(tmp_path, "App Two")
+
+    assert store.add(*first) == 0
+    assert store.add(*second) == len(EXE)
+    assert store.usage() == {"launchers": 2, "files": 2, "logical": 2 * len(EXE), "stored": len(EXE),
+                             "saved": len(EXE)}
+    assert open(second[1].exe_path, "rb").read() == EXE
+    assert store.verify() == []
+
+
+def test_different_files_save_nothing(tmp_path):
+    store = make_store(tmp_path)
+    store.add(*build(tmp_path, "App One"))
+    store.add(*build(tmp_path, "App Two", EXE + b"config"))
+
+    usage = store.usage()
+    assert usage["saved"] == 0
+    assert usage["stored"] == usage["logical"] == 2 * len(EXE) + len(b"config")
+
+
+def test_rebuild_replaces_entry_and_drops_unused_object(tmp_path):
+    store = make_store(tmp_path)
+    store.add(*build(tmp_path, "App One"))
+    old_object = store.object_path(only_hash(store))
+    store.add(*build(tmp_path, "App One", EXE + b"v2"))
+
+    assert [item["name"] for item in store.launchers()] == ["App One"]
+    assert store.usage()["logical"] == len(EXE) + 2
+    assert not os.path.exists(old_object)
+
+
+def test_list_query_is_newest_first_and_filters_by_safe_name(tmp_path):
+    store = make_store(tmp_path)
+    for name in ("App One", "App Two", "App Three"):
+        store.add(*build(tmp_path, name))
+
+    assert [item["name"] for item in store.launchers()] == ["App Three", "App Two", "App One"]
+    assert [item["name"] for item in store.launchers("App_Two")] == ["App Two"]
+    assert store.latest()["name"] == "App Three"
+    assert store.latest("App_One")["url"] == "https://appone.example"
+    assert store.launchers("Nothing") == []
+
+
+def test_prune_forgets_deleted_launchers(tmp_path):
+    store = make_store(tmp_path)
+    _, result = build(tmp_path, "App One")
+    store.add(*build(tmp_path, "App One"))
+    store.add(*build(tmp_path, "App Two", EXE + b"2"))
+    os.remove(result.exe_path)
+
+    assert store.prune() == 1
+    assert [item["name"] for item in store.launchers()] == ["App Two"]
+
+
+def test_empty_store(tmp_path):
+    store = make_store(tmp_path)
+    assert store.launchers() == []
+    assert store.usage()["launchers"] == 0
+
+
+def test_replace_icon_refuses_hard_linked_files(tmp_path):
+    exe = tmp_path / "App.exe"
+    exe.write_bytes(EXE)
+    os.link(exe, tmp_path / "object")
+    with pytest.raises(stamping.StampError, match="hard-linked"):
+        stamping.replace_icon(str(exe), str(tmp_path / "icon.ico"))
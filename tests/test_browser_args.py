@@ -0,0 +1,175 @@
+"""The exact browser command line a launcher builds, and which custom flags a build accepts."""
+import os
+import json
+
+import pytest
+
+import build_engine
+import main_edge
+import script_launcher
+from build_engine import BuildError, BuildSpec
+
+BROWSER = r"C:\Edge\msedge.exe"
+ENV = {"LOCALAPPDATA": r"C:\Users\me\AppData\Local"}
+BASE = [
+    BROWSER,
+    "--app=https://example.com",
+    "--window-name=Example",
+    "--window-size=1200,800",
+    "--no-first-run",
+    "--no-default-browser-check",
+]
+LEAN = [
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-features=MediaRouter,OptimizationHints",
+]
+LOW_MEMORY = [
+    "--renderer-process-limit=2",
+    "--process-per-site",
+    "--enable-low-end-device-mode",
+]
+
+
+def argv(**settings):
+    """The launcher's command line for a spec, through the config a build bundles."""
+    spec = BuildSpec("Example", "https://example.com", **settings)
+    config = dict(main_edge.current_config(), **json.loads(build_engine.render_app_config(spec)))
+    return main_edge.app_browser_args(BROWSER, config=config, env=ENV)
+
+
+def test_no_preset():
+    assert argv() == BASE
+
+
+def test_lean_preset():
+    assert argv(presets=["lean"]) == BASE + LEAN
+
+
+def test_low_memory_preset():
+    assert argv(presets=["low-memory"]) == BASE + LOW_MEMORY
+
+
+def test_both_presets():
+    assert argv(presets=["lean", "low-memory"]) == BASE + LEAN + LOW_MEMORY
+
+
+def test_custom_flags_follow_presets():
+    assert argv(presets=["low-memory"], flags="--lang=de --force-dark-mode") == (
+        BASE + LOW_MEMORY + ["--lang=de", "--force-dark-mode"])
+
+
+def test_frameless_merges_custom_disable_features():
+    assert argv(frameless=True, flags=["--disable-features=Translate,OverlayScrollbar"]) == BASE + [
+        "--app-auto-launched",
+        "--disable-features=OverlayScrollbar,Translate",
+    ]
+
+
+def test_frameless_lean_and_custom_features_make_one_switch():
+    assert argv(frameless=True, presets=["lean"], flags=["--disable-features=Translate",
+                                                         "--enable-features=ParallelDownloading"]) == BASE + [
+        "--app-auto-launched",
+        "--disable-features=OverlayScrollbar,MediaRouter,OptimizationHints,Translate",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-extensions",
+        "--disable-sync",
+        "--disable-default-apps",
+        "--enable-features=ParallelDownloading",
+    ]
+
+
+def test_default_profile_and_cache():
+    profile = os.path.join(ENV["LOCALAPPDATA"], "WebAppBuilder", "Profiles", "Example")
+    assert argv(profile=True, cache_size_mb=64) == BASE + [
+        f"--user-data-dir={profile}",
+        f"--disk-cache-size={64 * 1024 * 1024}",
+    ]
+
+
+def test_profile_folder_and_cache_folder():
+    assert argv(profile_dir=r"D:\Profiles\Example", cache_dir=r"R:\Cache", cache_size_mb=0,
+                presets=["lean"]) == BASE + [
+        r"--user-data-dir=D:\Profiles\Example",
+        r"--disk-cache-dir=R:\Cache",
+    ] + LEAN
+
+
+def test_stub_keeps_trailing_backslashes():
+    spec = BuildSpec("Example", "https://example.com", profile_dir="D:\\Profiles\\Example\\",
+                     cache_dir="R:\\", packaging="stub")
+    config = json.loads(build_engine.render_app_config(spec))
+    _, profile_args = script_launcher.command_line_parts(config)
+    assert profile_args == r'"--user-data-dir=D:\Profiles\Example\\" "--disk-cache-dir=R:\\"'
+
+
+def test_vbs_string_splices_control_characters():
+    assert script_launcher.vbs_string('Say "hi"') == '"Say ""hi"""'
+    assert script_launcher.vbs_string("a\r\nb\t") == '"a" & Chr(13) & "" & Chr(10) & "b" & Chr(9) & ""'
+
+
+def test_stub_script_lines_stay_closed():
+    spec = BuildSpec("Example", "https://example.com/?q=a%0Ab", packaging="stub")
+    config = json.loads(build_engine.render_app_config(spec))
+    config["APP_URL"] = "https://example.com/\r\nx"
+    config["APP_NAME"] = "Two\nLines"
+    source = script_launcher.render_script(config, "app.ico")
+    assert "Two Lines" in source.splitlines()[0]
+    # Every string literal closes on the line it opened
+    assert all(line.count('"') % 2 == 0 for line in source.splitlines()[1:])
+    assert 'Chr(13) & "" & Chr(10) & "x' in source
+
+
+def test_build_browser_args_is_pure():
+    assert main_edge.build_browser_args("chrome", "https://a.test/x?y=1", "A B", 640, 480, False,
+                                        profile_dir="/p", cache_size_mb=1, cache_dir="/c",
+                                        flags=["--lang=fr"]) == [
+        "chrome",
+        "--app=https://a.test/x?y=1",
+        "--window-name=A B",
+        "--window-size=640,480",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--user-data-dir=/p",
+        "--disk-cache-dir=/c",
+        "--disk-cache-size=1048576",
+        "--lang=fr",
+    ]
+
+
+def test_merge_list_switches_keeps_first_position_and_values_once():
+    assert main_edge.merge_list_switches([
+        "x", "--enable-features=A,B", "--disable-features=C", "y", "--enable-features=B,C,", "--enable-features",
+    ]) == ["x", "--enable-features=A,B,C", "--disable-features=C", "y"]
+
+
+@pytest.mark.parametrize("flag", ["--lang=de", "--force-dark-mode", "--disable-features=Translate",
+                                  "--proxy-server=http://proxy:8080"])
+def test_accepted_flags(flag):
+    build_engine.check_browser_flag(flag)
+
+
+@pytest.mark.parametrize("flag", ["--app=https://evil.test", "--user-data-dir=C:\\other", "--window-size=1,1",
+                                  "--disk-cache-dir=X:\\", "--window-name", "--disk-cache-size=1"])
+def test_reserved_flags_rejected(flag):
+    with pytest.raises(BuildError, match="is set by the launcher"):
+        build_engine.check_browser_flag(flag)
+
+
+@pytest.mark.parametrize("flag", ["--remote-debugging-port=9222", "--no-sandbox", "--disable-web-security",
+                                  "--load-extension=C:\\ext", "--ignore-certificate-errors",
+                                  "--remote-allow-origins=*"])
+def test_unsafe_flags_rejected(flag):
+    with pytest.raises(BuildError, match="weakens browser security"):
+        build_engine.check_browser_flag(flag)
+
+
+@pytest.mark.parametrize("flag", ["lang=de", "-lang=de", "--Lang=de", '--lang="de"', "--lang=de\r\n--no-sandbox",
+                                  "--", "--lang de"])
+def test_malformed_flags_rejected(flag):
+    with pytest.raises(BuildError, match="Invalid browser flag"):
+        build_engine.check_browser_flag(flag)
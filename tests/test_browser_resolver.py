@@ -0,0 +1,113 @@
+"""BrowserResolver against a fake install tree."""
+import os
+import json
+
+import main_edge
+from main_edge import BrowserResolver
+
+EDGE = ("pf86", "Microsoft/Edge/Application/msedge.exe")
+EDGE_BETA = ("pf86", "Microsoft/Edge Beta/Application/msedge.exe")
+EDGE_DEV = ("local", "Microsoft/Edge Dev/Application/msedge.exe")
+CHROME = ("pf", "Google/Chrome/Application/chrome.exe")
+CHROMIUM = ("local", "Chromium/Application/chrome.exe")
+
+
+def make_env(tmp_path):
+    return {
+        "ProgramFiles(x86)": str(tmp_path / "pf86"),
+        "ProgramFiles": str(tmp_path / "pf"),
+        "LOCALAPPDATA": str(tmp_path / "local"),
+        "PATH": "",
+    }
+
+
+def install(tmp_path, *browsers):
+    paths = []
+    for base, rel_path in browsers:
+        path = tmp_path / base / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"MZ")
+        paths.append(str(path))
+    return paths
+
+
+def make_resolver(tmp_path, preference=None, custom_path=None):
+    return BrowserResolver(preference, custom_path, env=make_env(tmp_path),
+                           cache_path=str(tmp_path / "cache" / "browser.json"))
+
+
+def test_preference_order(tmp_path):
+    edge, beta, dev, chrome, chromium = install(tmp_path, EDGE, EDGE_BETA, EDGE_DEV, CHROME, CHROMIUM)
+    expected = [(edge, "Microsoft Edge"), (beta, "Microsoft Edge Beta"), (dev, "Microsoft Edge Dev"),
+                (chrome, "Google Chrome"), (chromium, "Chromium")]
+    for path, name in expected:
+        assert make_resolver(tmp_path).probe() == (path, name)
+        os.remove(path)
+    assert make_resolver(tmp_path).probe() == (None, None)
+
+
+def test_preference_list_reorders_channels(tmp_path):
+    edge, chrome = install(tmp_path, EDGE, CHROME)
+    assert make_resolver(tmp_path, ["chrome", "edge"]).probe() == (chrome, "Google Chrome")
+    assert make_resolver(tmp_path, ["chromium", "edge"]).probe() == (edge, "Microsoft Edge")
+
+
+def test_custom_path_comes_first(tmp_path):
+    install(tmp_path, EDGE)
+    custom, = install(tmp_path, ("portable", "browser.exe"))
+    assert make_resolver(tmp_path, custom_path=custom).probe() == (custom, "Custom browser")
+
+
+def test_custom_entry_in_preference_list(tmp_path):
+    edge, custom = install(tmp_path, EDGE, ("portable", "browser.exe"))
+    resolver = make_resolver(tmp_path, ["edge", main_edge.CUSTOM_BROWSER], custom_path=custom)
+    assert resolver.probe() == (edge, "Microsoft Edge")
+    os.remove(edge)
+    assert resolver.probe() == (custom, "Custom browser")
+
+
+def test_cache_hit_skips_probe(tmp_path):
+    install(tmp_path, CHROMIUM)
+    first = make_resolver(tmp_path)
+    path, name = first.resolve()
+    assert name == "Chromium"
+    assert first.probes > 1
+
+    second = make_resolver(tmp_path)
+    assert second.resolve() == (path, name)
+    assert second.probes == 1   # only the cached exe was checked
+
+
+def test_reprobe_when_cached_exe_changes(tmp_path):
+    edge, = install(tmp_path, EDGE)
+    make_resolver(tmp_path).resolve()
+    stat = os.stat(edge)
+    os.utime(edge, (stat.st_atime, stat.st_mtime + 10))
+
+    resolver = make_resolver(tmp_path)
+    assert resolver.resolve() == (edge, "Microsoft Edge")
+    assert resolver.probes > 1
+    # The new mtime is cached
+    resolver = make_resolver(tmp_path)
+    resolver.resolve()
+    assert resolver.probes == 1
+
+
+def test_reprobe_when_cached_exe_is_gone(tmp_path):
+    edge, chrome = install(tmp_path, EDGE, CHROME)
+    assert make_resolver(tmp_path).resolve() == (edge, "Microsoft Edge")
+    os.remove(edge)
+    assert make_resolver(tmp_path).resolve() == (chrome, "Google Chrome")
+
+
+def test_cache_key_follows_preference_list(tmp_path):
+    edge, chrome = install(tmp_path, EDGE, CHROME)
+    assert make_resolver(tmp_path).resolve() == (edge, "Microsoft Edge")
+
+    resolver = make_resolver(tmp_path, ["chromium", "chrome", "edge"])
+    assert resolver.resolve() == (chrome, "Google Chrome")
+    assert resolver.probes > 1   # not answered from the default list's entry
+
+    with open(tmp_path / "cache" / "browser.json", encoding="utf-8") as f:
+        assert len(json.load(f)["entries"]) == 2
+    assert make_resolver(tmp_path).resolve() == (edge, "Microsoft Edge")
@@ -0,0 +1,70 @@
+"""Distributed builds on local worker processes, with the stand-in pyinstaller on PATH."""
+import os
+import sys
+import signal
+
+import pytest
+
+import build_cluster
+import build_engine
+from build_cluster import ProtocolError, safe_relpath
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="stand-in tools are shell scripts")
+
+
+@pytest.fixture
+def workers(fake_pyinstaller):
+    processes, addresses = build_cluster.start_local_workers(2, jobs=1, args=["--no-cache", "--no-trace"])
+    yield processes, addresses
+    build_cluster.stop_local_workers(processes)
+
+
+def make_specs(count):
+    return [build_engine.BuildSpec(f"Cluster App {i}", f"https://app{i}.example",
+                                   icon=build_engine.get_bundled_icon_path())
+            for i in range(count)]
+
+
+def test_distribute_over_two_workers(tmp_path, workers):
+    processes, addresses = workers
+    specs = make_specs(4)
+    output = tmp_path / "output"
+    results = build_cluster.Coordinator(specs, str(output), addresses, store=False).run()
+
+    assert [r.ok for r in results] == [True] * 4, [r.error for r in results]
+    assert {r.worker for r in results} == set(addresses)
+    for spec, result in zip(specs, results):
+        dist = output / spec.safe_name / "dist"
+        assert result.exe_path == str(dist / f"{spec.name}.exe")
+        assert os.path.isfile(result.exe_path)
+        assert (dist / build_engine.LOG_FILE).is_file()
+        assert not (output / spec.safe_name / "dist.incoming").exists()
+
+
+def test_killed_worker_apps_are_rebuilt_elsewhere(tmp_path, workers):
+    processes, addresses = workers
+
+    def on_result(result):
+        # Killed with its second app still building
+        if result.worker == addresses[0] and processes[0].poll() is None:
+            os.kill(processes[0].pid, signal.SIGKILL)
+
+    coordinator = build_cluster.Coordinator(make_specs(4), str(tmp_path / "output"), addresses, store=False,
+                                            on_result=on_result)
+    results = coordinator.run()
+
+    assert [r.ok for r in results] == [True] * 4, [r.error for r in results]
+    assert coordinator.retried >= 1
+    assert sum(1 for r in results if r.worker == addresses[0]) == 1
+    assert coordinator.links[0].error is not None
+    assert coordinator.summary()["retried"] == coordinator.retried
+
+
+@pytest.mark.parametrize("path", ["../x.exe", "a/../../x", "/etc/passwd", "C:\\x.exe", "a\\..\\x", "", "a//b"])
+def test_safe_relpath_rejects_escaping_paths(path):
+    with pytest.raises(ProtocolError):
+        safe_relpath(path)
+
+
+def test_safe_relpath_accepts_nested_paths():
+    assert safe_relpath("App/_internal\\base.zip") == os.path.join("App", "_internal", "base.zip")
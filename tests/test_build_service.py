@@ -0,0 +1,169 @@
+"""The build service's HTTP API and job scheduler, without running PyInstaller."""
+import os
+import json
+import time
+import asyncio
+import threading
+
+import pytest
+
+import build_engine
+import build_service
+from build_engine import BuildResult, BuildSpec
+from build_service import BuildJob, BuildScheduler, BuildService
+
+
+async def request(service, method, path, payload=None):
+    """One HTTP request against a running service. Returns (status, decoded JSON body)."""
+    reader, writer = await asyncio.open_connection(service.host, service.port)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+                 + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), json.loads(content)
+
+
+def with_service(tmp_path, test, **settings):
+    async def main():
+        service = BuildService(BuildScheduler(str(tmp_path), **settings), port=0)
+        await service.start()
+        try:
+            return await test(service)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("name", ["../../x", "a/b", "a\\b", "C:x", "two\nlines"])
+def test_submit_rejects_path_like_names(tmp_path, name):
+    async def test(service):
+        status, body = await request(service, "POST", "/jobs",
+                                     {"name": name, "url": "https://example.com", "packaging": "onedir"})
+        assert status == 400
+        assert "App name cannot contain" in body["error"]
+        assert (await request(service, "GET", "/jobs"))[1] == {"jobs": []}
+
+    with_service(tmp_path, test)
+
+
+def test_artifact_zips_off_the_event_loop_once(tmp_path, monkeypatch):
+    calls = []
+
+    def slow_zip(job):
+        calls.append(job.id)
+        time.sleep(0.3)
+        return str(tmp_path / "App.zip")
+
+    monkeypatch.setattr(build_service, "artifact_path", slow_zip)
+
+    async def main():
+        scheduler = BuildScheduler(str(tmp_path))
+        job = BuildJob("job1", BuildSpec("App", "https://example.com", packaging="onedir"), str(tmp_path))
+        ticks = []
+
+        async def tick():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        paths = await asyncio.gather(scheduler.artifact(job), scheduler.artifact(job), tick())
+        return paths[:2], ticks
+
+    paths, ticks = asyncio.run(main())
+    assert paths == [str(tmp_path / "App.zip")] * 2
+    assert calls == ["job1"]
+    assert ticks[-1] - ticks[0] < 0.25
+
+
+class FakeBuilds:
+    """Stands in for build_launcher: each build runs until cancelled or released."""
+
+    def __init__(self):
+        self.started = []
+        self.release = threading.Event()
+
+    def __call__(self, spec, output_root, status=None, options=None, progress=None, cancel=None):
+        self.started.append(spec.name)
+        while not self.release.wait(0.01):
+            cancel.check()
+        return BuildResult(spec.name, True, exe_path=os.path.join(output_root, f"{spec.name}.exe"))
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    fake = FakeBuilds()
+    monkeypatch.setattr(build_engine, "build_launcher", fake)
+    return fake
+
+
+def make_spec(name="App"):
+    return BuildSpec(name, "https://example.com").freeze()
+
+
+async def wait_for_state(job, state):
+    for _ in range(200):
+        if job.state == state:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stayed {job.state}, expected {state}")
+
+
+def test_timed_out_build_is_cancelled(tmp_path, builds):
+    async def main():
+        scheduler = BuildScheduler(str(tmp_path), jobs=1, timeout=0.2)
+        await scheduler.start()
+        try:
+            job = scheduler.submit(make_spec())
+            await asyncio.wait_for(job.done.wait(), 5)
+            return job
+        finally:
+            await scheduler.stop()
+
+    job = asyncio.run(main())
+    assert job.state == "timed_out"
+    assert job.status == "Timed out"
+    assert job.error == "Build timed out after 0.2s"
+    assert job.cancel.cancelled
+
+
+def test_cancel_running_and_queued_jobs(tmp_path, builds):
+    async def main():
+        scheduler = BuildScheduler(str(tmp_path), jobs=1)
+        await scheduler.start()
+        try:
+            running = scheduler.submit(make_spec("First"))
+            queued = scheduler.submit(make_spec("Second"))
+            await wait_for_state(running, "running")
+            assert queued.state == "queued"
+
+            assert scheduler.cancel(queued.id)
+            assert queued.state == "cancelled"
+            assert scheduler.cancel(running.id)
+            await asyncio.wait_for(running.done.wait(), 5)
+            assert not scheduler.cancel(running.id)
+            return running, queued
+        finally:
+            await scheduler.stop()
+
+    running, queued = asyncio.run(main())
+    assert (running.state, running.error) == ("cancelled", "Build cancelled")
+    assert (queued.state, queued.error) == ("cancelled", "Build cancelled")
+    assert builds.started == ["First"]
+
+
+def test_finished_job_cannot_be_cancelled(tmp_path, builds):
+    builds.release.set()
+
+    async def test(service):
+        status, job = await request(service, "POST", "/jobs", {"name": "App", "url": "https://example.com"})
+        assert status == 202 and job["state"] == "queued"
+        await asyncio.wait_for(service.scheduler.jobs[job["id"]].done.wait(), 5)
+        status, job = await request(service, "GET", f"/jobs/{job['id']}")
+        assert (status, job["state"]) == (200, "succeeded")
+        status, body = await request(service, "DELETE", f"/jobs/{job['id']}")
+        assert (status, body["error"]) == (409, "Job already succeeded")
+
+    with_service(tmp_path, test, jobs=1)
@@ -0,0 +1,79 @@
+"""Build trace records, including builds that never got past validation."""
+import os
+import sys
+
+import pytest
+
+import build_engine
+import build_trace
+from build_engine import BuildError, BuildOptions, BuildSpec
+
+
+@pytest.mark.parametrize("spec, error", [
+    (BuildSpec("Example", "ftp://example.com"), "URL must start with http:// or https://"),
+    (BuildSpec("Example", "https://example.com", icon="missing.ico"), "Icon file not found"),
+    (BuildSpec("!!!", "https://example.com"), "App name must contain at least one letter or digit"),
+])
+def test_rejected_specs_are_traced(tmp_path, spec, error):
+    trace = tmp_path / "trace.jsonl"
+    with pytest.raises(BuildError, match=error):
+        build_engine.build_launcher(spec, str(tmp_path / "output"), options=BuildOptions(trace=str(trace)))
+
+    record, = build_trace.load_records(str(trace))
+    assert record["app"] == spec.name
+    assert record["ok"] is False
+    assert record["error"] == error
+    assert set(record["stages"]) == {"validate", "total"}
+    assert not (tmp_path / "output").exists()
+
+
+def test_summarize_counts_rejected_builds(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    options = BuildOptions(trace=str(trace))
+    for url in ("https://example.com/", "not a url"):
+        with pytest.raises(BuildError):
+            build_engine.build_launcher(BuildSpec("Example", url, icon="missing.ico"), str(tmp_path), options=options)
+
+    records = build_trace.load_records(str(trace))
+    assert [r["ok"] for r in records] == [False, False]
+    assert build_trace.summarize(records)[0][:2] == ("validate", 2)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="stand-in tools are shell scripts")
+@pytest.mark.parametrize("scratch", [True, False])
+def test_scratch_builds_report_io_saved(tmp_path, fake_pyinstaller, scratch):
+    trace = tmp_path / "trace.jsonl"
+    options = BuildOptions.for_mode("standard", use_cache=False, trace=str(trace), scratch=scratch,
+                                    scratch_dir=str(tmp_path / "work"))
+    build_engine.build_launcher(BuildSpec("Example", "https://example.com"), str(tmp_path / "output"),
+                                options=options)
+    if options.scratch is not None:
+        options.scratch.wait()
+
+    record, = build_trace.load_records(str(trace))
+    assert record["ok"] is True
+    if scratch:
+        assert record["workspace"] == "scratch"
+        assert record["io_saved"]["cleanup"] > 0
+        assert os.listdir(tmp_path / "work") == []
+        assert "saved/cleanup" in [row[0] for row in build_trace.summarize([record])]
+    else:
+        assert record["workspace"] == "in-place"
+        assert record["io_saved"] is None
+        assert record["stages"]["cleanup"] > 0
+
+
+def test_scratch_discard_reports_deletion_time(tmp_path):
+    from workspace import ScratchSpace
+
+    space = ScratchSpace(str(tmp_path / "scratch"))
+    folder = space.create("App")
+    for i in range(20):
+        with open(os.path.join(folder, f"{i}.pyc"), "wb") as f:
+            f.write(b"x" * 1024)
+    reported = []
+    space.discard(folder, reported.append)
+    space.wait()
+
+    assert not os.path.exists(folder)
+    assert len(reported) == 1 and reported[0] >= 0
@@ -0,0 +1,102 @@
+"""The built-in ICO/PNG reader and ICO writer, on PNGs made without Pillow."""
+import zlib
+import struct
+
+import pytest
+
+import build_engine
+from icon_format import IconFormatError, inspect_icon, pack_pngs, read_icon, read_ico, read_png, write_ico
+
+
+def chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def make_png(width, height=None):
+    """A valid RGBA PNG of the given size (one flat colour)."""
+    height = height or width
+    rows = b"".join(b"\0" + b"\x10\x80\xf0\xff" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows))
+            + chunk(b"IEND", b""))
+
+
+def test_ico_round_trip(tmp_path):
+    pngs = {side: make_png(side) for side in (16, 32, 48, 256)}
+    ico = tmp_path / "app.ico"
+    written = write_ico([pngs[16], pngs[256], pngs[48], pngs[32]], str(ico))
+    assert [frame.size for frame in written] == [(256, 256), (48, 48), (32, 32), (16, 16)]
+
+    info = inspect_icon(str(ico))
+    assert info.kind == "ico"
+    assert info.sizes == [(256, 256), (48, 48), (32, 32), (16, 16)]
+    assert all(frame.encoding == "png" and frame.bits == 32 for frame in info.frames)
+
+    # Frames are stored byte for byte, 256 px listed as 0 in the directory
+    data = ico.read_bytes()
+    reserved, kind, count = struct.unpack_from("<HHH", data)
+    assert (reserved, kind, count) == (0, 1, 4)
+    for index, side in enumerate((256, 48, 32, 16)):
+        width, height, _, _, _, _, length, offset = struct.unpack_from("<BBBBHHII", data, 6 + 16 * index)
+        assert (width, height) == (side % 256, side % 256)
+        assert data[offset:offset + length] == pngs[side]
+
+
+def test_pack_pngs(tmp_path):
+    paths = []
+    for side in (32, 16):
+        path = tmp_path / f"icon-{side}.png"
+        path.write_bytes(make_png(side))
+        paths.append(str(path))
+    frames = pack_pngs(paths, str(tmp_path / "app.ico"))
+    assert [frame.size for frame in frames] == [(32, 32), (16, 16)]
+    assert read_icon((tmp_path / "app.ico").read_bytes()).sizes == [(32, 32), (16, 16)]
+
+
+def test_png_header(tmp_path):
+    path = tmp_path / "logo.png"
+    path.write_bytes(make_png(512, 300))
+    info = inspect_icon(str(path))
+    assert info.kind == "png"
+    assert info.frames[0].size == (512, 300)
+    assert not info.frames[0].ico_ready
+
+
+def test_bundled_icon_reads():
+    info = inspect_icon(build_engine.get_bundled_icon_path())
+    assert info.kind == "ico" and info.frames
+
+
+@pytest.mark.parametrize("frames, message", [
+    ([make_png(32, 16)], "must be square"),
+    ([make_png(512)], "too large"),
+    ([make_png(32), make_png(32)], "only appear once"),
+    ([], "No frames"),
+])
+def test_write_ico_rejects(tmp_path, frames, message):
+    with pytest.raises(IconFormatError, match=message):
+        write_ico(frames, str(tmp_path / "app.ico"))
+
+
+def test_read_png_rejects_damage():
+    png = make_png(16)
+    with pytest.raises(IconFormatError, match="truncated"):
+        read_png(png[:-12])
+    with pytest.raises(IconFormatError, match="checksum"):
+        read_png(png[:29] + b"\0\0\0\0" + png[33:])
+    with pytest.raises(IconFormatError, match="Not a PNG"):
+        read_png(b"GIF89a" + png[6:])
+
+
+def test_read_ico_rejects_damage(tmp_path):
+    write_ico([make_png(32)], str(tmp_path / "app.ico"))
+    data = (tmp_path / "app.ico").read_bytes()
+    with pytest.raises(IconFormatError, match="outside the file"):
+        read_ico(data[:-1])
+    with pytest.raises(IconFormatError, match="cursor"):
+        read_ico(data[:2] + b"\2\0" + data[4:])
+    with pytest.raises(IconFormatError, match="listed as 16x16"):
+        read_ico(data[:6] + b"\x10\x10" + data[8:])
+    with pytest.raises(IconFormatError, match="Not an ICO or PNG"):
+        read_icon(b"BM" + data)
@@ -0,0 +1,64 @@
+"""Aggregating launcher telemetry logs collected from several machines."""
+import os
+import json
+
+import launch_telemetry
+from launch_telemetry import group_launches, load_launches, summarize_launches
+
+
+def record(app="PerformX", launcher="onefile-1", **ms):
+    return {"app": app, "launcher": launcher, "outcome": "spawned", "ms": ms}
+
+
+def write_log(path, records, extra_lines=()):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for item in records:
+            f.write(json.dumps(item) + "\n")
+        for line in extra_lines:
+            f.write(line + "\n")
+
+
+def test_percentiles_per_milestone():
+    records = [record(popen=float(ms), meipass=10.0) for ms in range(1, 101)]
+    records.append(record(meipass=10.0, handover="n/a"))
+    rows = summarize_launches(records)
+
+    assert [row[0] for row in rows] == ["meipass", "popen"]
+    name, count, p50, p90, p99, top = rows[1]
+    assert count == 100
+    assert p50 == 50.5
+    assert p90 == 90.1
+    assert round(p99, 2) == 99.01
+    assert top == 100.0
+    assert rows[0][1:] == (101, 10.0, 10.0, 10.0, 10.0)
+
+
+def test_milestones_in_launch_order_then_unknown():
+    rows = summarize_launches([record(zeta=1, shortcut=3, meipass=1, browser=2, popen=2)])
+    assert [row[0] for row in rows] == ["meipass", "browser", "popen", "shortcut", "zeta"]
+
+
+def test_logs_from_several_machines(tmp_path):
+    write_log(tmp_path / "pc1" / "launches.jsonl", [record(popen=100), record(popen=300)])
+    write_log(tmp_path / "pc1" / "launches.jsonl.1", [record(popen=200)])
+    write_log(tmp_path / "pc2" / "launches.jsonl",
+              [record(launcher="onedir-1", popen=40), record(app="MFG Store", popen=80)],
+              extra_lines=['{"app": "cut off', '"not a record"'])
+    (tmp_path / "pc2" / "notes.txt").write_text("ignored")
+
+    records, skipped = load_launches([str(tmp_path)])
+    assert len(records) == 5
+    assert skipped == 2
+
+    groups = group_launches(records)
+    assert list(groups) == [("MFG Store", "onefile-1"), ("PerformX", "onedir-1"), ("PerformX", "onefile-1")]
+    assert summarize_launches(groups[("PerformX", "onefile-1")])[0][:3] == ("popen", 3, 200)
+    assert list(group_launches(records, by=("outcome",))) == [("spawned",)]
+
+
+def test_log_files_picks_rolled_over_logs(tmp_path):
+    for name in ("launches.jsonl", "launches.jsonl.1", "launches.json", "trace.log"):
+        (tmp_path / name).write_text("")
+    assert [os.path.basename(p) for p in launch_telemetry.log_files([str(tmp_path)])] == \
+        ["launches.jsonl", "launches.jsonl.1"]
@@ -0,0 +1,126 @@
+"""ShortcutKeeper with the in-memory shortcut backend: no COM work on a warm launch."""
+import os
+
+from main_edge import MemoryShortcutBackend, ShortcutKeeper
+
+
+def make_keeper(tmp_path, backend=None):
+    return ShortcutKeeper(backend or MemoryShortcutBackend(), stamp_path=str(tmp_path / "stamp" / "shortcuts.json"))
+
+
+def make_exe(tmp_path, data=b"MZ launcher"):
+    exe = tmp_path / "App.exe"
+    exe.write_bytes(data)
+    return str(exe)
+
+
+def test_first_launch_creates(tmp_path):
+    exe = make_exe(tmp_path)
+    keeper = make_keeper(tmp_path)
+    lnk = str(tmp_path / "menu" / "App.lnk")
+    assert keeper.ensure(lnk, exe, icon=exe, desc="App") == "created"
+    assert keeper.backend.shortcuts[lnk] == {"target": exe, "args": "", "icon": exe, "desc": "App"}
+
+
+def test_warm_launch_only_checks_existence(tmp_path):
+    exe = make_exe(tmp_path)
+    lnk = str(tmp_path / "App.lnk")
+    backend = MemoryShortcutBackend()
+    make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App")
+    backend.calls.clear()
+
+    assert make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App") == "unchanged"
+    assert backend.calls == [("exists", lnk)]
+
+
+def test_touched_exe_refreshes_stamp_only(tmp_path):
+    exe = make_exe(tmp_path)
+    lnk = str(tmp_path / "App.lnk")
+    backend = MemoryShortcutBackend()
+    make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App")
+    stat = os.stat(exe)
+    os.utime(exe, (stat.st_atime, stat.st_mtime + 10))
+    backend.calls.clear()
+
+    assert make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App") == "refreshed"
+    assert backend.calls == [("exists", lnk)]
+    # The refreshed stamp makes the next launch a warm one again
+    assert make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App") == "unchanged"
+
+
+def test_changed_exe_updates(tmp_path):
+    exe = make_exe(tmp_path)
+    lnk = str(tmp_path / "App.lnk")
+    backend = MemoryShortcutBackend()
+    make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App")
+    stat = os.stat(exe)
+    make_exe(tmp_path, b"MZ rebuilt")   # same size, new content
+    os.utime(exe, (stat.st_atime, stat.st_mtime + 10))
+    backend.calls.clear()
+
+    assert make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App") == "updated"
+    assert backend.calls == [("exists", lnk), ("remove", lnk), ("create", lnk)]
+
+
+def test_moved_exe_updates(tmp_path):
+    exe = make_exe(tmp_path)
+    lnk = str(tmp_path / "App.lnk")
+    backend = MemoryShortcutBackend()
+    make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App")
+    moved = tmp_path / "new"
+    moved.mkdir()
+    other = str(moved / "App.exe")
+    os.replace(exe, other)
+
+    assert make_keeper(tmp_path, backend).ensure(lnk, other, icon=other, desc="App") == "updated"
+    assert backend.shortcuts[lnk]["target"] == other
+
+
+def test_changed_icon_or_desc_updates(tmp_path):
+    exe = make_exe(tmp_path)
+    icon = tmp_path / "app.ico"
+    icon.write_bytes(b"\0\0\1\0")
+    lnk = str(tmp_path / "App.lnk")
+    backend = MemoryShortcutBackend()
+    make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App")
+
+    assert make_keeper(tmp_path, backend).ensure(lnk, exe, icon=str(icon), desc="App") == "updated"
+    assert make_keeper(tmp_path, backend).ensure(lnk, exe, icon=str(icon), desc="Renamed") == "updated"
+    assert backend.shortcuts[lnk]["desc"] == "Renamed"
+    assert [call for call, _ in backend.calls].count("create") == 3
+
+
+def test_missing_shortcut_is_recreated(tmp_path):
+    exe = make_exe(tmp_path)
+    lnk = str(tmp_path / "App.lnk")
+    backend = MemoryShortcutBackend()
+    make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App")
+    del backend.shortcuts[lnk]   # the user deleted the .lnk
+    backend.calls.clear()
+
+    assert make_keeper(tmp_path, backend).ensure(lnk, exe, icon=exe, desc="App") == "created"
+    assert backend.calls == [("exists", lnk), ("create", lnk)]
+
+
+def test_missing_target_fails(tmp_path):
+    backend = MemoryShortcutBackend()
+    lnk = str(tmp_path / "App.lnk")
+    missing = str(tmp_path / "Missing.exe")
+    assert make_keeper(tmp_path, backend).ensure(lnk, missing, icon=missing, desc="App") == "failed"
+    assert backend.calls == []
+    assert not os.path.exists(tmp_path / "stamp" / "shortcuts.json")
+
+
+def test_backend_failure_fails(tmp_path):
+    class FailingBackend(MemoryShortcutBackend):
+        def create(self, lpath, target, args="", icon=None, desc=None):
+            super().create(lpath, target, args, icon, desc)
+            return False
+
+    exe = make_exe(tmp_path)
+    lnk = str(tmp_path / "App.lnk")
+    keeper = make_keeper(tmp_path, FailingBackend())
+    assert keeper.ensure(lnk, exe, icon=exe, desc="App") == "failed"
+    # Nothing was stamped, so the next launch tries again
+    assert keeper.ensure(lnk, exe, icon=exe, desc="App") == "failed"
+    assert [call for call, _ in keeper.backend.calls].count("create") == 2
@@ -0,0 +1,64 @@
+"""Stamping an app config onto a launcher stub and reading it back."""
+import json
+
+import pytest
+
+import main_edge
+import stamping
+from stamping import LauncherStamper, StampError, make_trailer, read_stamp, strip_trailer, verify_stamp
+
+STUB = b"MZ stub" + bytes(4096) + b"MEI\x0c\x0b\x0a\x0b\x0e cookie"
+CONFIG = {"APP_NAME": "PerformX", "APP_URL": "https://performx.example", "WINDOW_WIDTH": 1200}
+
+
+def stamp(tmp_path, config, stub=STUB, name="PerformX.exe"):
+    stub_path = tmp_path / "stub.exe"
+    stub_path.write_bytes(stub)
+    dest = tmp_path / name
+    LauncherStamper(root=str(tmp_path / "stubs")).stamp(str(stub_path), json.dumps(config), "", str(dest))
+    return dest
+
+
+def test_stamp_appends_trailer_and_verifies(tmp_path):
+    dest = stamp(tmp_path, CONFIG)
+    data = dest.read_bytes()
+    assert data.startswith(STUB)
+    assert data.endswith(main_edge.CONFIG_TRAILER_MAGIC)
+    assert strip_trailer(data) == STUB
+    assert read_stamp(str(dest)) == CONFIG
+    assert verify_stamp(str(dest), CONFIG) == CONFIG
+
+
+def test_restamping_replaces_the_trailer(tmp_path):
+    first = stamp(tmp_path, CONFIG)
+    other = dict(CONFIG, APP_URL="https://other.example")
+    second = stamp(tmp_path, other, stub=first.read_bytes(), name="Other.exe")
+    assert strip_trailer(second.read_bytes()) == STUB
+    assert read_stamp(str(second)) == other
+
+
+def test_verify_stamp_reports_differences(tmp_path):
+    dest = stamp(tmp_path, CONFIG)
+    with pytest.raises(StampError, match="differs from expected: APP_URL, WINDOW_HEIGHT"):
+        verify_stamp(str(dest), dict(CONFIG, APP_URL="https://x.example", WINDOW_HEIGHT=800))
+
+
+def test_verify_stamp_without_trailer(tmp_path):
+    path = tmp_path / "plain.exe"
+    path.write_bytes(STUB)
+    assert read_stamp(str(path)) is None
+    with pytest.raises(StampError, match="No stamped config"):
+        verify_stamp(str(path), CONFIG)
+
+
+def test_trailer_size_limit(tmp_path):
+    footer = 4 + len(main_edge.CONFIG_TRAILER_MAGIC)
+    fits = json.dumps({"APP_NAME": "x" * (stamping.MAX_TRAILER_BYTES - footer - len('{"APP_NAME": ""}'))})
+    assert len(make_trailer(fits)) == stamping.MAX_TRAILER_BYTES
+
+    too_big = json.dumps({"APP_NAME": "x" * stamping.MAX_TRAILER_BYTES})
+    with pytest.raises(StampError, match="too large to stamp"):
+        make_trailer(too_big)
+    with pytest.raises(StampError):
+        stamp(tmp_path, json.loads(too_big))
+    assert not (tmp_path / "PerformX.exe").exists()
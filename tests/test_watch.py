@@ -0,0 +1,90 @@
+"""Watch mode: which apps a change rebuilds, and the watchers that notice changes."""
+import os
+import json
+import threading
+
+import pytest
+
+import watch
+from build_engine import BuildError
+from watch import ManifestWatch, PollingWatcher, changes, normpath
+
+
+def write_manifest(path, apps):
+    path.write_text(json.dumps({"apps": apps}))
+
+
+def app(name, icon, url=None):
+    return {"name": name, "url": url or f"https://{name.lower()}.example", "icon": icon}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    (tmp_path / "a.ico").write_bytes(b"a")
+    (tmp_path / "shared.ico").write_bytes(b"s")
+    path = tmp_path / "apps.json"
+    write_manifest(path, [app("One", "a.ico"), app("Two", "shared.ico"), app("Three", "shared.ico")])
+    return path
+
+
+def names(specs):
+    return sorted(spec.name for spec in specs)
+
+
+def test_paths_are_the_manifest_and_its_icons(tmp_path, manifest):
+    assert ManifestWatch(str(manifest)).paths() == [
+        normpath(manifest), normpath(tmp_path / "a.ico"), normpath(tmp_path / "shared.ico")]
+
+
+def test_changed_icon_rebuilds_only_its_apps(tmp_path, manifest):
+    watched = ManifestWatch(str(manifest))
+    assert names(watched.affected({normpath(tmp_path / "shared.ico")})) == ["Three", "Two"]
+    assert watched.affected({normpath(tmp_path / "unrelated.ico")}) == []
+
+
+def test_manifest_change_rebuilds_changed_and_new_entries(tmp_path, manifest):
+    watched = ManifestWatch(str(manifest))
+    write_manifest(manifest, [app("One", "a.ico"), app("Two", "shared.ico", "https://new.example"),
+                              app("Three", "shared.ico"), app("Four", "a.ico")])
+    assert names(watched.affected({normpath(manifest)})) == ["Four", "Two"]
+    # Unchanged manifest content: nothing to do
+    assert watched.affected({normpath(manifest)}) == []
+
+
+def test_broken_manifest_keeps_previous_apps(manifest):
+    watched = ManifestWatch(str(manifest))
+    manifest.write_text("{ not json")
+    with pytest.raises(BuildError, match="Could not load manifest"):
+        watched.affected({normpath(manifest)})
+    assert sorted(watched.specs) == ["One", "Three", "Two"]
+
+
+@pytest.mark.parametrize("poll", [True, False])
+def test_watcher_reports_a_burst_once(tmp_path, poll):
+    if not poll and not watch.inotify_available():
+        pytest.skip("no inotify")
+    target = tmp_path / "icon.ico"
+    target.write_bytes(b"1")
+    other = tmp_path / "other.ico"
+    watcher = watch.make_watcher([str(target)], poll=poll, interval=0.02)
+    stop = threading.Event()
+    try:
+        bursts = changes(watcher, debounce=0.1, stop=stop, tick=0.05)
+        writer = threading.Timer(0.1, lambda: (target.write_bytes(b"22"), other.write_bytes(b"x"),
+                                               os.replace(other, tmp_path / "renamed.ico"),
+                                               target.write_bytes(b"333")))
+        writer.start()
+        assert next(bursts) == {normpath(target)}
+        writer.join()
+    finally:
+        stop.set()
+        watcher.close()
+
+
+def test_polling_watcher_sees_deletion(tmp_path):
+    target = tmp_path / "icon.ico"
+    target.write_bytes(b"1")
+    watcher = PollingWatcher([str(target)], interval=0.01)
+    target.unlink()
+    assert watcher.wait(0.5) == {normpath(target)}
+    assert watcher.wait(0.05) == set()
@@ -0,0 +1,298 @@
+"""
+Watch mode: rebuild apps when their manifest entry or icon file changes.
+
+Files are watched with inotify where the kernel has it (Linux, through
+ctypes; the parent folders are watched so editors that save by renaming a
+temp file are seen too) and by comparing os.stat() snapshots every
+POLL_INTERVAL seconds elsewhere. Changes arriving in a burst (an editor
+writing a file in several steps, an icon exported at every size) are
+collected until nothing has changed for DEBOUNCE_SECONDS, then handed on
+as one set of paths.
+
+ManifestWatch turns such a set into the apps to rebuild: apps whose
+manifest entry changed (or that are new) and apps using a changed icon.
+Every other app is left alone.
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+
+from build_engine import BuildError, load_manifest
+
+# Quiet time that ends a burst of changes, and the longest a burst is held back
+DEBOUNCE_SECONDS = 0.3
+MAX_DEBOUNCE_SECONDS = 3.0
+# Stat-polling interval
+POLL_INTERVAL = 0.5
+# How often a waiting watcher checks for a stop request or new paths
+WATCH_TICK = 0.5
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def normpath(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+# ---------- Watchers ----------
+
+class PollingWatcher:
+    """Detects changes by comparing os.stat() of each path every interval seconds."""
+
+    kind = "poll"
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.snapshot = {}
+        self.set_paths(paths)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def set_paths(self, paths):
+        self.snapshot = {path: self.snapshot.get(path, self._stat(path)) for path in map(normpath, paths)}
+
+    def wait(self, timeout):
+        """Return the set of watched paths that changed, waiting up to timeout seconds for one."""
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, before in self.snapshot.items():
+                now = self._stat(path)
+                if now != before:
+                    self.snapshot[path] = now
+                    changed.add(path)
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detects changes with Linux inotify on the folders holding the watched paths."""
+
+    kind = "inotify"
+
+    def __init__(self, paths):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = set()
+        self.folders = {}   # watch descriptor -> folder
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        import ctypes
+
+        self.paths = {normpath(path) for path in paths}
+        watched = set(self.folders.values())
+        for folder in {os.path.dirname(path) for path in self.paths} - watched:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    continue  # picked up again on the next set_paths()
+                raise OSError(err, f"Cannot watch {folder}: {os.strerror(err)}")
+            self.folders[wd] = folder
+
+    def wait(self, timeout):
+        """Return the set of watched paths that changed, waiting up to timeout seconds for one."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += EVENT_HEADER.size + length
+                folder = self.folders.get(wd)
+                if mask & IN_Q_OVERFLOW:
+                    changed |= self.paths  # events were lost: assume everything changed
+                elif folder is None:
+                    continue
+                elif mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # The folder itself went away; its files count as changed
+                    changed |= {path for path in self.paths if os.path.dirname(path) == folder}
+                    if mask & IN_IGNORED:
+                        del self.folders[wd]
+                elif name:
+                    path = normpath(os.path.join(folder, os.fsdecode(name)))
+                    if path in self.paths:
+                        changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def inotify_available():
+    if not sys.platform.startswith("linux"):
+        return False
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return hasattr(libc, "inotify_init1")
+    except OSError:
+        return False
+
+
+def make_watcher(paths, poll=False, interval=POLL_INTERVAL):
+    """An InotifyWatcher where possible (unless poll is set), else a PollingWatcher."""
+    if not poll and inotify_available():
+        try:
+            return InotifyWatcher(paths)
+        except OSError:
+            pass  # e.g. out of inotify instances
+    return PollingWatcher(paths, interval)
+
+
+def changes(watcher, debounce=DEBOUNCE_SECONDS, stop=None, tick=WATCH_TICK, refresh=None):
+    """
+    Yield one set of changed paths per burst of changes, once nothing has
+    changed for debounce seconds (or MAX_DEBOUNCE_SECONDS after the burst
+    began). Stops when the stop event is set. refresh, if given, is called
+    every tick and returns new paths to watch (or None).
+    """
+    while stop is None or not stop.is_set():
+        if refresh is not None:
+            paths = refresh()
+            if paths is not None:
+                watcher.set_paths(paths)
+        changed = watcher.wait(tick)
+        if not changed:
+            continue
+        deadline = time.monotonic() + MAX_DEBOUNCE_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = watcher.wait(min(debounce, remaining))
+            if not more:
+                break
+            changed |= more
+        yield changed
+
+
+class WatchThread(threading.Thread):
+    """
+    Watches paths in the background and calls on_change(paths) from this
+    thread after each burst of changes. set_paths() and stop() may be called
+    from any thread.
+    """
+
+    def __init__(self, paths, on_change, debounce=DEBOUNCE_SECONDS, poll=False):
+        super().__init__(name="watch", daemon=True)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.watcher = make_watcher(paths, poll=poll)
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._paths = None
+
+    @property
+    def kind(self):
+        return self.watcher.kind
+
+    def set_paths(self, paths):
+        with self._lock:
+            self._paths = list(paths)
+
+    def _take_paths(self):
+        with self._lock:
+            paths, self._paths = self._paths, None
+        return paths
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        try:
+            for changed in changes(self.watcher, self.debounce, self._stop_event, refresh=self._take_paths):
+                self.on_change(changed)
+        finally:
+            self.watcher.close()
+
+
+# ---------- Manifest ----------
+
+class ManifestWatch:
+    """The apps of a manifest, by folder name, and which of them a set of changed files affects."""
+
+    def __init__(self, manifest_path):
+        self.path = normpath(manifest_path)
+        self.specs = self._load()
+
+    def _load(self):
+        specs = {}
+        for spec in load_manifest(self.path):
+            specs[spec.safe_name] = spec
+        return specs
+
+    def paths(self):
+        """The manifest and every icon its apps use."""
+        return [self.path] + sorted({normpath(spec.icon) for spec in self.specs.values() if spec.icon})
+
+    def affected(self, changed):
+        """
+        Specs to rebuild for a set of changed paths: new apps and apps whose
+        entry changed if the manifest did, plus apps using a changed icon.
+        Raises BuildError (and keeps the previous apps) if the manifest no
+        longer loads.
+        """
+        rebuild = {}
+        if self.path in changed:
+            try:
+                specs = self._load()
+            except (OSError, ValueError) as e:
+                raise BuildError(f"Could not load manifest: {e}")
+            for name, spec in specs.items():
+                old = self.specs.get(name)
+                if old is None or old.to_dict() != spec.to_dict():
+                    rebuild[name] = spec
+            self.specs = specs
+        for name, spec in self.specs.items():
+            if spec.icon and normpath(spec.icon) in changed:
+                rebuild[name] = spec
+        return list(rebuild.values())
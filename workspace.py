@@ -0,0 +1,209 @@
+"""
+Scratch workspaces for launcher builds.
+
+PyInstaller writes its work folder, the .spec file and the build inputs
+(launcher script, config, icon) next to the output. Deleting all of that after
+every build is a lot of small-file churn on slow, virus-scanned disks, and a
+crash half way leaves a half-cleaned output folder. Instead, each build runs
+in its own folder under a scratch root (the system temp folder by default, or
+a RAM-backed one), the finished launcher is moved into the output folder with
+a rename, and the scratch folder is deleted on a background thread. The
+time that deletion takes is reported to the build trace as I/O saved.
+
+Each scratch folder is locked while its build runs; folders left behind by a
+crashed build are swept the next time a build starts.
+"""
+import os
+import sys
+import time
+import errno
+import shutil
+import tempfile
+import threading
+import collections
+
+from analysis_cache import FileLock
+
+SCRATCH_FOLDER = "web-app-builder-scratch"
+
+# RAM-backed temp folders, where the system has one
+RAM_DIRS = ("/dev/shm",)
+
+# Unlocked scratch folders older than this are left over from a crash
+STALE_SECONDS = 10 * 60
+
+
+def default_scratch_root(ram=False):
+    """Scratch root: WEBAPP_BUILDER_SCRATCH, else a RAM-backed or the system temp folder."""
+    override = os.environ.get("WEBAPP_BUILDER_SCRATCH")
+    if override and not ram:
+        return override
+    if ram:
+        for folder in RAM_DIRS:
+            if sys.platform != 'win32' and os.path.isdir(folder) and os.access(folder, os.W_OK):
+                return os.path.join(folder, SCRATCH_FOLDER)
+        return None
+    return os.path.join(tempfile.gettempdir(), SCRATCH_FOLDER)
+
+
+class ScratchSpace:
+    """Hands out per-build scratch folders and deletes them in the background."""
+
+    def __init__(self, root=None, ram=False):
+        self.ram = ram
+        self.root = root or default_scratch_root(ram)
+        if self.root is None:
+            raise OSError("No RAM-backed temp folder on this system; point the scratch folder at a RAM disk")
+        self._init_state()
+
+    def _init_state(self):
+        self._mutex = threading.Lock()
+        self._locks = {}
+        self._pending = collections.deque()
+        self._cleaner = None
+        self._swept = False
+
+    # Options travel to batch pool workers; each process gets its own cleaner
+    def __getstate__(self):
+        return {"root": self.root, "ram": self.ram}
+
+    def __setstate__(self, state):
+        self.root = state["root"]
+        self.ram = state["ram"]
+        self._init_state()
+
+    @property
+    def kind(self):
+        """How the trace labels builds in this space."""
+        return "ram" if self.ram else "scratch"
+
+    def create(self, name):
+        """Create and lock a fresh scratch folder for one build. Returns its path."""
+        os.makedirs(self.root, exist_ok=True)
+        if not self._swept:
+            self._swept = True
+            self.sweep()
+        path = tempfile.mkdtemp(prefix=f"{name}-", dir=self.root)
+        lock = FileLock(path + ".lock")
+        lock.acquire()
+        with self._mutex:
+            self._locks[path] = lock
+        return path
+
+    def discard(self, path, done=None):
+        """
+        Delete a scratch folder (or any folder no longer needed) on the cleanup
+        thread. done, if given, is called there with the seconds the deletion
+        took: I/O an in-place build would have spent before finishing.
+        """
+        with self._mutex:
+            self._pending.append((path, done))
+            if self._cleaner is None:
+                # Not a daemon: pending deletions finish before the process exits
+                self._cleaner = threading.Thread(target=self._drain, name="scratch-cleanup")
+                self._cleaner.start()
+
+    def wait(self):
+        """Block until every discarded folder is gone."""
+        with self._mutex:
+            cleaner = self._cleaner
+        if cleaner is not None:
+            cleaner.join()
+
+    def _drain(self):
+        while True:
+            with self._mutex:
+                if not self._pending:
+                    self._cleaner = None
+                    return
+                path, done = self._pending.popleft()
+                lock = self._locks.pop(path, None)
+            start = time.monotonic()
+            shutil.rmtree(path, ignore_errors=True)
+            seconds = time.monotonic() - start
+            if lock is not None:
+                lock.release()
+                try:
+                    os.remove(path + ".lock")
+                except OSError:
+                    pass
+            if done is not None:
+                done(seconds)
+
+    def sweep(self):
+        """Remove scratch folders left behind by builds that crashed."""
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if not os.path.isdir(path) or now - os.path.getmtime(path) < STALE_SECONDS:
+                    continue
+            except OSError:
+                continue
+            lock = FileLock(path + ".lock")
+            if not lock.acquire(blocking=False):
+                continue  # still building
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                lock.release()
+            try:
+                os.remove(path + ".lock")
+            except OSError:
+                pass
+
+
+def publish(src, dest, scratch=None):
+    """
+    Move a finished file or folder from a scratch workspace to dest, replacing
+    what is there. Within one volume this is a single rename; across volumes
+    the copy goes to a temp name next to dest first, so dest is never seen
+    half written. A replaced folder is moved aside and deleted via scratch.
+    Returns "rename" or "copy".
+    """
+    parent = os.path.dirname(dest)
+    os.makedirs(parent, exist_ok=True)
+    method = "rename"
+    if os.path.isdir(src):
+        # A folder can't be renamed over an existing one: stage it next to dest,
+        # move the old one aside, then rename
+        staged = _unused_name(parent, ".publish-")
+        try:
+            os.rename(src, staged)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.copytree(src, staged)
+            method = "copy"
+        if os.path.exists(dest):
+            old = _unused_name(parent, ".replaced-")
+            os.rename(dest, old)
+            if scratch is not None:
+                scratch.discard(old)
+            else:
+                shutil.rmtree(old, ignore_errors=True)
+        os.rename(staged, dest)
+        return method
+
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        fd, staged = tempfile.mkstemp(prefix=".publish-", suffix=".tmp", dir=parent)
+        os.close(fd)
+        try:
+            shutil.copy2(src, staged)
+            os.replace(staged, dest)
+        except BaseException:
+            if os.path.exists(staged):
+                os.remove(staged)
+            raise
+        method = "copy"
+    return method
+
+
+def _unused_name(folder, prefix):
+    path = tempfile.mkdtemp(prefix=prefix, dir=folder)
+    os.rmdir(path)
+    return path